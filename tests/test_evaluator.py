@@ -0,0 +1,395 @@
+#!/usr/bin/env python
+"""测试Evaluator的评测流程"""
+
+import json
+import random
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from webmainbench.data import DataLoader, DataSample
+from webmainbench.evaluator import EvaluationResult, Evaluator, RunCheckpoint
+from webmainbench.extractors import BaseExtractor, ExtractionResult, test_model_extractor
+from webmainbench.evaluator.aggregator import MetricAccumulator, StreamingAggregator
+from webmainbench.evaluator.pipeline import run_pipeline
+
+
+def _strip_timing(sample_results):
+    """去掉与运行时间相关的字段，便于比较"""
+    return [{k: v for k, v in result.items() if k != 'extraction_time'} for result in sample_results]
+
+
+class TestParallelEvaluation(unittest.TestCase):
+    """测试workers参数的多进程评测"""
+
+    def setUp(self):
+        data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+        self.dataset = DataLoader.load_jsonl(data_path)
+        # 重复样本，保证多个块被分配到不同进程
+        self.dataset.samples = self.dataset.samples * 3
+
+    def test_parallel_matches_sequential(self):
+        """多进程评测结果与单进程一致且保持样本顺序"""
+        sequential = Evaluator().evaluate(self.dataset, "test-model")
+        parallel = Evaluator().evaluate(self.dataset, "test-model", workers=2, chunk_size=2)
+
+        self.assertEqual([r['sample_id'] for r in parallel.sample_results],
+                         [s.id for s in self.dataset.samples])
+        self.assertEqual(_strip_timing(parallel.sample_results), _strip_timing(sequential.sample_results))
+        self.assertEqual(parallel.overall_metrics, sequential.overall_metrics)
+        self.assertEqual(parallel.category_metrics, sequential.category_metrics)
+        self.assertEqual(parallel.error_analysis, sequential.error_analysis)
+
+
+class _BatchEchoExtractor(BaseExtractor):
+    """把HTML原样作为抽取结果，并记录每次batch_extract的批大小"""
+
+    def _setup(self):
+        self.batch_sizes = []
+
+    def _extract_content(self, html, url=None):
+        return ExtractionResult(content=html, success=True)
+
+    def batch_extract(self, html_list, url_list=None):
+        self.batch_sizes.append(len(html_list))
+        return [self.extract(html, url) for html, url in zip(html_list, url_list)]
+
+    def get_run_stats(self):
+        return {"batches": len(self.batch_sizes)}
+
+
+class TestBatchedExtraction(unittest.TestCase):
+    """evaluate_batched对重写了batch_extract的抽取器整批抽取"""
+
+    def test_batch_extract_is_used(self):
+        data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+        batched_extractor = _BatchEchoExtractor("echo")
+        batched = Evaluator().evaluate_batched(data_path, batched_extractor, batch_size=3)
+        sequential = Evaluator().evaluate(DataLoader.load_jsonl(data_path), _BatchEchoExtractor("echo"))
+
+        self.assertEqual(batched_extractor.batch_sizes, [3, 1])
+        self.assertEqual(_strip_timing(batched.sample_results), _strip_timing(sequential.sample_results))
+        self.assertEqual(batched.to_dict()["metadata"]["extractor_stats"], {"batches": 2})
+        self.assertEqual(EvaluationResult.from_dict(batched.to_dict()).extractor_stats, {"batches": 2})
+
+    def test_evaluate_drives_batch_extract(self):
+        """evaluate通过batch_extract并发抽取，结果与串行一致"""
+        dataset = DataLoader.load_jsonl(Path(__file__).parent.parent / "data" / "sample_dataset.jsonl")
+        serial = Evaluator().evaluate(dataset, "trafilatura")
+        with patch.object(BaseExtractor, 'batch_extract', autospec=True,
+                          side_effect=BaseExtractor.batch_extract) as batch_extract:
+            threaded = Evaluator().evaluate(dataset, "trafilatura", extract_workers=3, chunk_size=2)
+        self.assertEqual(_strip_timing(threaded.sample_results), _strip_timing(serial.sample_results))
+        self.assertEqual([call.kwargs for call in batch_extract.call_args_list],
+                         [{"workers": 3, "mode": None}] * 2)
+
+    def test_falls_back_when_batch_fails(self):
+        data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+        extractor = _BatchEchoExtractor("echo")
+        with patch.object(_BatchEchoExtractor, 'batch_extract', side_effect=RuntimeError("boom")):
+            result = Evaluator().evaluate_batched(data_path, extractor, batch_size=2)
+        self.assertEqual(len(result.sample_results), 4)
+        self.assertTrue(all(r['extraction_success'] for r in result.sample_results))
+
+
+class TestPipelinedEvaluation(unittest.TestCase):
+    """测试抽取/打分两级流水线"""
+
+    def test_pipeline_preserves_order(self):
+        """流水线输出保持输入顺序"""
+        def extract(x):
+            time.sleep(random.random() * 0.005)
+            return x * 2
+
+        outputs = list(run_pipeline(range(50), extract, lambda x, y: y + 1,
+                                    extract_workers=4, score_workers=3, queue_size=4))
+        self.assertEqual([item for item, _, _ in outputs], list(range(50)))
+        self.assertEqual([result for _, result, _ in outputs], [x * 2 + 1 for x in range(50)])
+
+    def test_pipeline_reports_stage_errors(self):
+        """某一级抛出的异常只影响对应样本"""
+        def extract(x):
+            if x == 3:
+                raise RuntimeError("extract failed")
+            return x
+
+        def score(x, y):
+            if x == 5:
+                raise ValueError("score failed")
+            return y
+
+        outputs = list(run_pipeline(range(8), extract, score))
+        errors = {item: error for item, _, error in outputs if error is not None}
+        self.assertEqual(set(errors), {3, 5})
+        self.assertIsInstance(errors[3], RuntimeError)
+        self.assertIsInstance(errors[5], ValueError)
+
+    def test_pipeline_backpressure(self):
+        """在途样本数受队列容量限制"""
+        lock = threading.Lock()
+        state = {'read': 0, 'consumed': 0, 'max_ahead': 0}
+
+        def items():
+            for i in range(100):
+                with lock:
+                    state['read'] += 1
+                    state['max_ahead'] = max(state['max_ahead'], state['read'] - state['consumed'])
+                yield i
+
+        for _ in run_pipeline(items(), lambda x: x, lambda x, y: y, queue_size=2):
+            time.sleep(0.001)
+            with lock:
+                state['consumed'] += 1
+        # queue_size * 2 + 抽取线程 + 打分线程，外加消费端尚未计数的一个
+        self.assertLessEqual(state['max_ahead'], 2 * 2 + 1 + 1 + 1)
+
+    def test_pipeline_overlaps_stages(self):
+        """抽取与打分并发执行，总耗时接近较慢的一级"""
+        n, delay = 20, 0.02
+        start = time.time()
+        list(run_pipeline(range(n), lambda x: time.sleep(delay), lambda x, y: time.sleep(delay)))
+        self.assertLess(time.time() - start, n * delay * 2 * 0.8)
+
+    def test_evaluate_batched_pipelined_matches_serial(self):
+        """流水线模式的批处理评测结果与串行一致"""
+        data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+        serial = Evaluator().evaluate_batched(data_path, "test-model", batch_size=3)
+        pipelined = Evaluator().evaluate_batched(data_path, "test-model", batch_size=3, pipelined=True,
+                                                 extract_workers=2, score_workers=2)
+
+        self.assertEqual(_strip_timing(pipelined.sample_results), _strip_timing(serial.sample_results))
+        self.assertEqual(pipelined.overall_metrics, serial.overall_metrics)
+        self.assertEqual(pipelined.total_samples, serial.total_samples)
+
+
+class TestResumableEvaluation(unittest.TestCase):
+    """测试带检查点的可恢复评测"""
+
+    def setUp(self):
+        self.data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.run_dir = Path(self.tmp_dir.name) / "run"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_resume_skips_completed_samples(self):
+        """重启后只评测未完成的样本，整体结果与一次性运行一致"""
+        fresh = Evaluator().evaluate_batched(self.data_path, "test-model", batch_size=2)
+
+        # 模拟在完成前两个样本后中断
+        Evaluator().evaluate_batched(self.data_path, "test-model", batch_size=2, max_samples=2,
+                                     run_dir=self.run_dir)
+
+        extractor_class = test_model_extractor.TestModelExtractor
+        original = extractor_class.extract_from_sample
+        with patch.object(extractor_class, 'extract_from_sample', autospec=True,
+                          side_effect=original) as mocked:
+            resumed = Evaluator().evaluate_batched(self.data_path, "test-model", batch_size=2,
+                                                   run_dir=self.run_dir)
+        self.assertEqual(mocked.call_count, fresh.total_samples - 2)
+
+        self.assertEqual(resumed.total_samples, fresh.total_samples)
+        self.assertEqual(_strip_timing(resumed.sample_results), _strip_timing(fresh.sample_results))
+        self.assertEqual(resumed.overall_metrics, fresh.overall_metrics)
+
+    def test_resume_respects_current_filter(self):
+        """重新运行时只基于本次选中的样本重建结果"""
+        Evaluator().evaluate_batched(self.data_path, "test-model", batch_size=2, run_dir=self.run_dir)
+        limited = Evaluator().evaluate_batched(self.data_path, "test-model", batch_size=2, max_samples=2,
+                                               run_dir=self.run_dir)
+        fresh = Evaluator().evaluate_batched(self.data_path, "test-model", batch_size=2, max_samples=2)
+
+        self.assertEqual(limited.total_samples, 2)
+        self.assertEqual(_strip_timing(limited.sample_results), _strip_timing(fresh.sample_results))
+        self.assertEqual(limited.overall_metrics, fresh.overall_metrics)
+
+    def test_config_change_starts_new_run(self):
+        """配置不同的运行不会复用已有记录"""
+        Evaluator().evaluate_batched(self.data_path, "test-model", run_dir=self.run_dir)
+        checkpoint = RunCheckpoint(self.run_dir, "test-model", {"variant": 2})
+        self.assertEqual(checkpoint.completed_count, 0)
+        self.assertGreater(RunCheckpoint(self.run_dir, "test-model").completed_count, 0)
+
+    def test_truncated_log_line_is_ignored(self):
+        """日志末尾被截断的记录会被忽略，后续追加不受影响"""
+        checkpoint = RunCheckpoint(self.run_dir, "test-model")
+        checkpoint.append([{'sample_id': 'a', 'extraction_success': True, 'metrics': {}}], [])
+        with open(checkpoint.log_path, 'a', encoding='utf-8') as f:
+            f.write('{"sample_id": "b", "extrac')
+
+        checkpoint = RunCheckpoint(self.run_dir, "test-model")
+        self.assertTrue(checkpoint.is_done('a'))
+        self.assertFalse(checkpoint.is_done('b'))
+
+        checkpoint.append([{'sample_id': 'b', 'extraction_success': True, 'metrics': {}}], [])
+        reloaded = RunCheckpoint(self.run_dir, "test-model")
+        self.assertTrue(reloaded.is_done('b'))
+        self.assertEqual(len(reloaded.collect()[0]), 2)
+
+
+class TestStreamingAggregation(unittest.TestCase):
+    """测试流式聚合与内存聚合结果一致"""
+
+    METRICS = ["text_edit", "code_edit", "table_edit", "table_TEDS", "formula_edit", "overall"]
+
+    def _make_results(self, n, seed=0):
+        rng = random.Random(seed)
+        samples, results, errors = [], [], []
+        for i in range(n):
+            sample = DataSample(id=f"s{i}", html="<p>x</p>", groundtruth_content="",
+                                groundtruth_content_list=[], content_type=rng.choice(["news", "blog", None]))
+            samples.append(sample)
+            if rng.random() < 0.1:
+                message = rng.choice(["Request timeout", "Connection reset", "Empty HTML input", "boom"])
+                results.append({'sample_id': sample.id, 'extraction_success': False,
+                                'extraction_error': message, 'metrics': {}})
+                errors.append({'sample_id': sample.id, 'error': message})
+                continue
+            metrics = {
+                name: {'score': rng.random(), 'success': rng.random() > 0.2, 'details': {}}
+                for name in self.METRICS if rng.random() > 0.1
+            }
+            results.append({'sample_id': sample.id, 'extraction_success': True, 'metrics': metrics})
+        return samples, results, errors
+
+    def test_matches_in_memory_aggregation(self):
+        """总体指标、分类指标和错误分析与内存计算完全一致"""
+        samples, results, errors = self._make_results(500)
+        aggregator = StreamingAggregator()
+        for sample, result in zip(samples, results):
+            aggregator.add_result(result, sample.content_type)
+        for error in errors:
+            aggregator.add_error(error)
+
+        evaluator = Evaluator()
+        self.assertEqual(aggregator.overall_metrics(), evaluator._aggregate_metrics(results))
+        self.assertEqual(aggregator.category_metrics(), evaluator._calculate_category_metrics(results, samples))
+        self.assertEqual(aggregator.error_analysis(), evaluator._analyze_errors(errors, results))
+
+    def test_metric_statistics(self):
+        """统计量与直接计算一致"""
+        samples, results, _ = self._make_results(200, seed=1)
+        aggregator = StreamingAggregator()
+        for result in results:
+            aggregator.add_result(result)
+
+        scores = [r['metrics']['text_edit']['score'] for r in results
+                  if 'text_edit' in r['metrics'] and r['metrics']['text_edit']['success']]
+        stats = aggregator.metric_statistics()['text_edit']
+        mean = sum(scores) / len(scores)
+        self.assertEqual(stats['count'], len(scores))
+        self.assertAlmostEqual(stats['mean'], mean)
+        self.assertAlmostEqual(stats['std'], (sum((x - mean) ** 2 for x in scores) / len(scores)) ** 0.5)
+        self.assertEqual(stats['min'], min(scores))
+        self.assertEqual(stats['max'], max(scores))
+
+    def test_std_of_near_constant_series(self):
+        """大量近似常数的分数：标准差与numpy一致，不受相消误差影响"""
+        rng = np.random.default_rng(0)
+        values = 0.9 + rng.normal(scale=1e-9, size=200_000)
+        accumulator = MetricAccumulator()
+        for value in values.tolist():
+            accumulator.add(value)
+
+        expected = float(np.std(values))
+        self.assertGreater(accumulator.std, 0.0)
+        self.assertLess(abs(accumulator.std - expected), 1e-6 * expected)
+
+    def test_batched_output_file_keeps_exact_aggregates(self):
+        """写出到文件时不保留样本结果，整体与分类指标仍覆盖全部样本"""
+        data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+        in_memory = Evaluator().evaluate(DataLoader.load_jsonl(data_path), "test-model")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = Path(tmp_dir) / "rows.jsonl"
+            batched = Evaluator().evaluate_batched(data_path, "test-model", batch_size=1,
+                                                   output_file=output_file)
+            with open(output_file, 'r', encoding='utf-8') as f:
+                rows = [line for line in f if line.strip()]
+
+        self.assertEqual(batched.sample_results, [])
+        self.assertEqual(len(rows), in_memory.total_samples)
+        self.assertEqual(batched.overall_metrics, in_memory.overall_metrics)
+        self.assertIsNotNone(batched.category_metrics)
+        self.assertEqual(batched.category_metrics, in_memory.category_metrics)
+
+    def test_batched_metric_statistics_match_in_memory(self):
+        """两条路径的metric_statistics定义与字段一致，overall统计的是逐样本overall分数"""
+        data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+        for bootstrap_resamples in (0, 200):
+            evaluator = Evaluator(bootstrap_resamples=bootstrap_resamples)
+            in_memory = evaluator.evaluate(DataLoader.load_jsonl(data_path), "test-model")
+            batched = evaluator.evaluate_batched(data_path, "test-model", batch_size=2)
+            self.assertEqual(batched.metric_statistics, in_memory.metric_statistics)
+
+            overall = in_memory.metric_statistics['overall']
+            self.assertLessEqual(overall['min'], overall['mean'])
+            self.assertLessEqual(overall['mean'], overall['max'])
+            self.assertEqual('p50' in overall, bootstrap_resamples > 0)
+
+
+class TestRescore(unittest.TestCase):
+    """测试基于已保存抽取结果的指标重算"""
+
+    CONFIG = {"table_TEDS": {"structure_only": True}, "text_edit": {"approximate": True}}
+
+    def setUp(self):
+        self.data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+        self.dataset = DataLoader.load_jsonl(self.data_path)
+        self.baseline = Evaluator().evaluate(self.dataset, "test-model")
+
+    def _check(self, rescored, metrics):
+        config = {name: self.CONFIG[name] for name in metrics}
+        expected = Evaluator(config).evaluate(DataLoader.load_jsonl(self.data_path), "test-model")
+        for old, new, fresh in zip(self.baseline.sample_results, rescored.sample_results,
+                                   expected.sample_results):
+            self.assertEqual({k: v for k, v in new.items() if k != 'metrics'},
+                             {k: v for k, v in old.items() if k != 'metrics'})
+            for name, value in new['metrics'].items():
+                source = fresh if name in metrics or name == 'overall' else old
+                self.assertEqual(value, source['metrics'][name], name)
+        self.assertEqual(rescored.overall_metrics, expected.overall_metrics)
+        self.assertEqual(rescored.category_metrics, expected.category_metrics)
+        self.assertEqual(rescored.error_analysis, self.baseline.error_analysis)
+        self.assertEqual(rescored.metric_config, config)
+
+    def test_rescore_json_matches_fresh_run(self):
+        """只重算选定指标，结果与按新配置完整评测一致"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results_path = Path(tmp_dir) / "results.json"
+            with open(results_path, 'w', encoding='utf-8') as f:
+                json.dump(self.baseline.to_dict(), f, ensure_ascii=False)
+            with patch.object(test_model_extractor.TestModelExtractor, 'extract',
+                              side_effect=AssertionError("rescore must not extract")):
+                rescored = Evaluator(self.CONFIG).rescore(results_path, self.dataset, ["table_TEDS"])
+        # 未选中的text_edit保持旧值，即使新配置不同
+        self._check(rescored, ["table_TEDS"])
+        self.assertEqual(rescored.extractor_name, self.baseline.extractor_name)
+
+    def test_rescore_batched_output_in_parallel(self):
+        """evaluate_batched写出的JSONL可多进程重算，与单进程一致"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = Path(tmp_dir) / "rows.jsonl"
+            Evaluator().evaluate_batched(self.data_path, "test-model", batch_size=2, output_file=output_file)
+            evaluator = Evaluator(self.CONFIG)
+            serial = evaluator.rescore(output_file, self.dataset, ["table_TEDS", "text_edit"])
+            parallel = evaluator.rescore(output_file, self.dataset, ["table_TEDS", "text_edit"],
+                                         workers=2, chunk_size=1)
+        self.assertEqual(_strip_timing(parallel.sample_results), _strip_timing(serial.sample_results))
+        self.baseline.sample_results = _strip_timing(self.baseline.sample_results)
+        serial.sample_results = _strip_timing(serial.sample_results)
+        self._check(serial, ["table_TEDS", "text_edit"])
+
+    def test_unknown_metric(self):
+        with self.assertRaises(ValueError):
+            Evaluator().rescore(self.baseline, self.dataset, ["bleu"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+"""测试抽取结果的磁盘缓存"""
+
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from webmainbench.data import DataLoader
+from webmainbench.evaluator import Evaluator
+from webmainbench.extractors import BaseExtractor, ExtractionResult, ExtractionCache
+
+
+class CountingExtractor(BaseExtractor):
+    """记录调用次数的简单抽取器"""
+
+    version = "1.0"
+
+    def _setup(self):
+        self.calls = 0
+
+    def _extract_content(self, html, url=None):
+        self.calls += 1
+        return ExtractionResult(content=html[:50], content_list=[], success=True)
+
+
+def _put_entries(cache, start, count):
+    """在子进程中写入一批缓存条目"""
+    result = ExtractionResult(content="x" * 100, success=True)
+    for i in range(start, start + count):
+        cache.put(ExtractionCache.make_key(str(i), None, "e", "1", {}), "e", result)
+
+
+def _disk_size(cache_dir):
+    return sum(path.stat().st_size for path in Path(cache_dir).glob("*/*/*.json"))
+
+
+class TestExtractionCache(unittest.TestCase):
+    """测试ExtractionCache"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ExtractionCache(Path(self.tmp_dir.name) / "cache")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_hit_after_first_extraction(self):
+        """相同输入第二次抽取直接命中缓存"""
+        extractor = CountingExtractor("counting")
+        extractor.extraction_cache = self.cache
+
+        first = extractor.extract("<p>hello</p>", "http://a")
+        second = extractor.extract("<p>hello</p>", "http://a")
+        self.assertEqual(extractor.calls, 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(self.cache), 1)
+
+        # 新的缓存对象从磁盘重建索引
+        reopened = ExtractionCache(self.cache.cache_dir)
+        key = ExtractionCache.make_key("<p>hello</p>", "http://a", "counting", "1.0", {})
+        self.assertEqual(reopened.get(key).content, first.content)
+
+    def test_hit_reports_lookup_time(self):
+        """命中缓存时extraction_time为本次查找耗时，而不是原始抽取耗时"""
+        extractor = CountingExtractor("counting")
+        extractor.extraction_cache = self.cache
+        key = ExtractionCache.make_key("<p>slow</p>", None, "counting", "1.0", {})
+        self.cache.put(key, "counting", ExtractionResult(content="x", extraction_time=99.0))
+
+        result = extractor.extract("<p>slow</p>")
+        self.assertEqual(extractor.calls, 0)
+        self.assertLess(result.extraction_time, 1.0)
+
+    def test_key_depends_on_inputs(self):
+        """html、url、名称、版本和配置任何一项变化都会得到不同的键"""
+        base = ("<p>x</p>", "u", "e", "1", {"a": 1})
+        keys = {
+            ExtractionCache.make_key(*base),
+            ExtractionCache.make_key("<p>y</p>", "u", "e", "1", {"a": 1}),
+            ExtractionCache.make_key("<p>x</p>", "v", "e", "1", {"a": 1}),
+            ExtractionCache.make_key("<p>x</p>", "u", "f", "1", {"a": 1}),
+            ExtractionCache.make_key("<p>x</p>", "u", "e", "2", {"a": 1}),
+            ExtractionCache.make_key("<p>x</p>", "u", "e", "1", {"a": 2}),
+        }
+        self.assertEqual(len(keys), 6)
+
+    def test_failed_results_are_not_cached(self):
+        """失败的抽取结果不写入缓存"""
+        extractor = CountingExtractor("counting")
+        extractor.extraction_cache = self.cache
+        extractor.extract("   ")
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction(self):
+        """超过容量时淘汰最久未使用的条目"""
+        result = ExtractionResult(content="x" * 100, success=True)
+        keys = [ExtractionCache.make_key(str(i), None, "e", "1", {}) for i in range(3)]
+        self.cache.put(keys[0], "e", result)
+        entry_size = self.cache.total_size
+        cache = ExtractionCache(self.cache.cache_dir, max_size_bytes=entry_size * 2)
+
+        time.sleep(0.01)
+        cache.put(keys[1], "e", result)
+        time.sleep(0.01)
+        cache.get(keys[0])  # keys[0] 变为最近使用
+        time.sleep(0.01)
+        cache.put(keys[2], "e", result)
+
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+        self.assertLessEqual(cache.total_size, entry_size * 2)
+
+    def test_concurrent_threads_keep_size_bound(self):
+        """多线程并发写入时索引与容量限制保持一致"""
+        _put_entries(self.cache, 0, 1)
+        entry_size = self.cache.total_size
+        cache = ExtractionCache(self.cache.cache_dir, max_size_bytes=entry_size * 10)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda start: _put_entries(cache, start, 25), range(1, 200, 25)))
+
+        self.assertLessEqual(_disk_size(cache.cache_dir), entry_size * 10)
+        self.assertEqual(cache.total_size, _disk_size(cache.cache_dir))
+
+    def test_worker_processes_share_size_bound(self):
+        """多个进程写入同一缓存目录时共同遵守一个容量上限"""
+        _put_entries(self.cache, 0, 1)
+        entry_size = self.cache.total_size
+        cache = ExtractionCache(self.cache.cache_dir, max_size_bytes=entry_size * 10)
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(_put_entries, [cache] * 4, range(1, 100, 25), [25] * 4))
+
+        self.assertLessEqual(_disk_size(cache.cache_dir), entry_size * 10)
+        self.assertEqual(cache.total_size, _disk_size(cache.cache_dir))
+
+    def test_invalidate_by_extractor(self):
+        """可以只清除某个抽取器的缓存"""
+        result = ExtractionResult(content="x", success=True)
+        key_a = ExtractionCache.make_key("h", None, "a", "1", {})
+        key_b = ExtractionCache.make_key("h", None, "b", "1", {})
+        self.cache.put(key_a, "a", result)
+        self.cache.put(key_b, "b", result)
+
+        self.cache.invalidate("a")
+        self.assertIsNone(self.cache.get(key_a))
+        self.assertIsNotNone(self.cache.get(key_b))
+
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_evaluator_reuses_cache(self):
+        """Evaluator开启缓存后，再次评测不需要重新抽取"""
+        data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+        dataset = DataLoader.load_jsonl(data_path)
+
+        first_extractor = CountingExtractor("counting")
+        first = Evaluator(extraction_cache=self.cache).evaluate(dataset, first_extractor)
+        self.assertEqual(first_extractor.calls, len(dataset.samples))
+
+        second_extractor = CountingExtractor("counting")
+        second = Evaluator(extraction_cache=self.cache).evaluate(dataset, second_extractor)
+        self.assertEqual(second_extractor.calls, 0)
+        self.assertEqual(second.overall_metrics, first.overall_metrics)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -87,5 +87,45 @@ print(result)</code></pre>
             self.skipTest(f"Resiliparse 抽取器未注册: {e}")
 
 
+
+class TestConcurrentBatchExtract(unittest.TestCase):
+    """batch_extract的线程/进程并发：结果与串行抽取一致且保持输入顺序"""
+
+    HTMLS = [
+        f"<html><body><h1>标题 {i}</h1><p>{'正文段落 ' * (i + 5)}</p><p>第{i}页的第二段内容。</p></body></html>"
+        for i in range(8)
+    ] + ["   "]
+
+    @staticmethod
+    def _contents(results):
+        return [(r.success, r.content, r.error_message) for r in results]
+
+    def test_thread_mode_matches_serial(self):
+        ExtractorFactory.auto_discover()
+        extractor = ExtractorFactory.create("resiliparse")
+        self.assertEqual(extractor.preferred_batch_mode, "thread")
+        serial = extractor.batch_extract(self.HTMLS)
+        threaded = extractor.batch_extract(self.HTMLS, workers=4)
+        self.assertEqual(self._contents(threaded), self._contents(serial))
+        self.assertEqual(threaded[-1].error_message, "Empty HTML input")
+
+    def test_process_mode_matches_serial(self):
+        ExtractorFactory.auto_discover()
+        extractor = ExtractorFactory.create("trafilatura")
+        self.assertEqual(extractor.preferred_batch_mode, "process")
+        urls = [f"https://example.com/{i}" for i in range(len(self.HTMLS))]
+        serial = extractor.batch_extract(self.HTMLS, urls)
+        try:
+            processes = extractor.batch_extract(self.HTMLS, urls, workers=2)
+        finally:
+            extractor.close_worker_pool()
+        self.assertEqual(self._contents(processes), self._contents(serial))
+
+    def test_unknown_mode(self):
+        ExtractorFactory.auto_discover()
+        with self.assertRaises(ValueError):
+            ExtractorFactory.create("resiliparse").batch_extract(self.HTMLS, workers=2, mode="fiber")
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""测试groundtruth分割索引的预计算与sidecar持久化"""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from webmainbench.data import DataLoader, GroundtruthSplitIndex
+from webmainbench.metrics.base import BaseMetric
+
+
+class TestGroundtruthSplitIndex(unittest.TestCase):
+    """测试GroundtruthSplitIndex"""
+
+    def setUp(self):
+        self.data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+        self.dataset = DataLoader.load_jsonl(self.data_path)
+
+    def test_split_matches_split_content(self):
+        """索引中的分割结果与直接分割一致"""
+        index = GroundtruthSplitIndex()
+        index.build(self.dataset.samples)
+        for sample in self.dataset.samples:
+            expected = BaseMetric.split_content(sample.groundtruth_content, sample.groundtruth_content_list)
+            self.assertEqual(index.get(sample), expected)
+
+    def test_sidecar_round_trip(self):
+        """sidecar文件可以保存并被DataLoader自动加载"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_copy = Path(tmp_dir) / "dataset.jsonl"
+            data_copy.write_bytes(self.data_path.read_bytes())
+
+            index = DataLoader.precompute_groundtruth_splits(data_copy)
+            sidecar = GroundtruthSplitIndex.sidecar_path(data_copy)
+            self.assertTrue(sidecar.exists())
+
+            reloaded = DataLoader.load_jsonl(data_copy)
+            self.assertIsNotNone(reloaded.groundtruth_index)
+            self.assertEqual(len(reloaded.groundtruth_index), len(index))
+
+            # 已缓存的样本不再重新分割
+            with patch.object(BaseMetric, 'split_content') as mocked:
+                for sample in reloaded.samples:
+                    reloaded.groundtruth_index.get_or_compute(sample)
+                mocked.assert_not_called()
+
+    def test_hash_changes_with_content(self):
+        """内容变化时缓存键随之变化"""
+        key1 = GroundtruthSplitIndex.content_hash("a", [])
+        key2 = GroundtruthSplitIndex.content_hash("b", [])
+        key3 = GroundtruthSplitIndex.content_hash("a", [{"type": "code", "content": "x"}])
+        self.assertEqual(len({key1, key2, key3}), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""测试HTML解析后端：lxml快速路径与html.parser的表格、树结构一致性"""
+
+import json
+import random
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from webmainbench.data import DataSample, GroundtruthSplitIndex
+from webmainbench.metrics import MetricCalculator
+from webmainbench.metrics.base import MetricResult
+from webmainbench.metrics.html_backend import find_tables, get_html_backend
+from webmainbench.metrics.segmenter import split_markdown
+from webmainbench.metrics.teds_metrics import TEDSMetric
+
+try:
+    import lxml.html  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+
+CASES = [
+    "<table><tr><td>1</td></tr></table> text <TABLE border=1><tr><td>2</td></tr></TABLE>",
+    "<table><tr><td><table><tr><td>x</td></tr></table></td></tr></table>",
+    "<table><tr><td>unclosed",
+    "x <table class=a id='b' data-x=\"1>2\"><tr><td>a &amp; b &nbsp;c<br>d</td>"
+    "<td colspan=2><!-- c --><b>x</b> y</td></tr></table> z",
+    "<table><thead><tr><th>h</th></tr></thead><tbody><tr><td>1 &lt; 2 &amp; 3</td></tr></tbody></table>",
+    "<table><tr><td title='say \"hi\"'>q</td><td><img src=x.png alt=\"\"></td></tr></table>",
+    "| md | x |\n|---|---|\n| 1 | 2 |\n\n<table>\n<tr><td>a</td></tr>\n</table>\n$$x<y$$",
+    # 省略的闭标签：lxml补全为两行，html.parser保留字面嵌套
+    "<table><tr><td>a<td>b<tr><td>c<td>d</table>",
+    "<table><tr><td><p>a<p>b</td></tr></table>",
+    "<table>\n <tr><td>  </td></tr>\n</table>",
+    # 不规范的标记
+    "<table><tr><td>a</b></td></tr></table></table><td>x",
+    "<table><tr><td><div>a</td></div></tr></table>",
+    "<div><table><tr><td>1<tr><td>2</div> after",
+    "<table><td>x</td><table><tr><td>y</td></tr></table>",
+    "<textarea><table><tr><td>t</td></tr></table></textarea><table><tr><td>u</td></tr></table>",
+]
+
+# 随机拼接的标记片段，覆盖合法与不合法的表格
+FUZZ_TOKENS = [
+    "<table>", "</table>", "<tr>", "</tr>", "<td>", "</td>", "<th>", "</th>", "<tbody>", "</tbody>",
+    "<p>", "</p>", "<b>", "</b>", "<br>", "<div>", "</div>", "a", "b c", " ", "\n", "&amp;", "&nbsp;",
+    "<", ">", "<!-- x -->", "<td colspan=2>", "<TD>", "</TR>", "<pre>  </pre>",
+    "| x | y |\n|---|---|\n| 1 | 2 |\n",
+]
+
+
+def _dataset_texts():
+    data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+    with open(data_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            for value in json.loads(line).values():
+                if isinstance(value, str) and value:
+                    yield value
+
+
+def _tree_signature(tree):
+    return tree.tags, tree.texts, tree.leftmost
+
+
+@unittest.skipUnless(HAS_LXML, "lxml not installed")
+class TestLxmlParity(unittest.TestCase):
+
+    def test_split_matches_html_parser(self):
+        for text in list(_dataset_texts()) + CASES:
+            self.assertEqual(split_markdown(text, "lxml"), split_markdown(text), repr(text[:80]))
+
+    def test_fuzzed_markup_matches_html_parser(self):
+        rng = random.Random(0)
+        reference = TEDSMetric("teds", {"multi_table": True})
+        fast = TEDSMetric("teds", {"multi_table": True, "html_parser": "lxml"})
+        for _ in range(500):
+            text = "<table>" + "".join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(1, 30)))
+            self.assertEqual(split_markdown(text, "lxml"), split_markdown(text), repr(text))
+            self.assertEqual([_tree_signature(tree) for tree in fast._parse_all_tables(text)],
+                             [_tree_signature(tree) for tree in reference._parse_all_tables(text)], repr(text))
+
+    def test_trees_match_html_parser(self):
+        for structure_only in (False, True):
+            reference = TEDSMetric("teds", {"structure_only": structure_only})
+            fast = TEDSMetric("teds", {"structure_only": structure_only, "html_parser": "lxml"})
+            for text in list(_dataset_texts()) + CASES:
+                if '<table' not in text.lower():
+                    continue
+                expected = [_tree_signature(tree) for tree in reference._parse_all_tables(text)]
+                actual = [_tree_signature(tree) for tree in fast._parse_all_tables(text)]
+                self.assertEqual(actual, expected, repr(text[:80]))
+
+    def test_teds_scores_match(self):
+        table_edit_result = MetricResult(metric_name="table_edit", score=1.0)
+        optional_end_tags = "<table><tr><td>a</td><td>b</td></tr><tr><td>c</td><td>d</td></tr></table>"
+        for predicted, groundtruth in [(CASES[3], CASES[4]), (CASES[7], optional_end_tags)]:
+            reference = TEDSMetric("teds").calculate(predicted, groundtruth, table_edit_result=table_edit_result)
+            fast = TEDSMetric("teds", {"html_parser": "lxml"}).calculate(
+                predicted, groundtruth, table_edit_result=table_edit_result)
+            self.assertEqual(fast.score, reference.score)
+
+    def test_well_formed_tables_use_lxml(self):
+        backend, tables = find_tables("<p>x</p><table><tr><td>a</td></tr></table>", "lxml")
+        self.assertEqual(backend.name, "lxml")
+        self.assertEqual(len(tables), 1)
+        backend, _ = find_tables(CASES[7], "lxml")
+        self.assertEqual(backend.name, "html.parser")
+
+
+class TestHtmlBackendSelection(unittest.TestCase):
+
+    def test_unknown_parser(self):
+        with self.assertRaises(ValueError):
+            get_html_backend("html5lib")
+
+    def test_falls_back_when_lxml_fails(self):
+        backend = get_html_backend("lxml")
+        with mock.patch.object(type(backend), "find_tables", side_effect=ValueError("bad document")):
+            used, tables = find_tables("<table><tr><td>1</td></tr></table>", "lxml")
+        self.assertEqual(used.name, "html.parser")
+        self.assertEqual(len(tables), 1)
+
+    def test_calculator_config(self):
+        calculator = MetricCalculator({"html_parser": "lxml", "table_TEDS": {"structure_only": True}})
+        self.assertEqual(calculator.metrics["table_TEDS"].html_parser, "lxml")
+        self.assertTrue(calculator.metrics["table_TEDS"].structure_only)
+        self.assertEqual(calculator.metrics["code_edit"].config["html_parser"], "lxml")
+        self.assertIsNone(MetricCalculator().metrics["table_TEDS"].html_parser)
+
+    def test_groundtruth_index_keys(self):
+        sample = DataSample(id="1", html="", groundtruth_content="<table><tr><td>1</td></tr></table>",
+                            groundtruth_content_list=[])
+        self.assertEqual(GroundtruthSplitIndex.content_hash(sample.groundtruth_content),
+                         GroundtruthSplitIndex.content_hash(sample.groundtruth_content, None, "html.parser"))
+        self.assertNotEqual(GroundtruthSplitIndex.content_hash(sample.groundtruth_content),
+                            GroundtruthSplitIndex.content_hash(sample.groundtruth_content, None, "lxml"))
+
+        index = GroundtruthSplitIndex()
+        index.get_or_compute(sample, "lxml")
+        self.assertIsNone(index.get(sample))
+        self.assertIsNotNone(index.get(sample, "lxml"))
+
+
+if __name__ == '__main__':
+    unittest.main()
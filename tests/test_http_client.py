@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""测试JinaExtractor的并发HTTP客户端：连接复用、并发上限、限流与重试"""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from webmainbench.extractors import JinaExtractor
+from webmainbench.extractors.http_client import AsyncHttpClient
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """模拟Reader API：/flaky-N 先失败N次，/down 始终503，其余返回JSON"""
+
+    protocol_version = "HTTP/1.1"  # 保持连接
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        path = self.path.lstrip("/")
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            attempt = server.attempts.get(path, 0) + 1
+            server.attempts[path] = attempt
+        try:
+            time.sleep(server.latency)
+            if path == "down":
+                self._reply(503, b"unavailable", "text/plain")
+            elif path.startswith("flaky-") and attempt <= int(path.split("-")[1]):
+                self._reply(429 if attempt == 1 else 502, b"retry", "text/plain")
+            else:
+                body = json.dumps({"title": path, "content": f"content of {path}"}).encode()
+                self._reply(200, body, "application/json")
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _reply(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestJinaBatchExtract(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.latency = 0.02
+        self.server.connections = self.server.requests = 0
+        self.server.in_flight = self.server.max_in_flight = 0
+        self.server.attempts = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.api_url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _extractor(self, **config):
+        config.setdefault("api_url", self.api_url)
+        return JinaExtractor("jina-ai", config)
+
+    def test_results_keep_input_order(self):
+        urls = [f"page{i}" for i in range(20)] + [None]
+        results = self._extractor().batch_extract(["<p>x</p>"] * 20 + ["<p>x</p>"], urls)
+
+        self.assertEqual([r.content for r in results[:20]], [f"content of page{i}" for i in range(20)])
+        self.assertEqual([r.title for r in results[:20]], urls[:20])
+        self.assertFalse(results[-1].success)
+        self.assertEqual(self.server.requests, 20)
+
+    def test_connections_are_reused(self):
+        """保持连接：连接数不超过并发数"""
+        extractor = self._extractor(max_concurrency=4)
+        results = extractor.batch_extract(["<p>x</p>"] * 40, [f"p{i}" for i in range(40)])
+
+        self.assertTrue(all(r.success for r in results))
+        self.assertLessEqual(self.server.connections, 4)
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(self.server.max_in_flight, 4)
+
+    def test_retries_transient_errors(self):
+        extractor = self._extractor(max_retries=3)
+        client = extractor.client
+        client.backoff_base = 0.01
+        results = extractor.batch_extract(["<p>x</p>"] * 3, ["flaky-2", "ok", "down"])
+
+        self.assertTrue(results[0].success)
+        self.assertEqual(results[0].content, "content of flaky-2")
+        self.assertEqual(self.server.attempts["flaky-2"], 3)
+        self.assertTrue(results[1].success)
+        self.assertFalse(results[2].success)
+        self.assertIn("503", results[2].error_message)
+        self.assertEqual(self.server.attempts["down"], 4)
+
+    def test_rate_limit_bounds_throughput(self):
+        """限流：总耗时由请求速率决定，而非单次延迟"""
+        self.server.latency = 0.0
+        client = AsyncHttpClient(max_concurrency=16, rate_limit=100, burst=1)
+        start = time.monotonic()
+        results = client.fetch_all([f"{self.api_url}p{i}" for i in range(31)])
+        elapsed = time.monotonic() - start
+        client.close()
+
+        self.assertTrue(all(r.response.status_code == 200 for r in results))
+        self.assertGreaterEqual(elapsed, 0.29)
+
+    def test_concurrency_hides_latency(self):
+        """无限流时并发请求的总耗时远小于逐个请求"""
+        self.server.latency = 0.05
+        client = AsyncHttpClient(max_concurrency=10)
+        start = time.monotonic()
+        client.fetch_all([f"{self.api_url}p{i}" for i in range(20)])
+        elapsed = time.monotonic() - start
+        client.close()
+
+        self.assertLess(elapsed, 20 * 0.05 / 2)
+
+    def test_single_extract_uses_pooled_client(self):
+        extractor = self._extractor()
+        for i in range(5):
+            self.assertTrue(extractor.extract("<p>x</p>", f"p{i}").success)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_single_extract_retries_without_event_loop(self):
+        extractor = self._extractor(max_retries=3)
+        extractor.client.backoff_base = 0.01
+        result = extractor.extract("<p>x</p>", "flaky-2")
+
+        self.assertTrue(result.success)
+        self.assertEqual(self.server.attempts["flaky-2"], 3)
+
+    def test_works_inside_running_event_loop(self):
+        """在已有事件循环中（如notebook）单页和批量抽取都可用"""
+        extractor = self._extractor()
+
+        async def run():
+            single = extractor.extract("<p>x</p>", "single")
+            batch = extractor.batch_extract(["<p>x</p>"] * 3, ["a", "b", "c"])
+            return single, batch
+
+        single, batch = asyncio.run(run())
+        self.assertTrue(single.success)
+        self.assertEqual([r.content for r in batch], ["content of a", "content of b", "content of c"])
+
+    def test_close_workers_closes_client(self):
+        extractor = self._extractor()
+        self.assertTrue(extractor.extract("<p>x</p>", "p0").success)
+        client = extractor.client
+        with patch.object(client.session, "close", wraps=client.session.close) as close:
+            extractor.close_workers()
+        close.assert_called_once()
+        self.assertIsNone(extractor._client)
+
+        # 下次使用时重新创建
+        self.assertTrue(extractor.extract("<p>x</p>", "p1").success)
+        self.assertIsNot(extractor.client, client)
+
+
+if __name__ == '__main__':
+    unittest.main()
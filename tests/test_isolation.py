@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""测试单样本超时与内存上限：抽取在可终止的子进程中运行，卡住或崩溃后重启"""
+
+import os
+import time
+import unittest
+from pathlib import Path
+
+from webmainbench.data import DataLoader
+from webmainbench.evaluator import Evaluator
+from webmainbench.extractors import BaseExtractor, ExtractionResult, ExtractorFactory
+
+
+class _PathologicalExtractor(BaseExtractor):
+    """按HTML中的指令卡住、申请内存或崩溃，否则返回所在进程号"""
+
+    def _setup(self):
+        pass
+
+    def _extract_content(self, html, url=None):
+        if "HANG" in html:
+            time.sleep(60)
+        if "ALLOC" in html:
+            blob = bytearray(1024 * 1024 * 1024)
+            return ExtractionResult(content=str(len(blob)))
+        if "CRASH" in html:
+            os._exit(3)
+        return ExtractionResult(content=f"{os.getpid()}|{html}")
+
+
+ExtractorFactory.register("pathological", _PathologicalExtractor)
+
+
+class TestIsolatedExtraction(unittest.TestCase):
+
+    def _extractor(self, **config):
+        extractor = ExtractorFactory.create("pathological", config)
+        self.addCleanup(extractor.close_isolated_workers)
+        return extractor
+
+    def test_timeout_kills_and_respawns(self):
+        extractor = self._extractor(sample_timeout=0.5)
+        first = extractor.extract("<p>ok</p>")
+        start = time.time()
+        hung = extractor.extract("<p>HANG</p>")
+        self.assertLess(time.time() - start, 5)
+        after = extractor.extract("<p>ok</p>")
+
+        self.assertFalse(hung.success)
+        self.assertEqual(hung.error_message, "Extraction timeout: exceeded 0.5s")
+        self.assertTrue(first.success and after.success)
+        pids = {int(first.content.split("|")[0]), int(after.content.split("|")[0])}
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(os.getpid(), pids)
+
+    @unittest.skipUnless(os.path.exists("/proc/self/statm"), "memory cap needs Linux")
+    def test_memory_limit(self):
+        extractor = self._extractor(memory_limit_mb=64)
+        result = extractor.extract("<p>ALLOC</p>")
+        self.assertFalse(result.success)
+        self.assertEqual(result.error_message, "Extraction exceeded memory limit (64 MB)")
+        self.assertTrue(extractor.extract("<p>ok</p>").success)
+
+    def test_crash_is_reported(self):
+        extractor = self._extractor(sample_timeout=10)
+        result = extractor.extract("<p>CRASH</p>")
+        self.assertFalse(result.success)
+        self.assertEqual(result.error_message, "Extraction worker crashed (exit code 3)")
+        self.assertTrue(extractor.extract("<p>ok</p>").success)
+
+    def test_thread_batch_uses_one_worker_per_thread(self):
+        extractor = self._extractor(sample_timeout=5)
+        htmls = [f"<p>{i}</p>" for i in range(8)]
+        results = extractor.batch_extract(htmls, workers=2, mode="process")
+        self.assertEqual([r.content.split("|")[1] for r in results], htmls)
+        self.assertLessEqual(len({r.content.split("|")[0] for r in results}), 2)
+
+    def test_without_limits_extracts_in_process(self):
+        result = self._extractor().extract("<p>ok</p>")
+        self.assertEqual(result.content, f"{os.getpid()}|<p>ok</p>")
+
+    def test_evaluator_reports_timeout_category(self):
+        dataset = DataLoader.load_jsonl(Path(__file__).parent.parent / "data" / "sample_dataset.jsonl")
+        dataset.samples[1].html = "<p>HANG</p>"
+        extractor = self._extractor(sample_timeout=0.5)
+        result = Evaluator().evaluate(dataset, extractor)
+
+        self.assertEqual(result.error_analysis['common_errors'], {'timeout': 1})
+        self.assertEqual(result.error_analysis['failed_count'], 1)
+        self.assertEqual(sum(r['extraction_success'] for r in result.sample_results), len(dataset.samples) - 1)
+        # 运行结束后隔离子进程已关闭
+        self.assertEqual(extractor._idle_isolated_workers, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
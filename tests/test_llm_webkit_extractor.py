@@ -1,5 +1,15 @@
+import json
+import tempfile
+import threading
+import time
 import unittest
+from types import SimpleNamespace
 from unittest.mock import Mock, patch
+
+import torch
+
+from webmainbench.data import DataSample
+from webmainbench.extractors.llm_webkit_extractor import LlmWebkitExtractor, TokenStateManager
 from webmainbench.extractors.factory import ExtractorFactory
 from webmainbench.extractors.base import ExtractionResult
 
@@ -309,7 +319,388 @@ class TestLLMWebKitExtractor(unittest.TestCase):
         except Exception as e:
             self.skipTest(f"LLM-WebKit dependencies not available: {e}")
 
+class _FakeTokenizer:
+    """按字符编码的假tokenizer，0为填充符"""
+
+    eos_token = "\x01"
+    eos_token_id = 1
+
+    def __init__(self):
+        self.pad_token_id = None
+        self.padding_side = "right"
+        self.seen_padding_sides = []
+
+    @property
+    def pad_token(self):
+        return None if self.pad_token_id is None else chr(self.pad_token_id)
+
+    @pad_token.setter
+    def pad_token(self, token):
+        self.pad_token_id = 0
+
+    def apply_chat_template(self, messages, **kwargs):
+        return "<chat>" + messages[0]["content"]
+
+    def __call__(self, texts, return_tensors=None, padding=False, truncation=False, max_length=None,
+                 add_special_tokens=True):
+        if isinstance(texts, str):
+            return {"input_ids": [ord(c) for c in texts]}
+        self.seen_padding_sides.append(self.padding_side)
+        ids = [[ord(c) for c in text] for text in texts]
+        width = max(len(row) for row in ids)
+        padded = [[0] * (width - len(row)) + row for row in ids]
+        mask = [[0] * (width - len(row)) + [1] * len(row) for row in ids]
+        return {"input_ids": torch.tensor(padded), "attention_mask": torch.tensor(mask)}
+
+    def batch_decode(self, rows, skip_special_tokens=False):
+        return ["".join(chr(i) for i in row.tolist() if i > 1) for row in rows]
+
+
+class _FakeCausalLM:
+    """生成 {"<提示长度>": "main"}，按批右侧填充"""
+
+    device = torch.device("cpu")
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.prefilled_tokens = 0  # 实际预填充的token数
+
+    def __call__(self, input_ids, use_cache=False):
+        self.prefilled_tokens += input_ids.numel()
+        key = torch.zeros(1, 1, input_ids.shape[1], 1)
+        return SimpleNamespace(past_key_values=((key, key.clone()),))
+
+    def generate(self, input_ids, attention_mask, past_key_values=None, **kwargs):
+        self.batch_sizes.append(input_ids.shape[0])
+        cached = 0
+        if past_key_values is not None:
+            cached = past_key_values[0][0].shape[2]
+            assert past_key_values[0][0].shape[0] == input_ids.shape[0]
+            assert bool(attention_mask[:, :cached].all())
+        self.prefilled_tokens += int(attention_mask[:, cached:].sum())
+        answers = [[ord(c) for c in json.dumps({str(int(m.sum())): "main"})] for m in attention_mask]
+        width = max(len(a) for a in answers)
+        new_tokens = torch.tensor([a + [1] * (width - len(a)) for a in answers])
+        return torch.cat([input_ids, new_tokens], dim=1)
+
+
+class TestLlmWebkitBatchExtract(unittest.TestCase):
+    """批量抽取：一次推理提交整批提示，结果映射回样本，内容并行重建（使用假模型）"""
+
+    def _make_extractor(self, **config):
+        with patch.object(LlmWebkitExtractor, '_setup', lambda self: None):
+            extractor = LlmWebkitExtractor("llm-webkit", config)
+        extractor._simplify_html = lambda html: (html, "", None)
+        extractor._SamplingParams = lambda **kwargs: kwargs
+        extractor._model_loaded = True
+        extractor.tokenizer = _FakeTokenizer()
+
+        self.active = 0
+        self.max_active = 0
+        lock = threading.Lock()
+
+        def reconstruct(html, classification_result, url=None, typical_raw_tag_html=None):
+            with lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            time.sleep(0.02)
+            with lock:
+                self.active -= 1
+            return f"{url}|{html}|{sorted(classification_result)}", []
+
+        extractor._reconstruct_content = reconstruct
+        return extractor
+
+    def test_vllm_single_generate_call(self):
+        extractor = self._make_extractor(reconstruct_workers=4)
+        extractor._use_transformers = False
+        calls = []
+
+        def generate(prompts, sampling_params):
+            calls.append(list(prompts))
+            # 每个提示的输出标注其自身的item数，用于验证映射关系
+            return [SimpleNamespace(outputs=[SimpleNamespace(
+                text=json.dumps({str(p.count('_item_id="')): "main"}))]) for p in prompts]
+
+        extractor.model = SimpleNamespace(generate=generate)
+        htmls = ['<p _item_id="1">a</p>' * n for n in (1, 2, 3)] + ["<p>no items</p>", "  "]
+        htmls += ['<p _item_id="1">b</p>' * 4, '<p _item_id="1">c</p>' * 5]
+        urls = [f"u{i}" for i in range(len(htmls))]
+        results = extractor.batch_extract(htmls, urls)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(calls[0]), 5)
+        for i, n in [(0, 1), (1, 2), (2, 3), (5, 4), (6, 5)]:
+            self.assertTrue(results[i].success)
+            self.assertEqual(results[i].content, f"u{i}|{htmls[i]}|['item_id {n}']")
+        self.assertFalse(results[3].success)
+        self.assertEqual(results[4].error_message, "Empty HTML input")
+        self.assertGreater(self.max_active, 1)
+
+    def test_transformers_padded_batches(self):
+        extractor = self._make_extractor(generation_batch_size=2)
+        extractor._use_transformers = True
+        extractor.model = _FakeCausalLM()
+        htmls = ['<p _item_id="1">' + "x" * n + '</p>' for n in range(5)]
+        results = extractor.batch_extract(htmls)
+
+        self.assertEqual(extractor.model.batch_sizes, [2, 2, 1])
+        self.assertEqual(extractor.tokenizer.seen_padding_sides, ["left"] * 3)
+        self.assertEqual(extractor.tokenizer.padding_side, "right")
+        for html, result in zip(htmls, results):
+            prompt = extractor._add_template(extractor._create_prompt(html))
+            self.assertEqual(result.content, f"None|{html}|['item_id {len(prompt)}']")
+
+    def test_transformers_prefix_reuse(self):
+        """公共前缀只预填充一次，各行复用其KV缓存"""
+        htmls = ['<p _item_id="1">' + "x" * n + '</p>' for n in range(5)]
+        outputs = {}
+        for enabled in (True, False):
+            extractor = self._make_extractor(generation_batch_size=2, enable_prefix_caching=enabled)
+            extractor._use_transformers = True
+            extractor.model = _FakeCausalLM()
+            outputs[enabled] = ([r.content for r in extractor.batch_extract(htmls)], extractor)
+
+        self.assertEqual(outputs[True][0], outputs[False][0])
+        reused, baseline = outputs[True][1], outputs[False][1]
+        prefix_length = len(reused._prompt_parts()[0])
+        self.assertEqual(reused.get_run_stats(),
+                         {"prompts": 5, "prefix_tokens": prefix_length, "prefill_tokens_saved": 5 * prefix_length})
+        self.assertEqual(baseline.model.prefilled_tokens - reused.model.prefilled_tokens, 4 * prefix_length)
+        self.assertEqual(baseline.get_run_stats()["prefill_tokens_saved"], 0)
+
+    def test_prompt_prefix_is_shared(self):
+        extractor = self._make_extractor()
+        prompts = [extractor._build_chat_prompt(html) for html in ("<p>a</p>", "<div>{b}</div>")]
+        prefix, suffix = extractor._prompt_parts()
+        self.assertTrue(prefix.endswith("Input HTML:\n"))
+        for html, prompt in zip(("<p>a</p>", "<div>{b}</div>"), prompts):
+            self.assertEqual(prompt, extractor._add_template(extractor._create_prompt(html)))
+            self.assertEqual(prompt, prefix + html + suffix)
+
+    def test_vllm_prefix_caching_stats(self):
+        extractor = self._make_extractor()
+        extractor._use_transformers = False
+        outputs = [SimpleNamespace(outputs=[SimpleNamespace(text='{"1": "main"}')])]
+        extractor.model = SimpleNamespace(generate=lambda prompts, params: outputs * len(prompts))
+        extractor.batch_extract(['<p _item_id="1">a</p>'] * 3)
+        prefix_length = len(extractor._prompt_parts()[0])
+        self.assertEqual(extractor.get_run_stats()["prefill_tokens_saved"], 2 * prefix_length)
+
+        # vLLM报告了缓存命中数时直接累加
+        outputs[0].num_cached_tokens = 16
+        extractor.batch_extract(['<p _item_id="1">a</p>'] * 3)
+        self.assertEqual(extractor.get_run_stats()["prefill_tokens_saved"], 2 * prefix_length + 48)
+        self.assertEqual(extractor.get_run_stats()["prompts"], 6)
+
+    def test_length_bucketed_batches(self):
+        """按长度分桶：批内长度相近，不超过token预算，结果按输入顺序返回"""
+        sizes = [10, 9000, 20, 5000, 30, 40, 5100]
+        htmls = ['<p _item_id="1">' + "x" * n + '</p>' for n in sizes]
+        extractor = self._make_extractor(generation_batch_size=8, max_batch_tokens=9000)
+        extractor._use_transformers = True
+        extractor.model = _FakeCausalLM()
+        results = extractor.batch_extract(htmls)
+
+        for html, result in zip(htmls, results):
+            prompt = extractor._build_chat_prompt(html)
+            self.assertEqual(result.content, f"None|{html}|['item_id {len(prompt)}']")
+        # 四个短提示（约3.1k）按预算每批两个，两个中等提示（约8k）各一批，超预算的长提示独占一批
+        self.assertEqual(extractor.model.batch_sizes, [2, 2, 1, 1, 1])
+
+    def test_schedule_respects_buckets_and_budget(self):
+        extractor = self._make_extractor(generation_batch_size=3, max_batch_tokens=100000)
+        extractor._use_transformers = True
+        prompts = [extractor._build_chat_prompt("y" * n) for n in (6000, 0, 100, 6100, 50, 200, 6050)]
+        batches = extractor._schedule_batches(prompts, [1] * len(prompts))
+        self.assertEqual(batches, [[1, 4, 2], [5], [0, 6, 3]])
+
+        # vLLM没有填充，只受token预算约束
+        extractor._use_transformers = False
+        self.assertEqual(extractor._schedule_batches(prompts, [1] * len(prompts)), [[1, 4, 2, 5, 0, 6, 3]])
+        extractor.inference_config.max_batch_tokens = 7000
+        self.assertEqual(extractor._schedule_batches(prompts, [1] * len(prompts)),
+                         [[1, 4], [2, 5], [0], [6], [3]])
+
+    def test_data_samples_use_html(self):
+        extractor = self._make_extractor()
+        extractor._use_transformers = True
+        extractor.model = _FakeCausalLM()
+        sample = DataSample(id="1", html='<p _item_id="1">x</p>', url="http://a", groundtruth_content="",
+                            groundtruth_content_list=[])
+        result = extractor.batch_extract([sample])[0]
+        self.assertTrue(result.content.startswith("http://a|<p _item_id"))
+        self.assertEqual(extractor.extract(sample).content, result.content)
+
+
+class _VocabTokenizer:
+    """固定小词表的假tokenizer"""
+
+    VOCAB = ["{", "}", ' "', '":"', '",', "main", "other"] + [str(d) for d in range(10)] + ["x", "y"]
+
+    def __init__(self):
+        self.ids = {token: i + 2 for i, token in enumerate(self.VOCAB)}
+        self.tokens = {i: token for token, i in self.ids.items()}
+
+    def encode(self, text):
+        return [self.ids[text]] if text in self.ids else [self.ids[c] for c in text]
+
+    def decode(self, ids):
+        return "".join(self.tokens[i] for i in ids)
+
+
+class _SmallVocabManager(TokenStateManager):
+    END_TOKEN_ID = 1
+    MAX_COUNT_PATTERN = (0, 0)
+
+
+class TestTokenStateManager(unittest.TestCase):
+    """逻辑处理器：增量状态与逐步重新计算的结果一致"""
+
+    VOCAB_SIZE = 32
+
+    def setUp(self):
+        self.tokenizer = _VocabTokenizer()
+        self.manager = _SmallVocabManager(self.tokenizer)
+
+    def _prompt(self, count):
+        return self.tokenizer.encode("xy") + [0, 0] + self.tokenizer.encode(str(count)) + self.tokenizer.encode("x")
+
+    def _reference(self, prompt, output, logits):
+        """逐步从头扫描的无状态实现（与重构前的逻辑相同）"""
+        m, ids = self.manager, self.manager.token_id_map
+        from webmainbench.extractors.llm_webkit_extractor import TokenState
+        if not output:
+            return m.mask_other_logits(logits, ids[TokenState.Left_bracket])
+        last = output[-1]
+        if last == ids[TokenState.Right_bracket][0]:
+            return m.mask_other_logits(logits, [m.END_TOKEN_ID])
+        if last == ids[TokenState.Left_bracket][0]:
+            return m.mask_other_logits(logits, ids[TokenState.Space_quote])
+        if last == ids[TokenState.Space_quote][0]:
+            number, _, _ = m.find_last_complete_number(output)
+            return m.mask_other_logits(logits, self.tokenizer.encode('1' if number == -1 else str(number + 1)[0]))
+        if last in ids[TokenState.Number]:
+            number, state, tail = m.find_last_complete_number(output)
+            if state == "tail":
+                return m.mask_other_logits(logits, ids[TokenState.Quote_colon_quote])
+            return m.mask_other_logits(logits, self.tokenizer.encode(str(number + 1)[len(str(tail))]))
+        if last == ids[TokenState.Quote_colon_quote][0]:
+            return m.mask_other_logits(logits, ids[TokenState.Main_other])
+        if last in ids[TokenState.Main_other]:
+            return m.mask_other_logits(logits, ids[TokenState.Quote_comma])
+        if last == ids[TokenState.Quote_comma][0]:
+            number, _, _ = m.find_last_complete_number(output)
+            closing = TokenState.Right_bracket if number >= m.calc_max_count(prompt) else TokenState.Space_quote
+            return m.mask_other_logits(logits, ids[closing])
+        return logits
+
+    def test_constrained_decoding(self):
+        """交错解码多个提示，每步与参考实现一致，输出为合法JSON"""
+        generator = torch.Generator().manual_seed(0)
+        prompts = {count: self._prompt(count) for count in (1, 3, 12)}
+        outputs = {count: [] for count in prompts}
+        finished = set()
+        while len(finished) < len(prompts):
+            for count, prompt in prompts.items():
+                if count in finished:
+                    continue
+                logits = torch.randn(self.VOCAB_SIZE, generator=generator)
+                expected = self._reference(prompt, outputs[count], logits.clone())
+                actual = self.manager.process_logit(prompt, outputs[count], logits)
+                self.assertTrue(torch.equal(actual, expected))
+                token = int(actual.argmax())
+                if token == self.manager.END_TOKEN_ID:
+                    finished.add(count)
+                else:
+                    outputs[count].append(token)
+
+        for count, output in outputs.items():
+            data = json.loads(self.tokenizer.decode(output).replace('",}', '"}'))
+            self.assertEqual(list(data), [str(i) for i in range(1, count + 1)])
+            self.assertTrue(set(data.values()) <= {"main", "other"})
+        self.assertEqual(len(self.manager._states), 0)
+
+    def test_max_count_parsed_once(self):
+        prompt = self._prompt(4)
+        output = []
+        with patch.object(self.manager, 'calc_max_count', wraps=self.manager.calc_max_count) as calc:
+            while True:
+                token = int(self.manager.process_logit(prompt, output, torch.zeros(self.VOCAB_SIZE)).argmax())
+                if token == self.manager.END_TOKEN_ID:
+                    break
+                output.append(token)
+        self.assertEqual(calc.call_count, 1)
+        self.assertEqual(self.tokenizer.decode(output).count("main"), 4)
+
+    def test_masks_in_place(self):
+        logits = torch.arange(self.VOCAB_SIZE, dtype=torch.float32)
+        result = self.manager.process_logit(self._prompt(1), [], logits)
+        self.assertIs(result, logits)
+        left = self.tokenizer.ids["{"]
+        self.assertEqual(result[left].item(), float(left))
+        self.assertEqual(int(torch.isfinite(result).sum()), 1)
+
+
+class _FakeMapItemParser:
+    """按LLM分类结果从typical_raw_tag_html中保留main项"""
+
+    def __init__(self, config):
+        pass
+
+    def parse_single(self, pre_data):
+        kept = [key for key, value in pre_data["llm_response"].items() if value == 1]
+        pre_data["typical_main_html"] = pre_data["typical_raw_tag_html"] + "|" + ",".join(kept)
+        return pre_data
+
+
+class TestSimplificationReuse(unittest.TestCase):
+    """HTML只简化一次，重建内容复用推理前的简化结果；可选磁盘缓存"""
+
+    def _make_extractor(self, **config):
+        with patch.object(LlmWebkitExtractor, '_setup', lambda self: None):
+            extractor = LlmWebkitExtractor("llm-webkit", config)
+        self.simplify_calls = []
+
+        def simplify(html):
+            self.simplify_calls.append(html)
+            return html, f"tagged:{len(html)}", None
+
+        extractor._simplify_html = simplify
+        extractor._PreDataJson = dict
+        extractor._PreDataJsonKey = SimpleNamespace(
+            LLM_RESPONSE="llm_response", TYPICAL_RAW_HTML="typical_raw_html",
+            TYPICAL_RAW_TAG_HTML="typical_raw_tag_html", TYPICAL_MAIN_HTML="typical_main_html")
+        extractor._MapItemToHtmlTagsParser = _FakeMapItemParser
+        extractor._extract_content_from_main_html = lambda main_html, url=None: (main_html, [])
+        extractor._model_loaded = True
+        extractor._use_transformers = True
+        extractor.tokenizer = _FakeTokenizer()
+        extractor.model = _FakeCausalLM()
+        return extractor
+
+    def test_single_simplification(self):
+        extractor = self._make_extractor()
+        htmls = ['<p _item_id="1">' + "x" * n + '</p>' for n in range(3)]
+
+        results = extractor.batch_extract(htmls)
+        self.assertEqual(self.simplify_calls, htmls)
+        for html, result in zip(htmls, results):
+            self.assertTrue(result.content.startswith(f"tagged:{len(html)}|item_id "))
+
+        self.simplify_calls.clear()
+        self.assertEqual(extractor.extract(htmls[0]).content, results[0].content)
+        self.assertEqual(self.simplify_calls, htmls[:1])
+
+    def test_disk_cache(self):
+        htmls = ['<p _item_id="1">' + "y" * n + '</p>' for n in range(3)]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            first = self._make_extractor(simplify_cache_dir=cache_dir).batch_extract(htmls)
+            self.assertEqual(len(self.simplify_calls), 3)
 
+            second = self._make_extractor(simplify_cache_dir=cache_dir).batch_extract(htmls)
+            self.assertEqual(self.simplify_calls, [])
+        self.assertEqual([r.content for r in second], [r.content for r in first])
 
 
 if __name__ == '__main__':
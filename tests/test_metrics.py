@@ -471,6 +471,191 @@ def test():
         print("✅ 所有指标都正确得到满分!")
 
 
+class TestSplitContext(unittest.TestCase):
+    """测试每个样本只分割一次内容"""
+
+    def setUp(self):
+        self.calculator = MetricCalculator()
+        self.predicted = "文本\n\n```\nprint(1)\n```\n\n公式 $x$\n\n| A | B |\n|---|---|\n| 1 | 2 |"
+        self.groundtruth = "文本内容\n\n```\nprint(2)\n```\n\n公式 $y$\n\n| A | B |\n|---|---|\n| 1 | 3 |"
+
+    def test_split_once_per_side(self):
+        """calculate_all 对预测和真实内容各只分割一次"""
+        from unittest.mock import patch
+        from webmainbench.metrics.base import BaseMetric
+
+        original = BaseMetric.split_content
+        with patch.object(BaseMetric, 'split_content', side_effect=original) as mocked:
+            self.calculator.calculate_all(
+                predicted_content=self.predicted,
+                groundtruth_content=self.groundtruth
+            )
+        self.assertEqual(mocked.call_count, 2)
+
+    def test_shared_split_matches_per_metric_split(self):
+        """共享分割结果与各指标独立分割的分数一致"""
+        shared = self.calculator.calculate_all(
+            predicted_content=self.predicted,
+            groundtruth_content=self.groundtruth
+        )
+        for metric_name in ['code_edit', 'formula_edit', 'table_edit', 'text_edit']:
+            metric = self.calculator.metrics[metric_name]
+            standalone = metric.calculate(self.predicted, self.groundtruth)
+            self.assertAlmostEqual(shared[metric_name].score, standalone.score, places=10)
+
+
+class TestEditDistanceModes(unittest.TestCase):
+    """测试编辑距离的阈值截断与分块近似模式"""
+
+    def setUp(self):
+        import random
+        rng = random.Random(0)
+        words = ["".join(rng.choice("abcdefghij") for _ in range(rng.randint(2, 8))) for _ in range(500)]
+        self.groundtruth = "\n".join(" ".join(rng.choice(words) for _ in range(10)) for _ in range(400))
+        lines = self.groundtruth.split("\n")
+        for i in range(0, len(lines), 20):
+            lines[i] = lines[i][::-1]
+        self.similar = "\n".join(lines)
+        self.poor = "\n".join(" ".join(rng.choice(words) for _ in range(10)) for _ in range(100))
+
+    def _metric(self, **config):
+        from webmainbench.metrics import EditDistanceMetric
+        return EditDistanceMetric("edit", config)
+
+    def test_default_is_exact(self):
+        result = self._metric().calculate(self.poor, self.groundtruth)
+        self.assertTrue(result.details["exact"])
+        self.assertNotIn("score_bound", result.details)
+
+    def test_cutoff_keeps_scores_above_threshold(self):
+        """分数高于阈值时结果与精确计算相同"""
+        exact = self._metric().calculate(self.similar, self.groundtruth)
+        bounded = self._metric(score_cutoff=0.5).calculate(self.similar, self.groundtruth)
+        self.assertEqual(bounded.score, exact.score)
+        self.assertTrue(bounded.details["exact"])
+
+    def test_cutoff_bails_out_below_threshold(self):
+        """分数低于阈值时提前结束，报告的分数是真实分数的上界"""
+        exact = self._metric().calculate(self.poor, self.groundtruth)
+        bounded = self._metric(score_cutoff=0.5).calculate(self.poor, self.groundtruth)
+        self.assertFalse(bounded.details["exact"])
+        self.assertEqual(bounded.details["score_bound"], "upper")
+        self.assertGreaterEqual(bounded.score, exact.score)
+        self.assertLess(bounded.score, 0.5)
+
+    def test_chunked_approximation(self):
+        """分块近似给出真实分数的下界，且对相似文本误差很小"""
+        exact = self._metric().calculate(self.similar, self.groundtruth)
+        approx = self._metric(approximate=True, approximate_min_length=1000,
+                              chunk_size=500).calculate(self.similar, self.groundtruth)
+        self.assertFalse(approx.details["exact"])
+        self.assertEqual(approx.details["score_bound"], "lower")
+        self.assertLessEqual(approx.score, exact.score)
+        self.assertAlmostEqual(approx.score, exact.score, delta=0.02)
+
+        # 短文本不做近似
+        short = self._metric(approximate=True).calculate(self.similar, self.groundtruth)
+        self.assertTrue(short.details["exact"])
+
+    def test_calculator_passes_metric_config(self):
+        calculator = MetricCalculator({"text_edit": {"score_cutoff": 0.9}})
+        self.assertEqual(calculator.metrics["text_edit"].score_cutoff, 0.9)
+        self.assertIsNone(calculator.metrics["code_edit"].score_cutoff)
+
+
+class TestEditDistanceBatch(unittest.TestCase):
+    """测试批量编辑距离接口与逐对计算结果一致"""
+
+    GROUNDTRUTH = """# 标题
+
+正文段落，包含一些文字。
+
+```python
+def add(a, b):
+    return a + b
+```
+
+| 列1 | 列2 |
+|-----|-----|
+| 1   | 2   |
+
+公式 $E=mc^2$ 以及
+
+$$\\int_0^1 x dx$$
+"""
+
+    PREDICTIONS = [
+        GROUNDTRUTH,
+        "正文段落，包含一些文字。",
+        "```python\ndef add(a, b):\n    return a - b\n```\n\n| 列1 | 列2 |\n|-----|-----|\n| 1 | 3 |",
+        "公式 $E=mc^3$",
+        "",
+    ]
+
+    def _metrics(self):
+        from webmainbench.metrics import (
+            EditDistanceMetric, CodeEditMetric, TextEditMetric, TableEditMetric, FormulaEditMetric
+        )
+        return [
+            EditDistanceMetric("edit_distance"),
+            CodeEditMetric("code_edit"),
+            TextEditMetric("text_edit"),
+            TableEditMetric("table_edit"),
+            FormulaEditMetric("formula_edit"),
+        ]
+
+    def _assert_same(self, batch, single):
+        self.assertEqual(len(batch), len(single))
+        for b, s in zip(batch, single):
+            self.assertEqual(b.to_dict(), s.to_dict())
+
+    def test_one_groundtruth_many_predictions(self):
+        for metric in self._metrics():
+            with self.subTest(metric=metric.name):
+                batch = metric.batch_calculate(self.PREDICTIONS, self.GROUNDTRUTH)
+                single = [metric.calculate(pred, self.GROUNDTRUTH) for pred in self.PREDICTIONS]
+                self._assert_same(batch, single)
+
+    def test_paired_lists(self):
+        groundtruths = list(reversed(self.PREDICTIONS))
+        for metric in self._metrics():
+            with self.subTest(metric=metric.name):
+                batch = metric.batch_calculate(self.PREDICTIONS, groundtruths)
+                single = [metric.calculate(pred, gt) for pred, gt in zip(self.PREDICTIONS, groundtruths)]
+                self._assert_same(batch, single)
+                # 元组同样按逐对的groundtruth处理
+                self._assert_same(metric.batch_calculate(self.PREDICTIONS, tuple(groundtruths)), single)
+
+    def test_precomputed_splits(self):
+        from webmainbench.metrics.base import BaseMetric
+        predicted_splits = [BaseMetric.split_content(pred) for pred in self.PREDICTIONS]
+        groundtruth_split = BaseMetric.split_content(self.GROUNDTRUTH)
+        for metric in self._metrics():
+            with self.subTest(metric=metric.name):
+                batch = metric.batch_calculate(self.PREDICTIONS, self.GROUNDTRUTH,
+                                               predicted_splits=predicted_splits,
+                                               groundtruth_splits=groundtruth_split)
+                single = [metric.calculate(pred, self.GROUNDTRUTH) for pred in self.PREDICTIONS]
+                self._assert_same(batch, single)
+
+    def test_invalid_inputs_and_modes(self):
+        from webmainbench.metrics import EditDistanceMetric
+        metric = EditDistanceMetric("edit_distance")
+        batch = metric.batch_calculate(["abc", None, ""], ["abd", "x", ""])
+        self.assertTrue(batch[0].success)
+        self.assertFalse(batch[1].success)
+        self.assertFalse(batch[2].success)
+
+        with self.assertRaises(ValueError):
+            metric.batch_calculate(["a", "b"], ["a"])
+
+        # 截断模式逐对计算，结果同样一致
+        bounded = EditDistanceMetric("edit_distance", {"score_cutoff": 0.9})
+        batch = bounded.batch_calculate(self.PREDICTIONS, self.GROUNDTRUTH)
+        single = [bounded.calculate(pred, self.GROUNDTRUTH) for pred in self.PREDICTIONS]
+        self._assert_same(batch, single)
+
+
 def run_visual_test():
     """运行可视化测试（保留原有的打印功能）"""
     print("=== 新指标功能测试 ===\n")
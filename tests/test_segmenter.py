@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""测试基于偏移量的markdown分段器与历史实现的输出一致性"""
+
+import json
+import re
+import unittest
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from webmainbench.metrics.base import BaseMetric
+from webmainbench.metrics.segmenter import split_markdown
+
+
+def legacy_extract_from_markdown(text):
+    """历史版本的 _extract_from_markdown（正则 + BeautifulSoup + 逐段 replace），作为对照。"""
+    if not text:
+        return {'code': '', 'formula': '', 'table': '', 'text': ''}
+
+    extracted_segments = []
+
+    code_parts = []
+    for match in re.finditer(r'(```[\s\S]*?```|`[^`\n]+`)', text):
+        code_segment = match.group(0)
+        extracted_segments.append(code_segment)
+        if code_segment.startswith('```'):
+            code_content = '\n'.join(code_segment.split('\n')[1:-1])
+        else:
+            code_content = code_segment[1:-1].strip()
+        if code_content:
+            code_parts.append(code_content)
+
+    formula_parts = []
+    for pattern in [r'(?<!\\)\$\$(.*?)(?<!\\)\$\$', r'(?<!\\)\\\[(.*?)(?<!\\)\\\]',
+                    r'(?<!\\)\$(.*?)(?<!\\)\$', r'(?<!\\)\\\((.*?)(?<!\\)\\\)']:
+        for match in re.finditer(pattern, text, re.DOTALL):
+            extracted_segments.append(match.group(0))
+            formula_content = match.group(1).strip()
+            if formula_content:
+                formula_parts.append(formula_content)
+
+    table_parts = []
+    soup = BeautifulSoup(text, "html.parser")
+    for table in soup.find_all("table"):
+        extracted_segments.append(str(table))
+        table_parts.append(str(table))
+
+    def is_md_separator_line(line):
+        for p in [p.strip() for p in line.split("|")]:
+            if p and not re.match(r"^:?\-{3,}:?$", p):
+                return False
+        return True
+
+    table_lines = []
+
+    def save_table():
+        if len(table_lines) >= 2 and is_md_separator_line(table_lines[1]):
+            md_table = '\n'.join(table_lines)
+            extracted_segments.append(md_table)
+            table_parts.append(md_table)
+
+    for line in text.split('\n'):
+        if line.count("|") >= 3:
+            table_lines.append(line)
+        elif table_lines:
+            save_table()
+            table_lines = []
+    if table_lines:
+        save_table()
+
+    clean_text = text
+    for segment in extracted_segments:
+        clean_text = clean_text.replace(segment, '', 1)
+    clean_text = re.sub(r'\n\s*\n', '\n\n', clean_text).strip()
+
+    return {
+        'code': '\n'.join(code_parts),
+        'formula': '\n'.join(formula_parts),
+        'table': '\n'.join(table_parts),
+        'text': clean_text
+    }
+
+
+class TestSegmenter(unittest.TestCase):
+    """测试split_markdown"""
+
+    def test_matches_legacy_on_sample_dataset(self):
+        """样例数据集中所有markdown字段的分段结果与历史实现一致"""
+        data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+        checked = 0
+        with open(data_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                for key, value in record.items():
+                    if isinstance(value, str) and value:
+                        self.assertEqual(split_markdown(value), legacy_extract_from_markdown(value),
+                                         f"mismatch on {record.get('track_id')}:{key}")
+                        checked += 1
+        self.assertGreater(checked, 0)
+
+    def test_matches_legacy_on_edge_cases(self):
+        """重叠片段、未闭合标记、非规范HTML表格等情况与历史实现一致"""
+        cases = [
+            "",
+            "plain text only",
+            "代码 `a` 与 `a` 重复出现，公式 $x$ 和 $x$ 也重复",
+            "```\nprint('$x$')\n```\n之后是 $y$",
+            "`$x$` 与 $$a$$ 以及 $$b$ 和 \\$c$",
+            "\\[ a \\] and \\( b \\) and \\\\[ c \\]",
+            "<table><tr><td>1</td></tr></table> text <TABLE border=1><tr><td>2</td></tr></TABLE>",
+            "<table><tr><td><table><tr><td>x</td></tr></table></td></tr></table>",
+            "<table><tr><td>unclosed",
+            "| a | b |\n|---|---|\n| 1 | 2 |\n\ntext\n| c | d |\n|:--:|--:|",
+            "| a | b |\n| not | sep |\n",
+            "```\nunterminated code block `x`",
+            "```python\n| a | b |\n|---|---|\n```",
+        ]
+        for text in cases:
+            self.assertEqual(split_markdown(text), legacy_extract_from_markdown(text), repr(text))
+
+    def test_base_metric_uses_segmenter(self):
+        """BaseMetric.split_content对markdown文本使用新的分段器"""
+        text = "intro `code` and $x^2$\n\n| a | b |\n|---|---|\n| 1 | 2 |"
+        self.assertEqual(BaseMetric.split_content(text), split_markdown(text))
+
+
+if __name__ == '__main__':
+    unittest.main()
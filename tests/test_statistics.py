@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""测试基于NumPy的分数矩阵统计"""
+
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from webmainbench.data import DataLoader
+from webmainbench.evaluator import Evaluator
+from webmainbench.evaluator.statistics import ScoreMatrix, paired_bootstrap_test
+
+
+METRICS = ["text_edit", "code_edit", "table_edit", "table_TEDS", "formula_edit", "overall"]
+
+
+def make_results(n, seed=0, shift=0.0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for i in range(n):
+        metrics = {}
+        for name in METRICS:
+            if rng.random() < 0.9:
+                score = float(np.clip(rng.random() * 0.8 + shift, 0.0, 1.0))
+                metrics[name] = {'score': score, 'success': bool(rng.random() > 0.1), 'details': {}}
+        results.append({'sample_id': f"s{i}", 'extraction_success': True, 'metrics': metrics})
+    return results
+
+
+class TestScoreMatrix(unittest.TestCase):
+    """测试ScoreMatrix"""
+
+    def setUp(self):
+        self.results = make_results(300)
+        self.matrix = ScoreMatrix.from_results(self.results)
+
+    def _successful_scores(self, name):
+        return [r['metrics'][name]['score'] for r in self.results
+                if name in r['metrics'] and r['metrics'][name]['success']]
+
+    def test_overall_metrics(self):
+        """均值与逐样本计算一致，overall为5个核心指标均值的平均"""
+        overall = self.matrix.overall_metrics()
+        for name in METRICS[:-1]:
+            scores = self._successful_scores(name)
+            self.assertAlmostEqual(overall[name], sum(scores) / len(scores))
+        self.assertAlmostEqual(overall['overall'], sum(overall[n] for n in METRICS[:-1]) / 5)
+
+    def test_statistics(self):
+        """标准差、分位数和置信区间"""
+        statistics = self.matrix.statistics(n_resamples=200)
+        scores = np.array(self._successful_scores('text_edit'))
+        entry = statistics['text_edit']
+        self.assertEqual(entry['count'], len(scores))
+        self.assertAlmostEqual(entry['std'], scores.std())
+        self.assertAlmostEqual(entry['p50'], np.percentile(scores, 50))
+        self.assertEqual(entry['min'], scores.min())
+        self.assertLess(entry['ci_low'], entry['mean'])
+        self.assertGreater(entry['ci_high'], entry['mean'])
+
+        # 固定随机种子时结果可复现
+        self.assertEqual(self.matrix.bootstrap_ci(200, seed=1), self.matrix.bootstrap_ci(200, seed=1))
+
+    def test_category_metrics(self):
+        """分类指标与Evaluator按样本分组的结果一致，样本数不足的类别被跳过"""
+        categories = ["news"] * 150 + ["blog"] * 148 + ["forum"] * 2
+        matrix = ScoreMatrix.from_results(self.results, categories=categories)
+        category_metrics = matrix.category_metrics()
+        self.assertEqual(list(category_metrics), ["news", "blog"])
+
+        evaluator = Evaluator()
+        for name, rows in (("news", self.results[:150]), ("blog", self.results[150:298])):
+            expected = evaluator._aggregate_metrics(rows)
+            for metric in METRICS:
+                self.assertAlmostEqual(category_metrics[name][metric], expected[metric])
+
+    def test_evaluator_bootstrap_is_opt_in(self):
+        """Evaluator默认不做bootstrap，指定重采样次数后才给出置信区间"""
+        dataset = DataLoader.load_jsonl(Path(__file__).parent.parent / "data" / "sample_dataset.jsonl")
+        default = Evaluator().evaluate(dataset, "test-model")
+        self.assertNotIn('ci_low', default.metric_statistics['overall'])
+        with_ci = Evaluator(bootstrap_resamples=200).evaluate(dataset, "test-model")
+        self.assertIn('ci_low', with_ci.metric_statistics['overall'])
+
+    def test_empty(self):
+        matrix = ScoreMatrix.from_results([])
+        self.assertEqual(matrix.overall_metrics(), {})
+        self.assertEqual(matrix.statistics(), {})
+
+    def test_paired_bootstrap_test(self):
+        """相同运行差异为0；明显更好的运行显著"""
+        same = paired_bootstrap_test(self.matrix, self.matrix, n_resamples=200)
+        self.assertEqual(same['difference'], 0.0)
+        self.assertEqual(same['p_value'], 1.0)
+
+        better = ScoreMatrix.from_results(make_results(300, shift=0.2))
+        result = paired_bootstrap_test(better, self.matrix, n_resamples=200)
+        self.assertEqual(result['num_paired_samples'], 300)
+        self.assertGreater(result['difference'], 0.0)
+        self.assertGreater(result['ci_low'], 0.0)
+        self.assertLess(result['p_value'], 0.05)
+
+    def test_large_matrix_is_fast(self):
+        """10万样本 x 6指标的统计与置信区间在数秒内完成"""
+        rng = np.random.default_rng(0)
+        matrix = ScoreMatrix(rng.random((100_000, 6)), rng.random((100_000, 6)) > 0.1)
+        start = time.time()
+        matrix.statistics(n_resamples=1000)
+        self.assertLess(time.time() - start, 10.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
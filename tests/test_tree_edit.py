@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+"""测试紧凑节点数组上的树编辑距离与TEDS指标"""
+
+import random
+import time
+import unittest
+
+from rapidfuzz.distance import Levenshtein
+
+from webmainbench.metrics.base import MetricResult
+from webmainbench.metrics.table_matching import _hungarian, linear_sum_assignment
+from webmainbench.metrics.teds_metrics import TEDSMetric, StructureTEDSMetric
+from webmainbench.metrics.tree_edit import TableTree, distance_bounds, rename_costs, tree_edit_distance
+
+try:
+    from apted import APTED, Config
+except ImportError:
+    APTED = None
+
+
+class _Node:
+    def __init__(self, tag, text, children):
+        self.tag = tag
+        self.text = text
+        self.children = children
+
+
+def _random_tree(rng, depth=0):
+    children = [_random_tree(rng, depth + 1) for _ in range(rng.randint(0, 4 if depth < 3 else 0))]
+    # 文本包含冒号等特殊字符；长度不超过2，保证改名代价不超过删除+插入
+    return _Node(rng.choice("abc"), rng.choice(["", "x", "xy", ":", "a:"]), children)
+
+
+def _to_table_tree(node, tree):
+    leftmost = None
+    for child in node.children:
+        child_leftmost = _to_table_tree(child, tree)
+        if leftmost is None:
+            leftmost = child_leftmost
+    return tree.append(node.tag, node.text, leftmost)
+
+
+def _table(rows, cols, cell=lambda r, c: f"r{r}c{c}"):
+    body = "".join(
+        "<tr>" + "".join(f"<td>{cell(r, c)}</td>" for c in range(cols)) + "</tr>"
+        for r in range(rows)
+    )
+    return f"<table>{body}</table>"
+
+
+class TestTreeEditDistance(unittest.TestCase):
+
+    @unittest.skipIf(APTED is None, "apted not installed")
+    def test_matches_apted(self):
+        """与APTED在真实树结构上的结果一致"""
+        costs = {}
+
+        class ReferenceConfig(Config):
+            def rename(self, node1, node2):
+                return costs[node1, node2]
+
+        rng = random.Random(1)
+        for _ in range(200):
+            root1, root2 = _random_tree(rng), _random_tree(rng)
+            tree1, tree2 = TableTree(), TableTree()
+            _to_table_tree(root1, tree1)
+            _to_table_tree(root2, tree2)
+
+            matrix = rename_costs(tree1, tree2)
+            nodes1, nodes2 = [], []
+
+            def postorder(node, out):
+                for child in node.children:
+                    postorder(child, out)
+                out.append(node)
+
+            postorder(root1, nodes1)
+            postorder(root2, nodes2)
+            costs.clear()
+            for i, node1 in enumerate(nodes1):
+                for j, node2 in enumerate(nodes2):
+                    costs[node1, node2] = matrix[i, j]
+
+            expected = APTED(root1, root2, ReferenceConfig()).compute_edit_distance()
+            self.assertAlmostEqual(tree_edit_distance(tree1, tree2), expected, places=9)
+
+    def test_rename_costs(self):
+        tree1, tree2 = TableTree(), TableTree()
+        for tag, text in [("td", "a:b"), ("td", ""), ("th", "abcd")]:
+            tree1.append(tag, text)
+        for tag, text in [("td", "a:c"), ("td", "xyz"), ("th", "abcd")]:
+            tree2.append(tag, text)
+        costs = rename_costs(tree1, tree2)
+        self.assertAlmostEqual(costs[0, 0], 1 / 3)
+        self.assertEqual(costs[1, 1], 3)  # 空文本的代价为另一文本的长度
+        self.assertEqual(costs[0, 2], 1)  # 标签不同
+        self.assertEqual(costs[2, 2], 0)
+
+    def test_bounds_contain_distance(self):
+        rng = random.Random(3)
+        for _ in range(300):
+            tree1, tree2 = TableTree(), TableTree()
+            _to_table_tree(_random_tree(rng), tree1)
+            _to_table_tree(_random_tree(rng), tree2)
+            lower, upper = distance_bounds(tree1, tree2)
+            distance = tree_edit_distance(tree1, tree2)
+            self.assertLessEqual(lower, distance + 1e-9)
+            self.assertGreaterEqual(upper, distance - 1e-9)
+
+    def test_empty_tree(self):
+        tree = TableTree()
+        tree.append("td", "x")
+        self.assertEqual(tree_edit_distance(TableTree(), tree), 1.0)
+
+
+class _OriginalTableConfig(Config if APTED is not None else object):
+    """原实现的改名代价：节点标签为 "tag:text" 字符串"""
+
+    def rename(self, node1, node2):
+        tag1, text1 = node1.split(':', 1) if ':' in node1 else (node1, "")
+        tag2, text2 = node2.split(':', 1) if ':' in node2 else (node2, "")
+        if tag1 != tag2:
+            return 1
+        if text1 == text2:
+            return 0
+        if not text1 or not text2:
+            return len(text1) + len(text2)
+        return Levenshtein.distance(text1, text2) / max(len(text1), len(text2))
+
+
+def _original_bracket_notation(element, structure_only=False, ignore_nodes=('tbody', 'thead', 'tfoot')):
+    """原实现：BeautifulSoup元素转括号表示法"""
+    def children(node):
+        for child in node.children:
+            if not getattr(child, 'name', None):
+                continue
+            if node.name in ignore_nodes:
+                yield from children(child)
+            else:
+                yield child
+
+    text = element.get_text(strip=True) if not structure_only else ""
+    label = element.name
+    if text:
+        label += ":" + text.replace('(', '[').replace(')', ']').replace(',', ';')
+    child_notations = [_original_bracket_notation(c, structure_only, ignore_nodes) for c in children(element)]
+    return f"{label}({','.join(child_notations)})" if child_notations else label
+
+
+class TestLegacyDistance(unittest.TestCase):
+    """默认的legacy_distance与原实现（APTED作用于括号表示法字符串）的分数一致"""
+
+    @unittest.skipIf(APTED is None, "apted not installed")
+    def test_matches_original_implementation(self):
+        from bs4 import BeautifulSoup
+        table_edit_result = MetricResult(metric_name="table_edit", score=1.0)
+        rng = random.Random(5)
+        cells = ["a", "b:c", "(x, y)", "", "长文本内容", "1,2", "k: v"]
+        for structure_only in (False, True):
+            metric = TEDSMetric("teds", {"structure_only": structure_only})
+            for _ in range(200):
+                tables = [
+                    _table(rng.randint(1, 4), rng.randint(1, 3), lambda r, c: rng.choice(cells))
+                    for _ in range(2)
+                ]
+                trees, nodes = [], []
+                for table in tables:
+                    element = BeautifulSoup(table, "html.parser").find("table")
+                    trees.append(_original_bracket_notation(element, structure_only))
+                    nodes.append(len(element.find_all(["tr", "td"])) + 1)
+                distance = float(APTED(trees[0], trees[1], _OriginalTableConfig()).compute_edit_distance())
+                expected = max(0.0, min(1.0, 1.0 - distance / max(nodes)))
+                result = metric.calculate(tables[0], tables[1], table_edit_result=table_edit_result)
+                self.assertEqual(result.score, expected, tables)
+
+
+class TestTEDSMetric(unittest.TestCase):
+
+    def setUp(self):
+        self.metric = TEDSMetric("teds", {"legacy_distance": False})
+        self.table_edit_result = MetricResult(metric_name="table_edit", score=1.0)
+
+    def _score(self, predicted, groundtruth, metric=None):
+        metric = metric or self.metric
+        return metric.calculate(predicted, groundtruth, table_edit_result=self.table_edit_result)
+
+    def test_identical_tables(self):
+        table = _table(3, 3)
+        result = self._score(table, table)
+        self.assertEqual(result.score, 1.0)
+        self.assertEqual(result.details["predicted_nodes"], 13)
+
+    def test_special_characters_are_kept(self):
+        """冒号、括号、逗号不再被转义或截断"""
+        groundtruth = _table(2, 2, lambda r, c: f"key:{r}(a,b)")
+        self.assertEqual(self._score(groundtruth, groundtruth).score, 1.0)
+        predicted = _table(2, 2, lambda r, c: f"key:{r}[a;b]")
+        self.assertLess(self._score(predicted, groundtruth).score, 1.0)
+
+    def test_structure_only(self):
+        predicted = _table(2, 2, lambda r, c: "other")
+        result = self._score(predicted, _table(2, 2), StructureTEDSMetric("s_teds"))
+        self.assertEqual(result.score, 1.0)
+
+    def test_missing_row(self):
+        result = self._score(_table(2, 3), _table(3, 3))
+        # 删除一行（1个tr + 3个td），根节点文本也随之变化
+        self.assertLess(result.score, 1 - 4 / 13 + 1e-9)
+        self.assertGreater(result.score, 0.6)
+
+    def test_exact_by_default(self):
+        result = self._score(_table(2, 3), _table(3, 3))
+        self.assertTrue(result.details["exact"])
+        self.assertNotIn("score_bound", result.details)
+
+    def test_identical_tables_skip_exact_distance(self):
+        """上下界重合时不再运行精确算法"""
+        from unittest import mock
+        table = _table(20, 10)
+        with mock.patch.object(TEDSMetric, "_tree_edit_distance") as exact:
+            result = self._score(table, table)
+        exact.assert_not_called()
+        self.assertEqual(result.score, 1.0)
+        self.assertTrue(result.details["exact"])
+
+    def test_tolerance_and_node_budget(self):
+        predicted, groundtruth = _table(4, 3), _table(5, 3, lambda r, c: f"r{r}c{c}!")
+        exact = self._score(predicted, groundtruth)
+
+        for config, reason in [({"tolerance": 1.0}, "tolerance"), ({"node_budget": 10}, "node_budget")]:
+            result = self._score(predicted, groundtruth, TEDSMetric("teds", dict(config, legacy_distance=False)))
+            self.assertFalse(result.details["exact"])
+            self.assertEqual(result.details["bounded_by"], reason)
+            self.assertEqual(result.details["score_bound"], "lower")
+            self.assertLessEqual(result.score, exact.score)
+            self.assertLessEqual(result.details["score_lower"], exact.score)
+            self.assertGreaterEqual(result.details["score_upper"], exact.score)
+
+        # 预算足够时仍然精确计算
+        result = self._score(predicted, groundtruth,
+                             TEDSMetric("teds", {"node_budget": 1000, "legacy_distance": False}))
+        self.assertEqual(result.score, exact.score)
+
+    def test_large_table_speed(self):
+        rng = random.Random(0)
+        groundtruth = _table(50, 20)
+        predicted = _table(50, 20, lambda r, c: f"r{r}c{c}" if rng.random() > 0.1 else "x")
+        start = time.perf_counter()
+        result = self._score(predicted, groundtruth)
+        self.assertTrue(result.success)
+        self.assertLess(time.perf_counter() - start, 10.0)
+
+
+class TestTableMatching(unittest.TestCase):
+
+    def test_hungarian_is_optimal(self):
+        """纯Python实现与穷举结果一致（含非方阵）"""
+        from itertools import permutations
+        rng = random.Random(0)
+        for _ in range(100):
+            n, m = rng.randint(1, 5), rng.randint(1, 5)
+            cost = [[rng.random() for _ in range(m)] for _ in range(n)]
+            if n <= m:
+                best = min(sum(cost[i][j] for i, j in enumerate(p)) for p in permutations(range(m), n))
+            else:
+                best = min(sum(cost[i][j] for j, i in enumerate(p)) for p in permutations(range(n), m))
+            for solver in (_hungarian, linear_sum_assignment):
+                rows, cols = solver(cost)
+                self.assertEqual(len(rows), min(n, m))
+                self.assertEqual(len(set(cols)), len(cols))
+                self.assertAlmostEqual(sum(cost[i][j] for i, j in zip(rows, cols)), best)
+
+    def setUp(self):
+        self.table_edit_result = MetricResult(metric_name="table_edit", score=1.0)
+        self.first = _table(2, 2)
+        self.second = _table(4, 3, lambda r, c: f"v{r * c}")
+
+    def _score(self, predicted, groundtruth, **config):
+        metric = TEDSMetric("teds", dict(config, multi_table=True))
+        return metric.calculate(predicted, groundtruth, table_edit_result=self.table_edit_result)
+
+    def test_reordered_tables(self):
+        """表格顺序不同时仍能正确匹配"""
+        result = self._score(self.first + "\n" + self.second, self.second + "\n" + self.first)
+        self.assertEqual(result.score, 1.0)
+        self.assertEqual(result.details["matched_tables"], 2)
+        # 默认模式只比较第一个表格
+        single = TEDSMetric("teds").calculate(self.first + "\n" + self.second, self.second + "\n" + self.first,
+                                              table_edit_result=self.table_edit_result)
+        self.assertLess(single.score, 1.0)
+
+    def test_missing_table_weighted_by_nodes(self):
+        result = self._score(self.first, self.first + "\n" + self.second)
+        # 第一个表格7个节点满分，漏掉的第二个表格17个节点记0分
+        self.assertAlmostEqual(result.score, 7 / (7 + 17))
+        self.assertEqual(result.details["unmatched_tables"], 1)
+
+    def test_markdown_tables(self):
+        markdown = "| a | b |\n|---|---|\n| 1 | 2 |\n| c | d |\n|---|---|\n| 3 | 4 |"
+        self.assertEqual(len(TEDSMetric._split_markdown_tables(markdown)), 2)
+        result = self._score(markdown, markdown)
+        self.assertEqual(result.details["predicted_tables"], 2)
+        self.assertEqual(result.score, 1.0)
+
+    def test_html_and_markdown_tables(self):
+        """同一文本中的HTML表格和markdown表格都参与比较"""
+        markdown = "| a | b |\n|---|---|\n| 1 | 2 |"
+        mixed = self.first + "\n\n" + markdown
+        result = self._score(mixed, mixed)
+        self.assertEqual(result.details["predicted_tables"], 2)
+        self.assertEqual(result.score, 1.0)
+        self.assertEqual(self._score(self.first, mixed).details["unmatched_tables"], 1)
+
+    def test_pools_match_serial(self):
+        predicted = "\n".join([self.second, _table(3, 2), self.first])
+        groundtruth = "\n".join([self.first, _table(3, 3), self.second])
+        serial = self._score(predicted, groundtruth)
+        for pool in ("thread", "process"):
+            metric = TEDSMetric("teds", dict(multi_table=True, table_workers=2, table_pool=pool))
+            self.addCleanup(metric.close_pool)
+            for _ in range(2):
+                pooled = metric.calculate(predicted, groundtruth, table_edit_result=self.table_edit_result)
+                self.assertEqual(pooled.score, serial.score)
+                self.assertEqual(pooled.details["tables"], serial.details["tables"])
+            # 同一个池在多个页面间复用
+            self.assertIs(metric._table_executor(), metric._table_executor())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""测试常驻工作进程池：每个工作进程只构建一次抽取器，按任务数回收进程"""
+
+import os
+import unittest
+from pathlib import Path
+
+from webmainbench.data import DataLoader
+from webmainbench.evaluator import Evaluator
+from webmainbench.extractors import BaseExtractor, ExtractionResult, ExtractorFactory, ExtractorWorkerPool
+
+
+class _SetupCountingExtractor(BaseExtractor):
+    """内容为 "<进程号>:<本进程内构建次数>:<html>"，用于观察抽取器在哪个进程中构建了几次"""
+
+    setups = 0
+
+    def _setup(self):
+        type(self).setups += 1
+        self.setup_id = type(self).setups
+
+    def _extract_content(self, html, url=None):
+        return ExtractionResult(content=f"{os.getpid()}:{self.setup_id}:{html}", title=url)
+
+
+ExtractorFactory.register("setup-counting", _SetupCountingExtractor)
+
+
+def _parse(result):
+    pid, setup_id, html = result.content.split(":", 2)
+    return int(pid), int(setup_id), html
+
+
+class TestExtractorWorkerPool(unittest.TestCase):
+
+    def test_extractor_built_once_per_worker(self):
+        with ExtractorWorkerPool("setup-counting", workers=2) as pool:
+            results = pool.map((f"id{i}", f"<p>{i}</p>", f"u{i}") for i in range(20))
+            more = pool.batch_extract(["<p>a</p>", "<p>b</p>"])
+
+        self.assertEqual([task_id for task_id, _ in results], [f"id{i}" for i in range(20)])
+        self.assertEqual([r.title for _, r in results], [f"u{i}" for i in range(20)])
+        parsed = [_parse(r) for _, r in results] + [_parse(r) for r in more]
+        self.assertEqual([html for _, _, html in parsed], [f"<p>{i}</p>" for i in range(20)] + ["<p>a</p>", "<p>b</p>"])
+        pids = {pid for pid, _, _ in parsed}
+        self.assertLessEqual(len(pids), 2)
+        self.assertNotIn(os.getpid(), pids)
+        # 抽取器在每个工作进程中只构建一次，跨调用保持
+        self.assertEqual(len({(pid, setup_id) for pid, setup_id, _ in parsed}), len(pids))
+
+    def test_recycle_after_n_tasks(self):
+        with ExtractorWorkerPool("setup-counting", workers=1, recycle_after=3) as pool:
+            results = pool.map((i, f"<p>{i}</p>", None) for i in range(9))
+        pids = [_parse(r)[0] for _, r in results]
+        self.assertEqual(len(set(pids)), 3)
+        self.assertEqual(pids, sorted(pids, key=pids.index))  # 每个进程连续处理3个任务
+        self.assertTrue(all(r.success for _, r in results))
+
+    def test_recycle_counts_tasks_not_chunks(self):
+        with ExtractorWorkerPool("setup-counting", workers=1, recycle_after=2) as pool:
+            results = pool.map(((i, f"<p>{i}</p>", None) for i in range(6)), chunksize=3)
+        self.assertEqual(len({_parse(r)[0] for _, r in results}), 3)
+
+    def test_recycle_after_from_config(self):
+        extractor = ExtractorFactory.create("setup-counting", {"recycle_after": 2})
+        try:
+            results = extractor.batch_extract([f"<p>{i}</p>" for i in range(8)], workers=2, mode="process")
+            self.assertEqual(extractor.worker_pool(2, 2).recycle_after, 2)
+        finally:
+            extractor.close_worker_pool()
+        self.assertGreaterEqual(len({_parse(r)[0] for r in results}), 4)  # 每个进程最多处理2页
+
+    def test_unordered_and_errors(self):
+        with ExtractorWorkerPool(ExtractorFactory.create("setup-counting"), workers=2) as pool:
+            results = dict(pool.imap([(1, "<p>x</p>", None), (2, "  ", None)], ordered=False))
+        self.assertTrue(results[1].success)
+        self.assertEqual(results[2].error_message, "Empty HTML input")
+
+    def test_process_batch_extract_reuses_pool(self):
+        extractor = ExtractorFactory.create("setup-counting")
+        try:
+            first = extractor.batch_extract(["<p>1</p>", "<p>2</p>", "<p>3</p>"], workers=2, mode="process")
+            pool = extractor.worker_pool(2)
+            second = extractor.batch_extract(["<p>4</p>", "<p>5</p>"], workers=2, mode="process")
+            self.assertIs(extractor.worker_pool(2), pool)
+        finally:
+            extractor.close_worker_pool()
+        self.assertEqual([_parse(r)[2] for r in first + second], [f"<p>{i}</p>" for i in range(1, 6)])
+        self.assertLessEqual(len({_parse(r)[0] for r in first + second}), 2)
+
+    def test_evaluator_closes_pool(self):
+        data_path = Path(__file__).parent.parent / "data" / "sample_dataset.jsonl"
+        for run in ("evaluate", "evaluate_batched"):
+            extractor = ExtractorFactory.create("setup-counting")
+            dataset = DataLoader.load_jsonl(data_path) if run == "evaluate" else data_path
+            getattr(Evaluator(), run)(dataset, extractor, extract_workers=2, extract_mode="process")
+            self.assertNotIn('_worker_pool', extractor.__dict__, run)
+
+
+if __name__ == '__main__':
+    unittest.main()
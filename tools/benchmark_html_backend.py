@@ -0,0 +1,50 @@
+'''
+本脚本比较HTML解析后端（html.parser 与 lxml）在多表格文档上的 split_markdown 耗时。
+命令行输入示例：
+python tools/benchmark_html_backend.py
+python tools/benchmark_html_backend.py --tables 10 --rows 50 --repeat 10
+
+'''
+
+import argparse
+import time
+
+from webmainbench.metrics.segmenter import split_markdown
+
+
+def build_document(tables: int, rows: int, columns: int) -> str:
+    """正文段落与规范HTML表格交替出现的文档"""
+    body = "".join(
+        "<tr>" + "".join(f"<td>c{r}{c}</td>" for c in range(columns)) + "</tr>" for r in range(rows)
+    )
+    return "\n\n".join("para " * 50 + f"\n\n<table>{body}</table>" for _ in range(tables))
+
+
+def best_of(document: str, parser: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        split_markdown(document, parser)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML解析后端微基准")
+    parser.add_argument("--tables", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=30)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    document = build_document(args.tables, args.rows, args.columns)
+    assert split_markdown(document, "lxml") == split_markdown(document), "两种后端的分割结果不一致"
+
+    reference = best_of(document, "html.parser", args.repeat)
+    fast = best_of(document, "lxml", args.repeat)
+    print(f"split_markdown: html.parser {reference * 1000:.1f}ms, lxml {fast * 1000:.1f}ms "
+          f"({reference / fast:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
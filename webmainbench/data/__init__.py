@@ -7,10 +7,12 @@ This module handles loading, saving and managing benchmark datasets.
 from .dataset import BenchmarkDataset, DataSample
 from .loader import DataLoader
 from .saver import DataSaver
+from .groundtruth_index import GroundtruthSplitIndex
 
 __all__ = [
     "BenchmarkDataset",
     "DataSample", 
     "DataLoader",
     "DataSaver",
+    "GroundtruthSplitIndex",
 ] 
\ No newline at end of file
@@ -89,6 +89,7 @@ class BenchmarkDataset:
         self.description = description
         self.samples: List[DataSample] = []
         self._metadata: Dict[str, Any] = {}
+        self.groundtruth_index = None  # GroundtruthSplitIndex, built lazily
     
     def add_sample(self, sample: DataSample) -> None:
         """Add a data sample to the dataset."""
@@ -137,6 +138,34 @@ class BenchmarkDataset:
         
         return stats
     
+    def precompute_groundtruth_splits(self, save_path: Union[str, Path, bool, None] = None):
+        """
+        Precompute the code/formula/table/text split of every groundtruth.
+        
+        Args:
+            save_path: Where to persist the index. True saves to the sidecar
+                file next to the dataset source file; None/False keeps it
+                in memory only.
+        
+        Returns:
+            GroundtruthSplitIndex attached to this dataset
+        """
+        from .groundtruth_index import GroundtruthSplitIndex
+        
+        if self.groundtruth_index is None:
+            self.groundtruth_index = GroundtruthSplitIndex()
+        self.groundtruth_index.build(self.samples)
+        
+        if save_path is True:
+            source_path = self.get_metadata('source_path')
+            if not source_path:
+                raise ValueError("Dataset has no source_path metadata; pass an explicit save_path")
+            save_path = GroundtruthSplitIndex.sidecar_path(source_path)
+        if save_path:
+            self.groundtruth_index.save(save_path)
+        
+        return self.groundtruth_index
+    
     def set_metadata(self, key: str, value: Any) -> None:
         """Set dataset metadata."""
         self._metadata[key] = value
@@ -0,0 +1,128 @@
+"""
+Groundtruth split index for WebMainBench.
+
+Groundtruth content never changes between runs, so its code/formula/table/text
+split only needs to be computed once per dataset and can be persisted in a
+sidecar file next to the dataset.
+"""
+
+import hashlib
+import json
+import jsonlines
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Union, Iterable
+
+from .dataset import DataSample
+
+
+class GroundtruthSplitIndex:
+    """Content-hash keyed cache of groundtruth content splits."""
+
+    # 分割算法版本，分割逻辑变化时递增以使旧的sidecar文件失效
+    SPLIT_VERSION = "1"
+    SIDECAR_SUFFIX = ".gt_splits.jsonl"
+
+    def __init__(self):
+        self._splits: Dict[str, Dict[str, str]] = {}
+
+    @classmethod
+    def content_hash(cls, content: Optional[str],
+                     content_list: Optional[List[Dict[str, Any]]] = None,
+                     html_parser: Optional[str] = None) -> str:
+        """
+        Compute the cache key for a (content, content_list) pair.
+
+        Args:
+            content: Groundtruth markdown content
+            content_list: Groundtruth content list
+            html_parser: HTML parse backend used for the split (None for the default)
+
+        Returns:
+            Hex digest identifying the pair and the split algorithm version
+        """
+        hasher = hashlib.sha256()
+        hasher.update(cls.SPLIT_VERSION.encode('utf-8'))
+        hasher.update(b'\0')
+        hasher.update((content or "").encode('utf-8'))
+        hasher.update(b'\0')
+        hasher.update(json.dumps(content_list or [], ensure_ascii=False, sort_keys=True).encode('utf-8'))
+        # 默认解析后端不参与哈希，已有的sidecar文件保持有效
+        from ..metrics.html_backend import DEFAULT_HTML_PARSER
+        if html_parser and html_parser != DEFAULT_HTML_PARSER:
+            hasher.update(b'\0')
+            hasher.update(html_parser.encode('utf-8'))
+        return hasher.hexdigest()
+
+    @classmethod
+    def sidecar_path(cls, data_path: Union[str, Path]) -> Path:
+        """Return the sidecar file path for a dataset file."""
+        data_path = Path(data_path)
+        return data_path.with_name(data_path.stem + cls.SIDECAR_SUFFIX)
+
+    def get(self, sample: DataSample, html_parser: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """Get the cached groundtruth split of a sample, or None if missing."""
+        key = self.content_hash(sample.groundtruth_content, sample.groundtruth_content_list, html_parser)
+        return self._splits.get(key)
+
+    def get_or_compute(self, sample: DataSample, html_parser: Optional[str] = None) -> Dict[str, str]:
+        """Get the groundtruth split of a sample, computing and caching it if missing."""
+        key = self.content_hash(sample.groundtruth_content, sample.groundtruth_content_list, html_parser)
+        split = self._splits.get(key)
+        if split is None:
+            from ..metrics.base import BaseMetric
+            split = BaseMetric.split_content(sample.groundtruth_content, sample.groundtruth_content_list,
+                                             html_parser)
+            self._splits[key] = split
+        return split
+
+    def build(self, samples: Iterable[DataSample], html_parser: Optional[str] = None) -> int:
+        """
+        Compute splits for all samples that are not cached yet.
+
+        Args:
+            samples: Samples to index
+            html_parser: HTML parse backend used for the splits
+
+        Returns:
+            Number of newly computed splits
+        """
+        before = len(self._splits)
+        for sample in samples:
+            self.get_or_compute(sample, html_parser)
+        return len(self._splits) - before
+
+    def save(self, file_path: Union[str, Path]) -> None:
+        """Persist the index as JSONL (one record per content hash)."""
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with jsonlines.open(file_path, 'w') as writer:
+            for key, split in self._splits.items():
+                writer.write({"hash": key, "split": split})
+
+    @classmethod
+    def load(cls, file_path: Union[str, Path]) -> "GroundtruthSplitIndex":
+        """Load an index previously written by save()."""
+        index = cls()
+        with jsonlines.open(Path(file_path), 'r') as reader:
+            for record in reader:
+                index._splits[record["hash"]] = record["split"]
+        return index
+
+    @classmethod
+    def load_sidecar(cls, data_path: Union[str, Path]) -> Optional["GroundtruthSplitIndex"]:
+        """Load the sidecar index of a dataset file if it exists."""
+        sidecar = cls.sidecar_path(data_path)
+        if not sidecar.exists():
+            return None
+        try:
+            return cls.load(sidecar)
+        except Exception as e:
+            print(f"Warning: Failed to load groundtruth split index {sidecar}: {e}")
+            return None
+
+    def __len__(self) -> int:
+        return len(self._splits)
+
+    def __contains__(self, sample: DataSample) -> bool:
+        return self.get(sample) is not None
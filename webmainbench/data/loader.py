@@ -7,6 +7,7 @@ import jsonlines
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Union, Iterator
 from .dataset import BenchmarkDataset, DataSample
+from .groundtruth_index import GroundtruthSplitIndex
 
 
 class DataLoader:
@@ -39,6 +40,7 @@ class DataLoader:
                     print(f"Warning: Failed to load sample at line {idx}: {e}")
                     continue
         
+        DataLoader._attach_source(dataset, file_path)
         return dataset
     
     @staticmethod
@@ -88,8 +90,33 @@ class DataLoader:
                 print(f"Warning: Failed to load sample {idx}: {e}")
                 continue
         
+        DataLoader._attach_source(dataset, file_path)
         return dataset
     
+    @staticmethod
+    def _attach_source(dataset: BenchmarkDataset, file_path: Path) -> None:
+        """记录数据集来源路径，并自动加载已存在的groundtruth分割索引sidecar文件。"""
+        dataset.set_metadata('source_path', str(file_path))
+        dataset.groundtruth_index = GroundtruthSplitIndex.load_sidecar(file_path)
+    
+    @staticmethod
+    def precompute_groundtruth_splits(file_path: Union[str, Path]) -> GroundtruthSplitIndex:
+        """
+        预先计算数据集所有groundtruth的内容分割，并保存到数据集旁的sidecar文件。
+        
+        Args:
+            file_path: JSONL/JSON数据集文件路径
+            
+        Returns:
+            GroundtruthSplitIndex实例
+        """
+        file_path = Path(file_path)
+        if file_path.suffix == '.json':
+            dataset = DataLoader.load_json(file_path)
+        else:
+            dataset = DataLoader.load_jsonl(file_path)
+        return dataset.precompute_groundtruth_splits(save_path=True)
+    
     @staticmethod
     def load_from_directory(dir_path: Union[str, Path], 
                           pattern: str = "*.jsonl", 
@@ -5,8 +5,13 @@ This module provides the main evaluation engine for running benchmarks.
 """
 
 from .evaluator import Evaluator, EvaluationResult
+from .checkpoint import RunCheckpoint
+from .statistics import ScoreMatrix, paired_bootstrap_test
 
 __all__ = [
     "Evaluator",
     "EvaluationResult",
+    "RunCheckpoint",
+    "ScoreMatrix",
+    "paired_bootstrap_test",
 ] 
\ No newline at end of file
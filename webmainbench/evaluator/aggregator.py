@@ -0,0 +1,211 @@
+"""
+Streaming metric aggregation for WebMainBench.
+
+Keeps constant-size running statistics per metric and per category so that
+batched evaluation does not need to hold every sample result in memory. The
+means are accumulated in the same order as Evaluator._aggregate_metrics, so the
+aggregates are identical to the in-memory computation.
+"""
+
+import math
+from array import array
+from typing import Dict, Any, List, Optional
+
+
+# 参与聚合的指标；全局overall为5个核心指标均值的平均
+CORE_METRICS = ["text_edit", "code_edit", "table_edit", "table_TEDS", "formula_edit"]
+AGGREGATED_METRICS = CORE_METRICS + ["overall"]
+
+# 保留用于调试的样本错误条数
+MAX_SAMPLE_ERRORS = 10
+
+
+def categorize_error(error_msg: str) -> str:
+    """Simple error categorization shared by in-memory and streaming aggregation."""
+    error_msg = error_msg.lower()
+    if 'timeout' in error_msg or 'timed out' in error_msg:
+        return 'timeout'
+    elif 'memory limit' in error_msg:
+        return 'memory_limit'
+    elif 'worker crashed' in error_msg:
+        return 'crash'
+    elif 'network' in error_msg or 'connection' in error_msg:
+        return 'network'
+    elif 'parse' in error_msg or 'parsing' in error_msg:
+        return 'parsing'
+    elif 'empty' in error_msg:
+        return 'empty_input'
+    return 'other'
+
+
+class MetricAccumulator:
+    """Running count / sum / min / max and Welford variance of one metric."""
+
+    __slots__ = ("count", "total", "_mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        # Welford 算法的滑动均值与离差平方和，避免 E[x^2]-E[x]^2 的相消误差
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        # 均值仍按求和计算，与内存聚合逐位一致
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation."""
+        if not self.count:
+            return 0.0
+        return math.sqrt(max(self._m2 / self.count, 0.0))
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+        }
+
+
+class _Bucket:
+    """Accumulators of all aggregated metrics for one group of samples."""
+
+    __slots__ = ("samples", "metrics")
+
+    def __init__(self):
+        self.samples = 0
+        self.metrics = {name: MetricAccumulator() for name in AGGREGATED_METRICS}
+
+    def add(self, sample_result: Dict[str, Any]) -> None:
+        self.samples += 1
+        metrics = sample_result.get("metrics", {})
+        for metric_name, accumulator in self.metrics.items():
+            if metric_name in metrics and metrics[metric_name].get("success", False):
+                accumulator.add(metrics[metric_name]["score"])
+
+    def overall_metrics(self) -> Dict[str, float]:
+        if not self.samples:
+            return {}
+        overall_metrics = {name: accumulator.mean for name, accumulator in self.metrics.items()}
+        # 全局overall固定为5个核心指标的平均值
+        overall_metrics["overall"] = sum(overall_metrics[name] for name in CORE_METRICS) / len(CORE_METRICS)
+        return overall_metrics
+
+
+class StreamingAggregator:
+    """
+    Constant-memory aggregation of sample results.
+
+    Produces the same overall_metrics, category_metrics and error_analysis as the
+    in-memory Evaluator methods, plus per-metric statistics.
+    """
+
+    def __init__(self, min_category_samples: int = 3, keep_scores: bool = False):
+        """
+        Args:
+            min_category_samples: Categories with fewer results are not reported
+            keep_scores: Also keep the score columns (6 floats per result, no
+                contents) so metric_statistics can add percentiles and bootstrap CIs
+        """
+        self.min_category_samples = min_category_samples
+        self._overall = _Bucket()
+        self._scores = array('d') if keep_scores else None
+        self._mask = bytearray() if keep_scores else None
+        self._categories: Dict[str, _Bucket] = {}
+        self.failed_count = 0
+        self.error_types: Dict[str, int] = {}
+        self.sample_errors: List[Dict[str, Any]] = []
+
+    def add_result(self, sample_result: Dict[str, Any], content_type: Optional[str] = None) -> None:
+        """Add one sample result; content_type selects its category bucket."""
+        self._overall.add(sample_result)
+        if self._scores is not None:
+            metrics = sample_result.get("metrics") or {}
+            for metric_name in AGGREGATED_METRICS:
+                metric_data = metrics.get(metric_name)
+                success = bool(metric_data and metric_data.get("success", False))
+                self._scores.append(metric_data["score"] if success else 0.0)
+                self._mask.append(success)
+        category = content_type or 'unknown'
+        bucket = self._categories.get(category)
+        if bucket is None:
+            bucket = self._categories[category] = _Bucket()
+        bucket.add(sample_result)
+
+    def add_error(self, error: Dict[str, Any]) -> None:
+        """Add one extraction/evaluation error entry (with an 'error' message)."""
+        self.failed_count += 1
+        error_type = categorize_error(error['error'])
+        self.error_types[error_type] = self.error_types.get(error_type, 0) + 1
+        if len(self.sample_errors) < MAX_SAMPLE_ERRORS:
+            self.sample_errors.append(error)
+
+    @property
+    def total_results(self) -> int:
+        return self._overall.samples
+
+    def overall_metrics(self) -> Dict[str, float]:
+        """Mean of every aggregated metric over all results."""
+        return self._overall.overall_metrics()
+
+    def category_metrics(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """Per-category metrics for categories with enough results."""
+        category_metrics = {
+            category: bucket.overall_metrics()
+            for category, bucket in self._categories.items()
+            if bucket.samples >= self.min_category_samples
+        }
+        return category_metrics if category_metrics else None
+
+    def metric_statistics(self, n_resamples: int = 0, confidence: float = 0.95,
+                          seed: Optional[int] = 0) -> Dict[str, Dict[str, float]]:
+        """
+        count / mean / std / min / max of every aggregated metric over its per-sample scores.
+
+        'overall' describes the per-sample overall scores, so its mean can differ
+        from overall_metrics()['overall'] (the mean of the core metric means).
+        With keep_scores, percentiles and (n_resamples > 0) bootstrap CIs are added.
+        """
+        if not self.total_results:
+            return {}
+        statistics = {name: accumulator.to_dict() for name, accumulator in self._overall.metrics.items()}
+        if self._scores is not None:
+            import numpy as np
+            from .statistics import ScoreMatrix
+
+            shape = (self.total_results, len(AGGREGATED_METRICS))
+            matrix = ScoreMatrix(np.frombuffer(self._scores, dtype=np.float64).reshape(shape),
+                                 np.frombuffer(self._mask, dtype=np.uint8).reshape(shape).astype(bool))
+            for name, entry in matrix.distribution_statistics(n_resamples, confidence, seed).items():
+                statistics[name].update(entry)
+        return statistics
+
+    def error_analysis(self) -> Dict[str, Any]:
+        """Error analysis in the format of Evaluator._analyze_errors."""
+        total_samples = self.total_results
+        success_rate = (total_samples - self.failed_count) / total_samples if total_samples > 0 else 0.0
+        return {
+            'total_samples': total_samples,
+            'failed_count': self.failed_count,
+            'success_rate': success_rate,
+            'common_errors': dict(self.error_types),
+            'sample_errors': list(self.sample_errors),
+        }
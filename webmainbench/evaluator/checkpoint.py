@@ -0,0 +1,207 @@
+"""
+Resumable evaluation runs for WebMainBench.
+
+A run directory holds an append-only JSONL log of scored samples. Records are
+keyed by sample_id, extractor name and a hash of the extractor/metric
+configuration, so a restarted run skips samples that were already scored and
+rebuilds its aggregate results from the log.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple, Union
+
+
+class RunCheckpoint:
+    """Append-only results log of one evaluation run."""
+
+    LOG_FILE = "results.jsonl"
+    META_FILE = "run.json"
+
+    def __init__(self, run_dir: Union[str, Path], extractor_name: str,
+                 extractor_config: Optional[Dict[str, Any]] = None,
+                 metric_config: Optional[Dict[str, Any]] = None):
+        """
+        Open (or create) a run directory.
+
+        Args:
+            run_dir: Directory holding the results log
+            extractor_name: Name of the evaluated extractor
+            extractor_config: Extractor configuration (part of the run key)
+            metric_config: Metric configuration (part of the run key)
+        """
+        self.run_dir = Path(run_dir)
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.log_path = self.run_dir / self.LOG_FILE
+        self.extractor_name = extractor_name
+        self.config_hash = self.compute_config_hash(extractor_config, metric_config)
+
+        # 只在内存中保留样本状态，结果本身按需从日志流式读取
+        self._done = set()
+        self._last_line: Dict[str, int] = {}
+        self._line_count = 0
+        self._load()
+        self._write_meta(extractor_config, metric_config)
+
+    @staticmethod
+    def compute_config_hash(extractor_config: Optional[Dict[str, Any]] = None,
+                            metric_config: Optional[Dict[str, Any]] = None) -> str:
+        """Hash the configuration that determines the scores of a run."""
+        payload = json.dumps(
+            {"extractor_config": extractor_config or {}, "metric_config": metric_config or {}},
+            ensure_ascii=False, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def _read_log(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (line number, record) for records of this extractor and config."""
+        if not self.log_path.exists():
+            return
+
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程被中断时最后一行可能只写了一半
+                    continue
+                if record.get("extractor") != self.extractor_name or \
+                        record.get("config_hash") != self.config_hash:
+                    continue
+                yield line_number, record
+
+    def _load(self) -> None:
+        """Index which samples are already scored and where their latest record is."""
+        for line_number, record in self._read_log():
+            self._track(record, line_number)
+        # 行号按物理行计算（包括其他运行的记录和被截断的半行）
+        if self.log_path.exists():
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                self._line_count = sum(1 for _ in f)
+
+    def _track(self, record: Dict[str, Any], line_number: int) -> None:
+        sample_id = record["sample_id"]
+        self._last_line[sample_id] = line_number
+        if record.get("result") is not None:
+            self._done.add(sample_id)
+        else:
+            self._done.discard(sample_id)
+
+    def _write_meta(self, extractor_config: Optional[Dict[str, Any]],
+                    metric_config: Optional[Dict[str, Any]]) -> None:
+        meta_path = self.run_dir / self.META_FILE
+        meta = {}
+        if meta_path.exists():
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                meta = {}
+
+        runs = meta.setdefault("runs", {})
+        runs.setdefault(f"{self.extractor_name}:{self.config_hash}", {
+            "extractor": self.extractor_name,
+            "config_hash": self.config_hash,
+            "extractor_config": extractor_config or {},
+            "metric_config": metric_config or {},
+            "created_at": datetime.now().isoformat(),
+        })
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+
+    def is_done(self, sample_id: str) -> bool:
+        """Whether a sample already has a scored result in the log."""
+        return sample_id in self._done
+
+    @property
+    def completed_count(self) -> int:
+        """Number of samples with a scored result."""
+        return len(self._done)
+
+    def append(self, batch_results: List[Dict[str, Any]], batch_errors: List[Dict[str, Any]],
+               content_types: Optional[Dict[str, Optional[str]]] = None) -> None:
+        """
+        Append the outcome of a batch to the log and sync it to disk.
+
+        Args:
+            batch_results: Sample results of the batch
+            batch_errors: Error entries of the batch (with 'sample_id')
+            content_types: Optional sample_id -> content_type mapping stored with
+                each record so category metrics can be rebuilt from the log
+        """
+        content_types = content_types or {}
+        errors_by_id = {error['sample_id']: error for error in batch_errors}
+        records = []
+        for result in batch_results:
+            sample_id = result['sample_id']
+            records.append(self._make_record(sample_id, result, errors_by_id.pop(sample_id, None),
+                                             content_types.get(sample_id)))
+        # 评测过程抛出异常的样本没有结果，只记录错误，重启后会重新评测
+        for sample_id, error in errors_by_id.items():
+            records.append(self._make_record(sample_id, None, error, content_types.get(sample_id)))
+
+        if not records:
+            return
+
+        with open(self.log_path, 'a+', encoding='utf-8') as f:
+            # 上次中断留下的半行不能和新记录拼在一起
+            if f.tell() > 0:
+                f.seek(f.tell() - 1)
+                if f.read(1) != '\n':
+                    f.write('\n')
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str))
+                f.write('\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        for record in records:
+            self._track(record, self._line_count)
+            self._line_count += 1
+
+    def _make_record(self, sample_id: str, result: Optional[Dict[str, Any]],
+                     error: Optional[Dict[str, Any]], content_type: Optional[str]) -> Dict[str, Any]:
+        return {
+            "sample_id": sample_id,
+            "extractor": self.extractor_name,
+            "config_hash": self.config_hash,
+            "content_type": content_type,
+            "result": result,
+            "error": error,
+        }
+
+    def iter_records(self, sample_ids: Optional[Set[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the latest record of every logged sample, in log order.
+
+        Args:
+            sample_ids: Only yield records of these samples (default: all logged samples)
+        """
+        for line_number, record in self._read_log():
+            sample_id = record["sample_id"]
+            if sample_ids is not None and sample_id not in sample_ids:
+                continue
+            if self._last_line.get(sample_id) == line_number:
+                yield record
+
+    def collect(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Rebuild the results of the whole run from the log.
+
+        Returns:
+            (sample_results, extraction_errors) over all logged samples
+        """
+        sample_results = []
+        extraction_errors = []
+        for record in self.iter_records():
+            if record.get("result") is not None:
+                sample_results.append(record["result"])
+            if record.get("error") is not None:
+                extraction_errors.append(record["error"])
+        return sample_results, extraction_errors
@@ -6,12 +6,16 @@ from dataclasses import dataclass
 from typing import Dict, Any, List, Optional, Union, Iterator
 import time
 import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
-from ..data import BenchmarkDataset, DataSample, DataLoader, DataSaver
-from ..extractors import BaseExtractor, ExtractorFactory
+from ..data import BenchmarkDataset, DataSample, DataLoader, DataSaver, GroundtruthSplitIndex
+from ..extractors import BaseExtractor, ExtractorFactory, ExtractionResult, ExtractionCache
 from ..metrics import MetricCalculator, MetricResult
+from .aggregator import StreamingAggregator, categorize_error
+from .statistics import ScoreMatrix
 
 
 @dataclass
@@ -40,6 +44,12 @@ class EvaluationResult:
     extractor_config: Optional[Dict[str, Any]] = None
     metric_config: Optional[Dict[str, Any]] = None
     
+    # Per-metric statistics (count/mean/std/min/max)
+    metric_statistics: Optional[Dict[str, Dict[str, float]]] = None
+    
+    # Extractor runtime statistics (e.g. prefill tokens saved by prefix caching)
+    extractor_stats: Optional[Dict[str, Any]] = None
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary format."""
         return {
@@ -48,6 +58,7 @@ class EvaluationResult:
                 "extractor_name": self.extractor_name,
                 "timestamp": self.timestamp,
                 "total_samples": self.total_samples,
+                "extractor_stats": self.extractor_stats,
             },
             "overall_metrics": self.overall_metrics,
             "sample_results": self.sample_results,
@@ -55,6 +66,7 @@ class EvaluationResult:
             "error_analysis": self.error_analysis,
             "extractor_config": self.extractor_config,
             "metric_config": self.metric_config,
+            "metric_statistics": self.metric_statistics,
         }
     
     @classmethod
@@ -72,28 +84,43 @@ class EvaluationResult:
             error_analysis=data.get("error_analysis"),
             extractor_config=data.get("extractor_config"),
             metric_config=data.get("metric_config"),
+            metric_statistics=data.get("metric_statistics"),
+            extractor_stats=metadata.get("extractor_stats"),
         )
 
 
 class Evaluator:
     """Main evaluator for web content extraction benchmarks."""
     
-    def __init__(self, metric_config: Dict[str, Any] = None):
+    def __init__(self, metric_config: Dict[str, Any] = None,
+                 extraction_cache: Optional[ExtractionCache] = None,
+                 bootstrap_resamples: int = 0):
         """
         Initialize the evaluator.
         
         Args:
             metric_config: Configuration for metrics
+            extraction_cache: Optional on-disk cache of extraction results, shared
+                across runs so that changing metrics does not require re-extraction
+            bootstrap_resamples: Number of bootstrap resamples for the 95% confidence
+                intervals in metric_statistics; a positive value also adds percentiles
+                (default 0: count/mean/std/min/max only)
         """
         self.metric_calculator = MetricCalculator(metric_config)
         self.metric_config = metric_config or {}
+        self.extraction_cache = extraction_cache
+        self.bootstrap_resamples = bootstrap_resamples
     
     def evaluate(self, 
                 dataset: BenchmarkDataset,
                 extractor: Union[BaseExtractor, str],
                 extractor_config: Dict[str, Any] = None,
                 max_samples: Optional[int] = None,
-                categories: Optional[List[str]] = None) -> EvaluationResult:
+                categories: Optional[List[str]] = None,
+                workers: int = 1,
+                chunk_size: Optional[int] = None,
+                extract_workers: int = 1,
+                extract_mode: Optional[str] = None) -> EvaluationResult:
         """
         Evaluate an extractor on a dataset.
         
@@ -103,6 +130,11 @@ class Evaluator:
             extractor_config: Configuration for the extractor
             max_samples: Maximum number of samples to evaluate (for testing)
             categories: Specific categories to evaluate
+            workers: Number of worker processes (1 evaluates in-process)
+            chunk_size: Samples per task sent to a worker, or per batch_extract
+                call when evaluating in-process (default: auto / 50)
+            extract_workers: Concurrency of extractor.batch_extract when evaluating in-process
+            extract_mode: "thread" or "process" (default: the extractor's preferred_batch_mode)
             
         Returns:
             EvaluationResult instance
@@ -110,6 +142,8 @@ class Evaluator:
         # Create extractor if string name provided
         if isinstance(extractor, str):
             extractor = ExtractorFactory.create(extractor, extractor_config)
+        if self.extraction_cache is not None:
+            extractor.extraction_cache = self.extraction_cache
         
         # Filter samples if needed (避免不必要的副本)
         samples_iter = dataset.samples
@@ -129,47 +163,55 @@ class Evaluator:
             # 如果没有任何过滤，直接使用原始列表避免副本
             samples_to_evaluate = samples_iter if not categories else samples_iter
         
-        # Run evaluation
-        sample_results = []
-        extraction_errors = []
+        # Groundtruth splits are shared across runs/extractors on the same dataset
+        if dataset.groundtruth_index is None:
+            dataset.groundtruth_index = GroundtruthSplitIndex()
+        groundtruth_index = dataset.groundtruth_index
         
+        # Run evaluation
         print(f"Evaluating {len(samples_to_evaluate)} samples...")
         
-        for i, sample in enumerate(samples_to_evaluate):
-            if i % 10 == 0:
-                print(f"Progress: {i}/{len(samples_to_evaluate)}")
-            
-            try:
-                sample_result = self._evaluate_sample(sample, extractor)
-                sample_results.append(sample_result)
-                
-                # Track extraction errors
-                if not sample_result.get('extraction_success', True):
-                    extraction_errors.append({
-                        'sample_id': sample.id,
-                        'error': sample_result.get('extraction_error', 'Unknown error')
-                    })
+        try:
+            if workers and workers > 1:
+                sample_results = self._evaluate_parallel(
+                    samples_to_evaluate, extractor, groundtruth_index, workers, chunk_size
+                )
+            else:
+                # 按块通过batch_extract抽取（抽取器可整批推理或并发抽取），再逐个打分
+                sample_results = []
+                chunk_size = chunk_size or 50
+                for start in range(0, len(samples_to_evaluate), chunk_size):
+                    print(f"Progress: {start}/{len(samples_to_evaluate)}")
+                    chunk = samples_to_evaluate[start:start + chunk_size]
+                    extraction_results = self._extract_batch(chunk, extractor, extract_workers, extract_mode)
                     
-            except Exception as e:
-                print(f"Error evaluating sample {sample.id}: {e}")
-                # Create error result
-                error_result = {
-                    'sample_id': sample.id,
-                    'extraction_success': False,
-                    'extraction_error': str(e),
-                    'metrics': {},
-                }
-                sample_results.append(error_result)
-                extraction_errors.append({
-                    'sample_id': sample.id,
-                    'error': str(e)
-                })
+                    for i, sample in enumerate(chunk):
+                        sample_results.append(self._evaluate_sample_safe(
+                            sample, extractor,
+                            groundtruth_split=groundtruth_index.get_or_compute(sample, self.metric_calculator.html_parser),
+                            extraction_result=extraction_results[i] if extraction_results is not None else None,
+                        ))
+        finally:
+            # 运行结束后关闭抽取器的进程池和隔离子进程，避免工作进程残留
+            extractor.close_workers()
+        
+        # Track extraction errors
+        extraction_errors = [
+            {
+                'sample_id': sample_result['sample_id'],
+                'error': sample_result.get('extraction_error', 'Unknown error')
+            }
+            for sample_result in sample_results
+            if not sample_result.get('extraction_success', True)
+        ]
         
         # Aggregate results
         overall_metrics = self._aggregate_metrics(sample_results)
         category_metrics = self._calculate_category_metrics(sample_results, samples_to_evaluate)
         error_analysis = self._analyze_errors(extraction_errors, sample_results)
         
+        metric_statistics = self._metric_statistics(sample_results)
+        
         # Create evaluation result
         evaluation_result = EvaluationResult(
             dataset_name=dataset.name,
@@ -182,6 +224,8 @@ class Evaluator:
             error_analysis=error_analysis,
             extractor_config=extractor.get_config(),
             metric_config=self.metric_config,
+            metric_statistics=metric_statistics,
+            extractor_stats=extractor.get_run_stats() or None,
         )
         
         return evaluation_result
@@ -193,7 +237,13 @@ class Evaluator:
                         extractor_config: Dict[str, Any] = None,
                         max_samples: Optional[int] = None,
                         categories: Optional[List[str]] = None,
-                        output_file: Optional[Union[str, Path]] = None) -> EvaluationResult:
+                        output_file: Optional[Union[str, Path]] = None,
+                        pipelined: bool = False,
+                        extract_workers: int = 1,
+                        extract_mode: Optional[str] = None,
+                        score_workers: int = 1,
+                        queue_size: Optional[int] = None,
+                        run_dir: Optional[Union[str, Path]] = None) -> EvaluationResult:
         """
         分批处理评测，减少内存使用。
         
@@ -204,7 +254,15 @@ class Evaluator:
             extractor_config: 抽取器配置
             max_samples: 最大样本数限制
             categories: 特定类别过滤
-            output_file: 可选的结果输出文件（用于大数据集）
+            output_file: 可选的结果输出文件。提供时逐批写入样本结果且不在内存中保留
+                （返回的sample_results为空），整体指标由流式累加器精确计算
+            pipelined: 是否将抽取与打分拆成两级流水线并发执行
+            extract_workers: 抽取并发数：流水线模式下为抽取线程数，否则为每批batch_extract的并发数
+            extract_mode: batch_extract的并发方式（"thread"或"process"，默认由抽取器决定）
+            score_workers: 流水线模式下的打分线程数
+            queue_size: 流水线各级队列容量（默认等于batch_size）
+            run_dir: 可选的运行目录。提供时每批结果都会追加写入检查点日志，
+                重新运行时跳过已评测的样本，并基于日志重建整体结果
             
         Returns:
             EvaluationResult实例
@@ -212,14 +270,17 @@ class Evaluator:
         # Create extractor if string name provided
         if isinstance(extractor, str):
             extractor = ExtractorFactory.create(extractor, extractor_config)
+        if self.extraction_cache is not None:
+            extractor.extraction_cache = self.extraction_cache
         
         jsonl_file_path = Path(jsonl_file_path)
         
-        # 统计信息
-        total_samples = 0
+        # 统计信息（指标通过流式累加器聚合，内存占用与样本数无关）
         processed_samples = 0
+        # 需要置信区间时额外保留分数列（不含抽取内容）
+        aggregator = StreamingAggregator(keep_scores=self.bootstrap_resamples > 0)
+        keep_results = output_file is None
         all_sample_results = []
-        all_extraction_errors = []
         
         print(f"🔄 开始批处理评测")
         print(f"   数据集: {jsonl_file_path}")
@@ -228,38 +289,94 @@ class Evaluator:
         
         start_time = time.time()
         
+        # 如果数据集旁存在预先计算的groundtruth分割索引，直接复用
+        groundtruth_index = GroundtruthSplitIndex.load_sidecar(jsonl_file_path)
+        
         # 使用DataLoader的流式批处理方法
-        for batch_samples in DataLoader.stream_jsonl_batched(
+        batches = DataLoader.stream_jsonl_batched(
             file_path=jsonl_file_path,
             batch_size=batch_size,
             categories=categories,
             max_samples=max_samples
-        ):
-            # 处理当前批次
-            batch_results, batch_errors = self._process_batch(batch_samples, extractor)
-            all_sample_results.extend(batch_results)
-            all_extraction_errors.extend(batch_errors)
-            
-            processed_samples += len(batch_samples)
-            total_samples += len(batch_samples)
+        )
+        
+        checkpoint = None
+        skipped_samples = 0
+        selected_ids = set()  # 本次max_samples/categories选中的样本，结果只基于它们重建
+        if run_dir:
+            from .checkpoint import RunCheckpoint
+            checkpoint = RunCheckpoint(run_dir, extractor.name, extractor.get_config(), self.metric_config)
+            print(f"   运行目录: {checkpoint.run_dir}（已完成 {checkpoint.completed_count} 样本）")
             
-            print(f"   已处理: {processed_samples} 样本")
+            def skip_completed(batches):
+                nonlocal skipped_samples
+                for batch_samples in batches:
+                    selected_ids.update(s.id for s in batch_samples)
+                    pending = [s for s in batch_samples if not checkpoint.is_done(s.id)]
+                    skipped_samples += len(batch_samples) - len(pending)
+                    if pending:
+                        yield pending
             
-            # 如果有输出文件，可以立即写入避免内存累积
-            if output_file and len(all_sample_results) > 1000:
-                DataSaver.append_intermediate_results(all_sample_results, output_file)
-                all_sample_results = []  # 清空已保存的结果
+            batches = skip_completed(batches)
+        if pipelined:
+            print(f"   流水线: 抽取线程 {extract_workers}, 打分线程 {score_workers}")
+            batch_stream = self._process_batches_pipelined(
+                batches, extractor, groundtruth_index, batch_size,
+                extract_workers, score_workers, queue_size or batch_size
+            )
+        else:
+            batch_stream = (
+                (batch_samples,) + self._process_batch(batch_samples, extractor, groundtruth_index,
+                                                       extract_workers, extract_mode)
+                for batch_samples in batches
+            )
+        
+        try:
+            for batch_samples, batch_results, batch_errors in batch_stream:
+                # 处理当前批次
+                content_types = {sample.id: sample.content_type for sample in batch_samples}
+                if checkpoint:
+                    checkpoint.append(batch_results, batch_errors, content_types)
+                else:
+                    self._accumulate_batch(aggregator, batch_results, batch_errors, content_types)
+                
+                # 如果有输出文件，立即写入避免内存累积
+                if output_file:
+                    DataSaver.append_intermediate_results(batch_results, output_file)
+                if keep_results:
+                    all_sample_results.extend(batch_results)
+                
+                processed_samples += len(batch_samples)
+                
+                print(f"   已处理: {processed_samples} 样本")
+        finally:
+            # 运行结束后关闭抽取器的进程池和隔离子进程，避免工作进程残留
+            extractor.close_workers()
         
         end_time = time.time()
         print(f"✅ 批处理评测完成")
         print(f"   总耗时: {end_time - start_time:.2f}秒")
         print(f"   处理样本: {processed_samples}")
         
+        if checkpoint:
+            # 基于检查点日志流式重建整个运行（包括之前已完成的样本）的结果
+            if skipped_samples:
+                print(f"   跳过已完成样本: {skipped_samples}")
+            all_sample_results = []
+            for record in checkpoint.iter_records(selected_ids):
+                result = record.get("result")
+                error = record.get("error")
+                self._accumulate_batch(aggregator, [result] if result is not None else [],
+                                       [error] if error is not None else [],
+                                       {record["sample_id"]: record.get("content_type")})
+                if keep_results and result is not None:
+                    all_sample_results.append(result)
+            processed_samples += skipped_samples
+        
         # 聚合结果
-        overall_metrics = self._aggregate_metrics(all_sample_results)
-        # 批处理模式下跳过分类指标（为了节约内存，不保存样本列表）
-        category_metrics = None
-        error_analysis = self._analyze_errors(all_extraction_errors, all_sample_results)
+        overall_metrics = aggregator.overall_metrics()
+        category_metrics = aggregator.category_metrics()
+        error_analysis = aggregator.error_analysis()
         
         evaluation_result = EvaluationResult(
             dataset_name=jsonl_file_path.stem,
@@ -272,50 +389,215 @@ class Evaluator:
             error_analysis=error_analysis,
             extractor_config=extractor.get_config(),
             metric_config=self.metric_config,
+            metric_statistics=aggregator.metric_statistics(self.bootstrap_resamples),
+            extractor_stats=extractor.get_run_stats() or None,
         )
         
         return evaluation_result
     
-    def _process_batch(self, batch_samples: List[DataSample], extractor: BaseExtractor) -> tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+    def _metric_statistics(self, sample_results: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+        """metric_statistics of in-memory results, computed like evaluate_batched's streaming aggregation"""
+        aggregator = StreamingAggregator(keep_scores=self.bootstrap_resamples > 0)
+        for sample_result in sample_results:
+            aggregator.add_result(sample_result)
+        return aggregator.metric_statistics(self.bootstrap_resamples)
+    
+    def _accumulate_batch(self, aggregator: StreamingAggregator, batch_results: List[Dict[str, Any]],
+                          batch_errors: List[Dict[str, Any]],
+                          content_types: Dict[str, Optional[str]]) -> None:
+        """将一批结果加入流式累加器"""
+        for sample_result in batch_results:
+            aggregator.add_result(sample_result, content_types.get(sample_result['sample_id']))
+        for error in batch_errors:
+            aggregator.add_error(error)
+    
+    def _process_batches_pipelined(self, batches: Iterator[List[DataSample]], extractor: BaseExtractor,
+                                   groundtruth_index: Optional[GroundtruthSplitIndex], batch_size: int,
+                                   extract_workers: int, score_workers: int,
+                                   queue_size: int) -> Iterator[tuple]:
+        """
+        以抽取/打分两级流水线处理样本流，按原批次大小重新分组产出。
+        
+        Yields:
+            (batch_samples, batch_results, batch_errors)，与_process_batch的返回格式一致
+        """
+        from .pipeline import run_pipeline
+        
+        def score(sample, extraction_result):
+            groundtruth_split = groundtruth_index.get(sample, self.metric_calculator.html_parser) if groundtruth_index else None
+            return self._score_sample(sample, extraction_result, groundtruth_split=groundtruth_split)
+        
+        samples = itertools.chain.from_iterable(batches)
+        batch_samples, batch_results, batch_errors = [], [], []
+        for sample, sample_result, error in run_pipeline(
+            samples, lambda sample: self._extract_sample(sample, extractor), score,
+            extract_workers=extract_workers, score_workers=score_workers, queue_size=queue_size
+        ):
+            batch_samples.append(sample)
+            self._record_batch_result(sample, sample_result, error, batch_results, batch_errors)
+            
+            if len(batch_samples) >= batch_size:
+                yield batch_samples, batch_results, batch_errors
+                batch_samples, batch_results, batch_errors = [], [], []
+        
+        if batch_samples:
+            yield batch_samples, batch_results, batch_errors
+    
+    def _process_batch(self, batch_samples: List[DataSample], extractor: BaseExtractor,
+                       groundtruth_index: Optional[GroundtruthSplitIndex] = None,
+                       extract_workers: int = 1,
+                       extract_mode: Optional[str] = None) -> tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
         """处理一批样本"""
         batch_results = []
         batch_errors = []
         
-        for sample in batch_samples:
+        extraction_results = self._extract_batch(batch_samples, extractor, extract_workers, extract_mode)
+        
+        for i, sample in enumerate(batch_samples):
             try:
-                sample_result = self._evaluate_sample(sample, extractor)
-                batch_results.append(sample_result)
-                
-                # 收集错误信息
-                if not sample_result.get('extraction_success', False):
-                    batch_errors.append({
-                        'sample_id': sample.id,
-                        'error': sample_result.get('extraction_error', 'Unknown error'),
-                        'url': sample.url,
-                    })
-                    
+                groundtruth_split = groundtruth_index.get(sample, self.metric_calculator.html_parser) if groundtruth_index else None
+                if extraction_results is None:
+                    sample_result = self._evaluate_sample(sample, extractor, groundtruth_split=groundtruth_split)
+                else:
+                    sample_result = self._score_sample(sample, extraction_results[i], groundtruth_split=groundtruth_split)
+                self._record_batch_result(sample, sample_result, None, batch_results, batch_errors)
             except Exception as e:
-                print(f"⚠️  样本 {sample.id} 评测失败: {e}")
-                batch_errors.append({
-                    'sample_id': sample.id,
-                    'error': str(e),
-                    'url': sample.url,
-                })
+                self._record_batch_result(sample, None, e, batch_results, batch_errors)
         
         return batch_results, batch_errors
     
+    def _extract_batch(self, batch_samples: List[DataSample], extractor: BaseExtractor,
+                       workers: int = 1, mode: Optional[str] = None) -> Optional[List[ExtractionResult]]:
+        """
+        通过batch_extract一次提交整批样本（如LLM批量推理、并发HTTP请求、线程/进程并发抽取）。
+        
+        Args:
+            workers: batch_extract的并发数
+            mode: batch_extract的并发方式（None表示由抽取器决定）
+        
+        Returns:
+            与batch_samples一一对应的抽取结果；抽取器不支持批量或批量抽取失败时返回None，
+            由调用方逐个样本抽取
+        """
+        if extractor.__class__.__name__ == 'TestModelExtractor':
+            # 直接读取样本字段，不经过HTML抽取
+            return None
+        if extractor.__class__.__name__ == 'LlmWebkitExtractor':
+            # LlmWebkitExtractor可以接受DataSample对象来支持预处理HTML
+            inputs = list(batch_samples)
+        else:
+            inputs = [sample.html for sample in batch_samples]
+        # 只在需要并发时传入并发参数，兼容只接收(html_list, url_list)的自定义batch_extract
+        options = {"workers": workers, "mode": mode} if (workers and workers > 1) or mode else {}
+        try:
+            extraction_results = extractor.batch_extract(inputs, [sample.url for sample in batch_samples], **options)
+        except Exception as e:
+            print(f"⚠️  批量抽取失败，改为逐个抽取: {e}")
+            return None
+        if len(extraction_results) != len(batch_samples):
+            print(f"⚠️  批量抽取结果数量不匹配，改为逐个抽取")
+            return None
+        return extraction_results
+    
 
-    def _evaluate_sample(self, sample: DataSample, extractor: BaseExtractor) -> Dict[str, Any]:
+    def _record_batch_result(self, sample: DataSample, sample_result: Optional[Dict[str, Any]],
+                             error: Optional[Exception], batch_results: List[Dict[str, Any]],
+                             batch_errors: List[Dict[str, str]]) -> None:
+        """记录批处理中单个样本的结果；评测异常的样本只记录错误信息"""
+        if error is not None:
+            print(f"⚠️  样本 {sample.id} 评测失败: {error}")
+            batch_errors.append({
+                'sample_id': sample.id,
+                'error': str(error),
+                'url': sample.url,
+            })
+            return
+        
+        batch_results.append(sample_result)
+        
+        # 收集错误信息
+        if not sample_result.get('extraction_success', False):
+            batch_errors.append({
+                'sample_id': sample.id,
+                'error': sample_result.get('extraction_error', 'Unknown error'),
+                'url': sample.url,
+            })
+    
+    def _evaluate_parallel(self, samples: List[DataSample], extractor: BaseExtractor,
+                           groundtruth_index: GroundtruthSplitIndex, workers: int,
+                           chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        在进程池中评测样本，结果按样本顺序返回。
+        
+        每个工作进程只构建一次抽取器和MetricCalculator，按块接收样本；
+        已缓存的groundtruth分割随样本一起发送，未缓存的由工作进程自行计算。
+        """
+        from .parallel import extractor_spec, init_worker, evaluate_chunk
+        
+        if not samples:
+            return []
+        if not chunk_size:
+            # 每个进程约分到4块，兼顾负载均衡与进程间通信开销
+            chunk_size = max(1, math.ceil(len(samples) / (workers * 4)))
+        
+        pairs = [(sample, groundtruth_index.get(sample, self.metric_calculator.html_parser)) for sample in samples]
+        chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+        
+        sample_results = []
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(extractor_spec(extractor), self.metric_config, self.extraction_cache),
+        ) as executor:
+            # executor.map按提交顺序产出结果，保证与samples一一对应
+            for chunk_results in executor.map(evaluate_chunk, chunks):
+                sample_results.extend(chunk_results)
+                print(f"Progress: {len(sample_results)}/{len(samples)}")
+        
+        return sample_results
+    
+    def _evaluate_sample_safe(self, sample: DataSample, extractor: BaseExtractor,
+                              groundtruth_split: Optional[Dict[str, str]] = None,
+                              extraction_result: Optional[ExtractionResult] = None) -> Dict[str, Any]:
+        """
+        Evaluate a single sample, turning unexpected exceptions into an error result.
+        
+        An extraction_result from batch_extract is scored directly; otherwise the
+        sample is extracted first.
+        """
+        try:
+            if extraction_result is not None:
+                return self._score_sample(sample, extraction_result, groundtruth_split=groundtruth_split)
+            return self._evaluate_sample(sample, extractor, groundtruth_split=groundtruth_split)
+        except Exception as e:
+            print(f"Error evaluating sample {sample.id}: {e}")
+            return {
+                'sample_id': sample.id,
+                'extraction_success': False,
+                'extraction_error': str(e),
+                'metrics': {},
+            }
+    
+    def _evaluate_sample(self, sample: DataSample, extractor: BaseExtractor,
+                         groundtruth_split: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Evaluate a single sample."""
+        extraction_result = self._extract_sample(sample, extractor)
+        return self._score_sample(sample, extraction_result, groundtruth_split=groundtruth_split)
+    
+    def _extract_sample(self, sample: DataSample, extractor: BaseExtractor) -> ExtractionResult:
+        """Run the extractor on a single sample."""
         if extractor.__class__.__name__ == 'TestModelExtractor':
-            extraction_result = extractor.extract_from_sample(sample)
+            return extractor.extract_from_sample(sample)
         elif extractor.__class__.__name__ == 'LlmWebkitExtractor':
             # LlmWebkitExtractor可以接受DataSample对象来支持预处理HTML
-            extraction_result = extractor.extract(sample, sample.url)
+            return extractor.extract(sample, sample.url)
         else:
             # Extract content
-            extraction_result = extractor.extract(sample.html, sample.url)
-        
+            return extractor.extract(sample.html, sample.url)
+    
+    def _score_sample(self, sample: DataSample, extraction_result: ExtractionResult,
+                      groundtruth_split: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Calculate metrics for an extraction result of a single sample."""
         # Prepare result
         sample_result = {
             'sample_id': sample.id,
@@ -336,9 +618,25 @@ class Evaluator:
             groundtruth_content=sample.groundtruth_content,
             predicted_content_list=extraction_result.content_list,
             groundtruth_content_list=sample.groundtruth_content_list,
+            groundtruth_split=groundtruth_split,
         )
         
-        # Convert metrics to dict
+        sample_result['metrics'] = self._metrics_to_dict(metrics)
+        
+        # Add sample metadata
+        sample_result['sample_metadata'] = {
+            'url': sample.url,
+            'domain': sample.domain,
+            'language': sample.language,
+            'content_type': sample.content_type,
+            'difficulty': sample.difficulty,
+        }
+        
+        return sample_result
+    
+    @staticmethod
+    def _metrics_to_dict(metrics: Dict[str, MetricResult]) -> Dict[str, Dict[str, Any]]:
+        """Convert MetricResults to the 'metrics' entry of a sample result."""
         metrics_dict = {}
         for metric_name, metric_result in metrics.items():
             metrics_dict[metric_name] = {
@@ -348,110 +646,209 @@ class Evaluator:
             }
             if not metric_result.success:
                 metrics_dict[metric_name]['error'] = metric_result.error_message
+        return metrics_dict
+    
+    def rescore(self,
+                results_path: Union[str, Path, EvaluationResult],
+                dataset: BenchmarkDataset,
+                metrics: List[str],
+                workers: int = 1,
+                chunk_size: Optional[int] = None) -> EvaluationResult:
+        """
+        重新计算已有评测结果中的部分指标，无需重新抽取。
         
-        sample_result['metrics'] = metrics_dict
+        读取每个样本保存的 extracted_content / extracted_content_list，只计算
+        选定的指标（使用本评测器的 metric_config），替换这些指标列并重新计算
+        样本 overall 与整体、分类统计；其余指标、抽取信息和错误分析保持不变。
         
-        # Add sample metadata
-        sample_result['sample_metadata'] = {
-            'url': sample.url,
-            'domain': sample.domain,
-            'language': sample.language,
-            'content_type': sample.content_type,
-            'difficulty': sample.difficulty,
-        }
+        Args:
+            results_path: EvaluationResult 的 JSON 文件（to_dict 格式）、样本结果
+                JSONL 文件（evaluate_batched 的 output_file 或运行目录的检查点日志），
+                或 EvaluationResult 实例
+            dataset: 评测所用的数据集（按 sample_id 取 groundtruth）
+            metrics: 需要重新计算的指标名
+            workers: 工作进程数（1 表示在当前进程内计算）
+            chunk_size: 每个任务发送给工作进程的样本数（默认自动）
+            
+        Returns:
+            合并后的新 EvaluationResult
+        """
+        unknown = [name for name in metrics if name not in self.metric_calculator.metrics]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {unknown}, available: {list(self.metric_calculator.metrics)}")
+        
+        previous = results_path if isinstance(results_path, EvaluationResult) else self._load_results(results_path)
+        samples_by_id = {sample.id: sample for sample in dataset.samples}
+        
+        if dataset.groundtruth_index is None:
+            dataset.groundtruth_index = GroundtruthSplitIndex()
+        groundtruth_index = dataset.groundtruth_index
+        html_parser = self.metric_calculator.html_parser
+        
+        # 只有抽取成功且保存了抽取内容、并能在数据集中找到的样本才能重新打分
+        tasks = []
+        missing_content = 0
+        for index, sample_result in enumerate(previous.sample_results):
+            if not sample_result.get('extraction_success', False):
+                continue
+            sample = samples_by_id.get(sample_result.get('sample_id'))
+            if sample is None or sample_result.get('extracted_content') is None:
+                missing_content += 1
+                continue
+            tasks.append((index, sample, sample_result.get('extracted_content'),
+                          sample_result.get('extracted_content_list'), groundtruth_index.get(sample, html_parser)))
+        if missing_content:
+            print(f"⚠️  {missing_content} 个样本缺少抽取内容或不在数据集中，保留原有指标")
+        
+        print(f"Rescoring {metrics} on {len(tasks)} samples...")
+        if workers and workers > 1 and tasks:
+            from .parallel import init_rescore_worker, rescore_chunk
+            if not chunk_size:
+                chunk_size = max(1, math.ceil(len(tasks) / (workers * 4)))
+            chunks = [[task[1:] for task in tasks[i:i + chunk_size]] for i in range(0, len(tasks), chunk_size)]
+            new_metrics = []
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=init_rescore_worker,
+                initargs=(self.metric_config, list(metrics)),
+            ) as executor:
+                for chunk_metrics in executor.map(rescore_chunk, chunks):
+                    new_metrics.extend(chunk_metrics)
+        else:
+            new_metrics = [self._rescore_sample(*task[1:], metrics) for task in tasks]
+        
+        # 只替换选定的指标列，其余字段保持不变
+        sample_results = list(previous.sample_results)
+        for (index, *_), metrics_dict in zip(tasks, new_metrics):
+            sample_result = dict(sample_results[index])
+            merged = dict(sample_result.get('metrics') or {})
+            merged.update(metrics_dict)
+            # 样本 overall 按合并后的指标重新计算
+            stored = {
+                name: MetricResult(metric_name=name, score=data.get('score', 0.0), details=data.get('details'),
+                                   success=data.get('success', False), error_message=data.get('error'))
+                for name, data in merged.items()
+            }
+            merged.update(self._metrics_to_dict({'overall': MetricCalculator.overall_result(stored)}))
+            sample_result['metrics'] = merged
+            sample_results[index] = sample_result
+        
+        categories = []
+        for sample_result in sample_results:
+            sample = samples_by_id.get(sample_result.get('sample_id'))
+            if sample is not None:
+                categories.append(sample.content_type)
+            else:
+                categories.append((sample_result.get('sample_metadata') or {}).get('content_type'))
+        matrix = ScoreMatrix.from_results(sample_results, categories=categories)
+        
+        error_analysis = previous.error_analysis
+        if error_analysis is None:
+            # 样本结果 JSONL 中没有错误分析，按失败样本重新统计
+            extraction_errors = [
+                {'sample_id': r['sample_id'], 'error': r.get('extraction_error', 'Unknown error')}
+                for r in sample_results if not r.get('extraction_success', True)
+            ]
+            error_analysis = self._analyze_errors(extraction_errors, sample_results)
         
-        return sample_result
+        metric_config = dict(previous.metric_config or {})
+        for name in metrics:
+            if name in self.metric_config:
+                metric_config[name] = self.metric_config[name]
+        
+        return EvaluationResult(
+            dataset_name=previous.dataset_name or dataset.name,
+            extractor_name=previous.extractor_name,
+            timestamp=datetime.now().isoformat(),
+            total_samples=previous.total_samples or len(sample_results),
+            overall_metrics=matrix.overall_metrics(),
+            sample_results=sample_results,
+            category_metrics=matrix.category_metrics(min_samples=3),
+            error_analysis=error_analysis,
+            extractor_config=previous.extractor_config,
+            metric_config=metric_config,
+            metric_statistics=self._metric_statistics(sample_results),
+            extractor_stats=previous.extractor_stats,
+        )
+    
+    def _rescore_sample(self, sample: DataSample, extracted_content: str,
+                        extracted_content_list: Optional[List[Dict[str, Any]]],
+                        groundtruth_split: Optional[Dict[str, str]],
+                        metrics: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Calculate the selected metrics of one stored extraction."""
+        try:
+            results = self.metric_calculator.calculate_all(
+                predicted_content=extracted_content,
+                groundtruth_content=sample.groundtruth_content,
+                predicted_content_list=extracted_content_list,
+                groundtruth_content_list=sample.groundtruth_content_list,
+                metric_names=metrics,
+                groundtruth_split=groundtruth_split,
+            )
+        except Exception as e:
+            print(f"Error rescoring sample {sample.id}: {e}")
+            results = {name: MetricResult.create_error_result(name, str(e)) for name in metrics}
+        return self._metrics_to_dict(results)
+    
+    @staticmethod
+    def _load_results(results_path: Union[str, Path]) -> EvaluationResult:
+        """
+        读取保存的评测结果。
+        
+        JSON 文件按 EvaluationResult.to_dict 格式读取；JSONL 文件每行是一个样本结果，
+        或检查点日志记录（结果在 "result" 字段中，同一样本以最后一条为准）。
+        """
+        import json
+        
+        results_path = Path(results_path)
+        if results_path.suffix.lower() == '.json':
+            with open(results_path, 'r', encoding='utf-8') as f:
+                return EvaluationResult.from_dict(json.load(f))
+        
+        sample_results: Dict[str, Dict[str, Any]] = {}
+        extractor_name = ""
+        with open(results_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 中断写入留下的半行
+                if 'result' in row and 'sample_id' in row and 'metrics' not in row:
+                    extractor_name = row.get('extractor') or extractor_name
+                    row = row['result']
+                    if row is None:
+                        continue
+                sample_results.pop(row['sample_id'], None)
+                sample_results[row['sample_id']] = row
+        
+        return EvaluationResult(
+            dataset_name="",
+            extractor_name=extractor_name,
+            timestamp="",
+            total_samples=len(sample_results),
+            overall_metrics={},
+            sample_results=list(sample_results.values()),
+        )
     
     def _aggregate_metrics(self, sample_results: List[Dict[str, Any]]) -> Dict[str, float]:
-        """Aggregate metrics across all samples."""
-        # # Collect metric results by metric name
-        # metric_groups = {}
-        #
-        # for sample_result in sample_results:
-        #     if not sample_result.get('extraction_success', True):
-        #         continue
-        #
-        #     metrics = sample_result.get('metrics', {})
-        #     for metric_name, metric_data in metrics.items():
-        #         if metric_data.get('success', False):
-        #             if metric_name not in metric_groups:
-        #                 metric_groups[metric_name] = []
-        #             metric_groups[metric_name].append(metric_data['score'])
-        #
-        # # Calculate aggregated scores
-        # aggregated_metrics = {}
-        # for metric_name, scores in metric_groups.items():
-        #     if scores:
-        #         aggregated_metrics[metric_name] = sum(scores) / len(scores)
-        #     else:
-        #         aggregated_metrics[metric_name] = 0.0
-        #
-        # # overall score is already calculated by MetricCalculator
-        # # No need to override it here
-        #
-        # return aggregated_metrics
         """
-            聚合所有样本的指标，计算全局平均值（每个指标单独聚合）
-            """
-        if not sample_results:
-            return {}
-
-        # 初始化每个指标的总分和样本数
-        metric_totals = {
-            "text_edit": 0.0,
-            "code_edit": 0.0,
-            "table_edit": 0.0,
-            "table_TEDS": 0.0,
-            "formula_edit": 0.0,
-            "overall": 0.0  # 全局overall单独计算
-        }
-        metric_counts = {k: 0 for k in metric_totals.keys()}  # 记录每个指标有效样本数
-
-        # 累加所有样本的指标分数
-        for sample in sample_results:
-            metrics = sample.get("metrics", {})
-            for metric_name in metric_totals.keys():
-                if metric_name in metrics and metrics[metric_name].get("success", False):
-                    metric_totals[metric_name] += metrics[metric_name]["score"]
-                    metric_counts[metric_name] += 1
-
-        # 计算每个指标的平均值（全局overall为5个单项指标的平均值）
-        overall_metrics = {}
-        for metric_name in metric_totals.keys():
-            if metric_counts[metric_name] > 0:
-                overall_metrics[metric_name] = metric_totals[metric_name] / metric_counts[metric_name]
-            else:
-                overall_metrics[metric_name] = 0.0  # 无有效样本时默认为0
-
-        # 特别处理全局overall：固定为5个单项指标的平均值（无论单项是否有有效样本）
-        # 排除样本级overall，仅用5个核心指标计算全局overall
-        core_metrics = ["text_edit", "code_edit", "table_edit", "table_TEDS", "formula_edit"]
-        core_scores = [overall_metrics[metric] for metric in core_metrics]
-        overall_metrics["overall"] = sum(core_scores) / len(core_metrics)
-
-        return overall_metrics
+        聚合所有样本的指标，计算全局平均值（每个指标单独聚合）。
+        全局overall固定为5个单项指标的平均值（无论单项是否有有效样本）。
+        """
+        return ScoreMatrix.from_results(sample_results).overall_metrics()
     
     def _calculate_category_metrics(self, sample_results: List[Dict[str, Any]], 
                                   samples: List[DataSample]) -> Optional[Dict[str, Dict[str, float]]]:
-        """Calculate metrics by category."""
-        # Group samples by content type
-        category_samples = {}
-        for i, sample in enumerate(samples):
-            if i >= len(sample_results):
-                break
-                
-            content_type = sample.content_type or 'unknown'
-            if content_type not in category_samples:
-                category_samples[content_type] = []
-            category_samples[content_type].append(sample_results[i])
-        
-        # Calculate metrics for each category
-        category_metrics = {}
-        for category, category_sample_results in category_samples.items():
-            if len(category_sample_results) >= 3:  # Only calculate if enough samples
-                category_metrics[category] = self._aggregate_metrics(category_sample_results)
-        
-        return category_metrics if category_metrics else None
+        """Calculate metrics by category (only categories with at least 3 samples)."""
+        # 结果与样本按下标一一对应
+        count = min(len(samples), len(sample_results))
+        matrix = ScoreMatrix.from_results(
+            sample_results[:count],
+            categories=[sample.content_type for sample in samples[:count]],
+        )
+        return matrix.category_metrics(min_samples=3)
     
     def _analyze_errors(self, extraction_errors: List[Dict[str, str]], 
                        sample_results: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -463,19 +860,7 @@ class Evaluator:
         # Count error types
         error_types = {}
         for error in extraction_errors:
-            error_msg = error['error']
-            # Simple error categorization
-            if 'timeout' in error_msg.lower():
-                error_type = 'timeout'
-            elif 'network' in error_msg.lower() or 'connection' in error_msg.lower():
-                error_type = 'network'
-            elif 'parse' in error_msg.lower() or 'parsing' in error_msg.lower():
-                error_type = 'parsing'
-            elif 'empty' in error_msg.lower():
-                error_type = 'empty_input'
-            else:
-                error_type = 'other'
-            
+            error_type = categorize_error(error['error'])
             error_types[error_type] = error_types.get(error_type, 0) + 1
         
         return {
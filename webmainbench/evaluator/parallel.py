@@ -0,0 +1,65 @@
+"""
+Process-pool helpers for parallel evaluation in WebMainBench.
+
+Each worker process builds its extractor and evaluator (and therefore its
+MetricCalculator) once in the pool initializer, then scores chunks of samples
+sent by the parent process.
+"""
+
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+from ..data import DataSample
+from ..extractors import BaseExtractor, ExtractorFactory, ExtractionCache
+from ..extractors.factory import extractor_spec
+
+
+# 每个工作进程内的抽取器与评测器，由 init_worker 初始化一次
+_worker_state: Dict[str, Any] = {}
+
+
+def init_worker(spec: Union[Tuple[str, Dict[str, Any]], BaseExtractor],
+                metric_config: Optional[Dict[str, Any]],
+                extraction_cache: Optional[ExtractionCache] = None) -> None:
+    """Pool initializer: build the extractor and evaluator of this worker."""
+    from .evaluator import Evaluator
+
+    if isinstance(spec, BaseExtractor):
+        extractor = spec
+    else:
+        name, config = spec
+        extractor = ExtractorFactory.create(name, config)
+
+    if extraction_cache is not None:
+        extractor.extraction_cache = extraction_cache
+
+    _worker_state['extractor'] = extractor
+    _worker_state['evaluator'] = Evaluator(metric_config, extraction_cache)
+
+
+def evaluate_chunk(chunk: List[Tuple[DataSample, Optional[Dict[str, str]]]]) -> List[Dict[str, Any]]:
+    """Evaluate a chunk of (sample, groundtruth_split) pairs in this worker."""
+    evaluator = _worker_state['evaluator']
+    extractor = _worker_state['extractor']
+    return [
+        evaluator._evaluate_sample_safe(sample, extractor, groundtruth_split=groundtruth_split)
+        for sample, groundtruth_split in chunk
+    ]
+
+
+def init_rescore_worker(metric_config: Optional[Dict[str, Any]], metrics: List[str]) -> None:
+    """Pool initializer for Evaluator.rescore: build the evaluator of this worker."""
+    from .evaluator import Evaluator
+
+    _worker_state['evaluator'] = Evaluator(metric_config)
+    _worker_state['metrics'] = metrics
+
+
+def rescore_chunk(chunk: List[Tuple[DataSample, str, Optional[List[Dict[str, Any]]], Optional[Dict[str, str]]]]
+                  ) -> List[Dict[str, Dict[str, Any]]]:
+    """Rescore a chunk of (sample, content, content_list, groundtruth_split) in this worker."""
+    evaluator = _worker_state['evaluator']
+    metrics = _worker_state['metrics']
+    return [
+        evaluator._rescore_sample(sample, content, content_list, groundtruth_split, metrics)
+        for sample, content, content_list, groundtruth_split in chunk
+    ]
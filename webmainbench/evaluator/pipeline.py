@@ -0,0 +1,139 @@
+"""
+Two-stage extract/score pipeline for WebMainBench.
+
+Extraction (network / GPU bound) and metric scoring (CPU bound) run in
+separate thread pools connected by bounded queues, so one stage works while
+the other waits and the total throughput approaches the slower stage instead
+of the sum of both.
+"""
+
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+import queue
+import threading
+
+
+# 队列结束标记
+_DONE = object()
+
+
+def run_pipeline(items: Iterable[Any],
+                 extract_fn: Callable[[Any], Any],
+                 score_fn: Callable[[Any, Any], Any],
+                 extract_workers: int = 1,
+                 score_workers: int = 1,
+                 queue_size: int = 32) -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+    """
+    Run extract_fn and score_fn over items in a pipelined fashion.
+
+    Args:
+        items: Input items (may be a lazy iterator, consumed incrementally)
+        extract_fn: Stage 1, called as extract_fn(item)
+        score_fn: Stage 2, called as score_fn(item, extracted)
+        extract_workers: Number of extraction threads
+        score_workers: Number of scoring threads
+        queue_size: Capacity of each inter-stage queue; at most
+            queue_size * 2 + workers items are in flight at any time
+
+    Yields:
+        (item, result, error) in input order; error is the exception raised
+        by either stage for that item (result is then None)
+    """
+    extract_workers = max(1, extract_workers)
+    score_workers = max(1, score_workers)
+    queue_size = max(1, queue_size)
+
+    extract_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    score_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    output_queue: "queue.Queue" = queue.Queue()
+
+    # 限制在途样本总数（含等待重排序的结果），提供端到端的背压
+    in_flight = threading.BoundedSemaphore(queue_size * 2 + extract_workers + score_workers)
+    stop = threading.Event()
+    feeder_error = []
+    extractors_left = [extract_workers]
+    extractors_lock = threading.Lock()
+
+    def feed():
+        try:
+            iterator = iter(items)
+            index = 0
+            while True:
+                # 先占用在途名额再读取下一个样本，避免提前读入数据
+                while not in_flight.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                extract_queue.put((index, item))
+                index += 1
+        except Exception as e:
+            feeder_error.append(e)
+        finally:
+            for _ in range(extract_workers):
+                extract_queue.put(_DONE)
+
+    def extract_worker():
+        while True:
+            task = extract_queue.get()
+            if task is _DONE:
+                break
+            index, item = task
+            try:
+                score_queue.put((index, item, extract_fn(item), None))
+            except Exception as e:
+                score_queue.put((index, item, None, e))
+
+        # 最后一个抽取线程退出时通知所有打分线程
+        with extractors_lock:
+            extractors_left[0] -= 1
+            last = extractors_left[0] == 0
+        if last:
+            for _ in range(score_workers):
+                score_queue.put(_DONE)
+
+    def score_worker():
+        while True:
+            task = score_queue.get()
+            if task is _DONE:
+                break
+            index, item, extracted, error = task
+            if error is None:
+                try:
+                    output_queue.put((index, item, score_fn(item, extracted), None))
+                    continue
+                except Exception as e:
+                    error = e
+            output_queue.put((index, item, None, error))
+        output_queue.put(_DONE)
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    threads += [threading.Thread(target=extract_worker, daemon=True) for _ in range(extract_workers)]
+    threads += [threading.Thread(target=score_worker, daemon=True) for _ in range(score_workers)]
+    for thread in threads:
+        thread.start()
+
+    # 按输入顺序重排输出
+    pending = {}
+    next_index = 0
+    scorers_left = score_workers
+    try:
+        while scorers_left:
+            entry = output_queue.get()
+            if entry is _DONE:
+                scorers_left -= 1
+                continue
+            pending[entry[0]] = entry[1:]
+            while next_index in pending:
+                item, result, error = pending.pop(next_index)
+                next_index += 1
+                in_flight.release()
+                yield item, result, error
+    finally:
+        stop.set()
+
+    if feeder_error:
+        raise feeder_error[0]
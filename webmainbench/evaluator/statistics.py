@@ -0,0 +1,296 @@
+"""
+Columnar score statistics for WebMainBench.
+
+Per-sample metric scores are collected into a NumPy matrix (samples x metrics)
+with a success mask, so means, standard deviations, percentiles, per-category
+breakdowns and bootstrap confidence intervals are vectorized operations.
+"""
+
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from .aggregator import AGGREGATED_METRICS, CORE_METRICS
+
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# 自助法每块最多生成的抽样下标数，控制内存占用
+_BOOTSTRAP_BLOCK = 4_000_000
+
+
+class ScoreMatrix:
+    """Scores of many samples for a fixed list of metrics."""
+
+    def __init__(self, scores: np.ndarray, mask: np.ndarray,
+                 metric_names: Sequence[str] = AGGREGATED_METRICS,
+                 sample_ids: Optional[Sequence[str]] = None,
+                 categories: Optional[Sequence[str]] = None):
+        """
+        Args:
+            scores: float array of shape (n_samples, n_metrics); ignored where mask is False
+            mask: bool array of the same shape, True where the metric succeeded
+            metric_names: Column names
+            sample_ids: Optional row ids (used to pair samples between runs)
+            categories: Optional row categories
+        """
+        self.metric_names = list(metric_names)
+        self.mask = np.asarray(mask, dtype=bool)
+        # 失败位置置0，求和时无需再做掩码
+        self.scores = np.where(self.mask, np.asarray(scores, dtype=np.float64), 0.0)
+        self.sample_ids = list(sample_ids) if sample_ids is not None else None
+        self.categories = np.asarray(categories, dtype=object) if categories is not None else None
+
+    @classmethod
+    def from_results(cls, sample_results: List[Dict[str, Any]],
+                     categories: Optional[Sequence[Optional[str]]] = None,
+                     metric_names: Sequence[str] = AGGREGATED_METRICS) -> "ScoreMatrix":
+        """
+        Build the matrix from Evaluator sample results.
+
+        Args:
+            sample_results: Sample result dicts with a 'metrics' entry
+            categories: Optional category of every result (None becomes 'unknown')
+            metric_names: Metrics to collect
+        """
+        n, m = len(sample_results), len(metric_names)
+        scores = np.zeros((n, m), dtype=np.float64)
+        mask = np.zeros((n, m), dtype=bool)
+        for i, sample_result in enumerate(sample_results):
+            metrics = sample_result.get("metrics") or {}
+            for j, metric_name in enumerate(metric_names):
+                metric_data = metrics.get(metric_name)
+                if metric_data and metric_data.get("success", False):
+                    scores[i, j] = metric_data["score"]
+                    mask[i, j] = True
+
+        if categories is not None:
+            categories = [category or 'unknown' for category in categories]
+        sample_ids = [sample_result.get("sample_id") for sample_result in sample_results]
+        return cls(scores, mask, metric_names, sample_ids, categories)
+
+    def __len__(self) -> int:
+        return self.scores.shape[0]
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Number of successful samples per metric."""
+        return self.mask.sum(axis=0)
+
+    def means(self) -> np.ndarray:
+        """Mean per metric over successful samples (0.0 when there are none)."""
+        counts = self.counts
+        return np.divide(self.scores.sum(axis=0), counts,
+                         out=np.zeros(len(self.metric_names)), where=counts > 0)
+
+    def _with_overall(self, means: np.ndarray) -> np.ndarray:
+        """Replace the 'overall' column by the mean of the core metric means (last axis)."""
+        if "overall" not in self.metric_names:
+            return means
+        core = [self.metric_names.index(name) for name in CORE_METRICS if name in self.metric_names]
+        means = means.copy()
+        means[..., self.metric_names.index("overall")] = means[..., core].mean(axis=-1)
+        return means
+
+    def overall_metrics(self) -> Dict[str, float]:
+        """Aggregated metrics in the format of Evaluator._aggregate_metrics."""
+        if not len(self):
+            return {}
+        return dict(zip(self.metric_names, self._with_overall(self.means()).tolist()))
+
+    def std(self, ddof: int = 0) -> np.ndarray:
+        """Standard deviation per metric over successful samples."""
+        counts = self.counts
+        means = self.means()
+        squared = np.where(self.mask, (self.scores - means) ** 2, 0.0).sum(axis=0)
+        return np.sqrt(np.divide(squared, counts - ddof, out=np.zeros(len(self.metric_names)),
+                                 where=counts - ddof > 0))
+
+    def percentiles(self, q: Sequence[float] = DEFAULT_PERCENTILES) -> np.ndarray:
+        """Percentiles per metric over successful samples, shape (len(q), n_metrics)."""
+        masked = np.where(self.mask, self.scores, np.nan)
+        result = np.zeros((len(q), len(self.metric_names)))
+        has_values = self.counts > 0
+        if has_values.any():
+            result[:, has_values] = np.nanpercentile(masked[:, has_values], q, axis=0)
+        return result
+
+    def category_metrics(self, min_samples: int = 3) -> Optional[Dict[str, Dict[str, float]]]:
+        """
+        Aggregated metrics per category, in the format of Evaluator._calculate_category_metrics.
+
+        Args:
+            min_samples: Categories with fewer samples are skipped
+        """
+        if self.categories is None or not len(self):
+            return None
+
+        names, inverse, sizes = np.unique(self.categories.astype(str), return_inverse=True, return_counts=True)
+        n_categories = len(names)
+        # 按类别分组求和，每个指标一次bincount
+        sums = np.column_stack([
+            np.bincount(inverse, weights=self.scores[:, j], minlength=n_categories)
+            for j in range(len(self.metric_names))
+        ])
+        counts = np.column_stack([
+            np.bincount(inverse, weights=self.mask[:, j], minlength=n_categories)
+            for j in range(len(self.metric_names))
+        ])
+        means = self._with_overall(np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0))
+
+        category_metrics = {}
+        for index in np.argsort(self._first_occurrence(inverse, n_categories)):
+            if sizes[index] >= min_samples:
+                category_metrics[str(names[index])] = dict(zip(self.metric_names, means[index].tolist()))
+        return category_metrics if category_metrics else None
+
+    @staticmethod
+    def _first_occurrence(inverse: np.ndarray, n_groups: int) -> np.ndarray:
+        # 保持类别首次出现的顺序，与逐样本分组的结果一致
+        first = np.full(n_groups, len(inverse))
+        np.minimum.at(first, inverse, np.arange(len(inverse)))
+        return first
+
+    def _bootstrap_means(self, n_resamples: int, rng: np.random.Generator) -> np.ndarray:
+        """Per-column means of n_resamples bootstrap resamples, shape (n_resamples, n_metrics)."""
+        n = len(self)
+        block = max(1, _BOOTSTRAP_BLOCK // max(n, 1))
+        mask = self.mask.astype(np.float64)
+        resampled = np.empty((n_resamples, len(self.metric_names)))
+
+        for start in range(0, n_resamples, block):
+            rows = min(block, n_resamples - start)
+            # 每次重抽样中各样本被抽中的次数；用矩阵乘法一次得到所有重抽样的和
+            draws = rng.integers(0, n, size=(rows, n), dtype=np.int32)
+            draws += (np.arange(rows, dtype=np.int32) * n)[:, None]
+            weights = np.bincount(draws.ravel(), minlength=rows * n).reshape(rows, n).astype(np.float64)
+            sums = weights @ self.scores
+            counts = weights @ mask
+            resampled[start:start + rows] = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+        return resampled
+
+    def _intervals(self, resampled: np.ndarray, confidence: float) -> Dict[str, Dict[str, float]]:
+        alpha = (1.0 - confidence) / 2.0
+        low, high = np.quantile(resampled, [alpha, 1.0 - alpha], axis=0)
+        return {
+            name: {"ci_low": float(low[j]), "ci_high": float(high[j])}
+            for j, name in enumerate(self.metric_names)
+        }
+
+    def bootstrap_ci(self, n_resamples: int = 1000, confidence: float = 0.95,
+                     seed: Optional[int] = 0) -> Dict[str, Dict[str, float]]:
+        """
+        Percentile bootstrap confidence intervals of the values of overall_metrics().
+
+        Returns:
+            {metric: {"ci_low": ..., "ci_high": ...}}
+        """
+        if not len(self) or n_resamples <= 0:
+            return {}
+        resampled = self._bootstrap_means(n_resamples, np.random.default_rng(seed))
+        return self._intervals(self._with_overall(resampled), confidence)
+
+    def distribution_statistics(self, n_resamples: int = 1000, confidence: float = 0.95,
+                                seed: Optional[int] = 0) -> Dict[str, Dict[str, float]]:
+        """
+        Percentiles and bootstrap CI of the mean of every column.
+
+        Unlike overall_metrics(), 'overall' is the per-sample overall column here,
+        like every other field of statistics().
+        """
+        if not len(self):
+            return {}
+        percentiles = self.percentiles()
+        intervals = {}
+        if n_resamples > 0:
+            intervals = self._intervals(self._bootstrap_means(n_resamples, np.random.default_rng(seed)),
+                                        confidence)
+
+        statistics = {}
+        for j, name in enumerate(self.metric_names):
+            entry = {f"p{q}": float(value) for q, value in zip(DEFAULT_PERCENTILES, percentiles[:, j])}
+            entry.update(intervals.get(name, {}))
+            statistics[name] = entry
+        return statistics
+
+    def statistics(self, n_resamples: int = 1000, confidence: float = 0.95,
+                   seed: Optional[int] = 0) -> Dict[str, Dict[str, float]]:
+        """count / mean / std / min / max / percentiles / bootstrap CI of every column."""
+        if not len(self):
+            return {}
+        counts = self.counts
+        means = self.means()
+        std = self.std()
+        has_values = counts > 0
+        mins = np.where(has_values, np.where(self.mask, self.scores, np.inf).min(axis=0), 0.0)
+        maxs = np.where(has_values, np.where(self.mask, self.scores, -np.inf).max(axis=0), 0.0)
+        distribution = self.distribution_statistics(n_resamples, confidence, seed)
+
+        statistics = {}
+        for j, name in enumerate(self.metric_names):
+            entry = {
+                "count": int(counts[j]),
+                "mean": float(means[j]),
+                "std": float(std[j]),
+                "min": float(mins[j]),
+                "max": float(maxs[j]),
+            }
+            entry.update(distribution[name])
+            statistics[name] = entry
+        return statistics
+
+
+def paired_bootstrap_test(a: ScoreMatrix, b: ScoreMatrix, metric: str = "overall",
+                          n_resamples: int = 1000, confidence: float = 0.95,
+                          seed: Optional[int] = 0) -> Dict[str, float]:
+    """
+    Paired bootstrap comparison of two runs on the same samples.
+
+    Samples are aligned by sample_id, then both runs are resampled with the same
+    indices so the difference of their metric means accounts for per-sample
+    correlation.
+
+    Returns:
+        Dict with the observed difference (a - b), its confidence interval and a
+        two-sided p-value
+    """
+    if a.sample_ids is None or b.sample_ids is None:
+        raise ValueError("Both score matrices need sample ids to be paired")
+
+    positions = {sample_id: i for i, sample_id in enumerate(b.sample_ids)}
+    rows_a = [i for i, sample_id in enumerate(a.sample_ids) if sample_id in positions]
+    rows_b = [positions[a.sample_ids[i]] for i in rows_a]
+    if not rows_a:
+        raise ValueError("The two runs have no samples in common")
+
+    paired = ScoreMatrix(
+        np.hstack([a.scores[rows_a], b.scores[rows_b]]),
+        np.hstack([a.mask[rows_a], b.mask[rows_b]]),
+        [f"a:{name}" for name in a.metric_names] + [f"b:{name}" for name in b.metric_names],
+    )
+    width_a = len(a.metric_names)
+    column_a = a.metric_names.index(metric)
+    column_b = b.metric_names.index(metric)
+
+    def difference(means: np.ndarray) -> np.ndarray:
+        # 两次运行各自计算overall后再取差
+        means_a = a._with_overall(means[..., :width_a])
+        means_b = b._with_overall(means[..., width_a:])
+        return means_a[..., column_a] - means_b[..., column_b]
+
+    observed_diff = float(difference(paired.means()))
+    diffs = difference(paired._bootstrap_means(n_resamples, np.random.default_rng(seed)))
+
+    alpha = (1.0 - confidence) / 2.0
+    low, high = np.quantile(diffs, [alpha, 1.0 - alpha])
+    # 双侧p值：差值分布跨过0的比例
+    p_value = min(1.0, 2.0 * min(np.mean(diffs <= 0), np.mean(diffs >= 0)))
+    return {
+        "metric": metric,
+        "num_paired_samples": len(rows_a),
+        "difference": observed_diff,
+        "ci_low": float(low),
+        "ci_high": float(high),
+        "p_value": float(p_value),
+    }
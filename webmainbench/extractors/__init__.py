@@ -6,6 +6,8 @@ This module provides interfaces and implementations for various web content extr
 
 from .base import BaseExtractor, ExtractionResult
 from .factory import ExtractorFactory
+from .cache import ExtractionCache
+from .pool import ExtractorWorkerPool
 from .llm_webkit_extractor import LlmWebkitExtractor
 from .jina_extractor import JinaExtractor
 from .test_model_extractor import TestModelExtractor
@@ -19,6 +21,8 @@ __all__ = [
     "BaseExtractor",
     "ExtractionResult",
     "ExtractorFactory",
+    "ExtractionCache",
+    "ExtractorWorkerPool",
     "LlmWebkitExtractor",
     "JinaExtractor",
     "TestModelExtractor",
@@ -3,8 +3,12 @@ Base extractor interface for WebMainBench.
 """
 
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Dict, List, Any, Optional, Union
+import math
+import multiprocessing
+import threading
 import time
 import traceback
 
@@ -74,16 +78,35 @@ class ExtractionResult:
 class BaseExtractor(ABC):
     """Base class for all content extractors."""
     
+    # 可选的抽取结果缓存（ExtractionCache），由调用方按需开启
+    extraction_cache = None
+    
+    # batch_extract并发时默认使用的方式：释放GIL的原生解析器用"thread"，
+    # 纯Python实现用"process"（绕开GIL，但需要在子进程中重建抽取器并序列化输入输出）
+    preferred_batch_mode = "thread"
+    BATCH_MODES = ("thread", "process")
+    
+    # 在隔离子进程中运行时为True（此时直接抽取，不再嵌套子进程）
+    in_isolated_worker = False
+    
     def __init__(self, name: str, config: Dict[str, Any] = None):
         """
         Initialize the extractor.
         
         Args:
             name: Name of the extractor
-            config: Configuration dictionary
+            config: Configuration dictionary. Optional keys handled here:
+                sample_timeout: wall-clock limit of one extraction in seconds
+                memory_limit_mb: memory cap of one extraction
+                Either runs extraction in a killable subprocess (see isolation.py).
+                recycle_after: replace a process-mode batch worker after this many
+                    pages (see pool.py)
         """
         self.name = name
         self.config = config or {}
+        # 单样本超时/内存上限的隔离子进程，空闲的放回列表供后续调用复用
+        self._isolation_lock = threading.Lock()
+        self._idle_isolated_workers = []
         self._setup()
     
     @abstractmethod
@@ -152,10 +175,18 @@ class BaseExtractor(ABC):
                     extraction_time=time.time() - start_time
                 )
             
+            cache_key, cached_result = self._cache_lookup(html, url)
+            if cached_result is not None:
+                return cached_result
+            
             # Perform extraction
-            result = self._extract_content(html, url)
+            if self._isolation_enabled():
+                result = self._extract_isolated(html, url)
+            else:
+                result = self._extract_content(html, url)
             result.extraction_time = time.time() - start_time
             
+            self._cache_store(cache_key, result)
             return result
             
         except Exception as e:
@@ -168,27 +199,159 @@ class BaseExtractor(ABC):
                 time.time() - start_time
             )
     
+    def _isolation_enabled(self) -> bool:
+        """Whether extraction runs in a killable subprocess (config sample_timeout / memory_limit_mb)."""
+        if self.in_isolated_worker:
+            return False
+        if not (self.config.get('sample_timeout') or self.config.get('memory_limit_mb')):
+            return False
+        if multiprocessing.current_process().daemon:
+            # 守护进程（如multiprocessing.Pool的工作进程）不能创建子进程
+            if not getattr(self, '_warned_daemon_isolation', False):
+                print("⚠️  守护进程中无法启动隔离子进程，sample_timeout/memory_limit_mb不生效")
+                self._warned_daemon_isolation = True
+            return False
+        return True
+    
+    def _extract_isolated(self, html: str, url: Optional[str]) -> ExtractionResult:
+        """
+        Extract in an isolated subprocess that is killed on timeout and respawned.
+        
+        Every concurrent caller gets its own worker process; idle workers are kept
+        for later calls.
+        """
+        from .factory import extractor_spec
+        from .isolation import IsolatedWorker
+        
+        with self._isolation_lock:
+            worker = self._idle_isolated_workers.pop() if self._idle_isolated_workers else None
+        if worker is None:
+            worker = IsolatedWorker(
+                extractor_spec(self),
+                timeout=self.config.get('sample_timeout'),
+                memory_limit_mb=self.config.get('memory_limit_mb'),
+            )
+        try:
+            return worker.extract(html, url)
+        finally:
+            with self._isolation_lock:
+                self._idle_isolated_workers.append(worker)
+    
+    def close_isolated_workers(self) -> None:
+        """Shut down the subprocesses started for sample_timeout / memory_limit_mb."""
+        with self._isolation_lock:
+            workers, self._idle_isolated_workers = self._idle_isolated_workers, []
+        for worker in workers:
+            worker.close()
+    
+    def _cache_lookup(self, html: str, url: Optional[str]) -> tuple:
+        """
+        Look up an extraction in the extraction cache.
+        
+        Returns:
+            (cache key or None when caching is off, cached ExtractionResult or None).
+            A cached result's extraction_time is the time of this lookup, not the
+            time of the original extraction.
+        """
+        if self.extraction_cache is None:
+            return None, None
+        start_time = time.time()
+        cache_key = self.extraction_cache.make_key(
+            html, url, self.name, getattr(self, 'version', None), self.config
+        )
+        cached_result = self.extraction_cache.get(cache_key)
+        if cached_result is not None:
+            cached_result.extraction_time = time.time() - start_time
+        return cache_key, cached_result
+    
+    def _cache_store(self, cache_key: Optional[str], result: ExtractionResult) -> None:
+        """Store a result under a key from _cache_lookup."""
+        # 只缓存成功的结果，失败可能是暂时性的（超时、网络错误等）
+        if cache_key is None or not result.success:
+            return
+        try:
+            self.extraction_cache.put(cache_key, self.name, result)
+        except OSError as e:
+            print(f"Warning: Failed to cache extraction result: {e}")
+    
     def batch_extract(self, html_list: List[str], 
-                     url_list: List[str] = None) -> List[ExtractionResult]:
+                     url_list: List[str] = None,
+                     workers: int = 1,
+                     mode: Optional[str] = None) -> List[ExtractionResult]:
         """
         Extract content from multiple HTML documents.
         
         Args:
             html_list: List of HTML content
             url_list: Optional list of URLs
+            workers: Number of concurrent workers (1 extracts serially)
+            mode: "thread" or "process" (default: preferred_batch_mode of the extractor)
             
         Returns:
-            List of ExtractionResult instances
+            List of ExtractionResult instances, in input order
         """
         if url_list is None:
             url_list = [None] * len(html_list)
+        mode = mode or self.preferred_batch_mode
+        if mode not in self.BATCH_MODES:
+            raise ValueError(f"Unknown batch mode '{mode}', expected one of {self.BATCH_MODES}")
         
-        results = []
-        for html, url in zip(html_list, url_list):
-            result = self.extract(html, url)
-            results.append(result)
+        if mode == "process" and self._isolation_enabled():
+            # 每个线程各自驱动一个可终止的抽取子进程，已经是多进程并发
+            mode = "thread"
         
-        return results
+        workers = min(workers or 1, len(html_list))
+        if workers <= 1:
+            return [self.extract(html, url) for html, url in zip(html_list, url_list)]
+        
+        if mode == "thread":
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(self.extract, html_list, url_list))
+        
+        # 进程池在多次调用间保留，工作进程中的抽取器只构建一次
+        pool = self.worker_pool(workers, self.config.get('recycle_after'))
+        # 每个进程约分到4块，兼顾负载均衡与进程间通信开销
+        chunksize = max(1, math.ceil(len(html_list) / (workers * 4)))
+        return pool.batch_extract(html_list, url_list, chunksize=chunksize)
+    
+    def worker_pool(self, workers: int, recycle_after: Optional[int] = None):
+        """
+        The persistent ExtractorWorkerPool of this extractor, created on first use.
+        
+        The pool is rebuilt when the number of workers or recycle_after changes;
+        call close_worker_pool() to shut it down.
+        """
+        pool = self.__dict__.get('_worker_pool')
+        if pool is not None and (pool.workers, pool.recycle_after) == (workers, recycle_after):
+            return pool
+        self.close_worker_pool()
+        from .pool import ExtractorWorkerPool
+        self._worker_pool = ExtractorWorkerPool(self, workers=workers, recycle_after=recycle_after)
+        return self._worker_pool
+    
+    def close_worker_pool(self) -> None:
+        """Shut down the worker pool created by process-mode batch_extract."""
+        pool = self.__dict__.pop('_worker_pool', None)
+        if pool is not None:
+            pool.close()
+    
+    def close_workers(self) -> None:
+        """Shut down all helper processes of this extractor; they are started again on next use."""
+        self.close_worker_pool()
+        self.close_isolated_workers()
+    
+    def __getstate__(self):
+        # 进程池、隔离子进程和锁不能跨进程传递
+        state = self.__dict__.copy()
+        state.pop('_worker_pool', None)
+        state.pop('_isolation_lock', None)
+        state.pop('_idle_isolated_workers', None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._isolation_lock = threading.Lock()
+        self._idle_isolated_workers = []
     
     def get_config(self) -> Dict[str, Any]:
         """Get extractor configuration."""
@@ -198,6 +361,10 @@ class BaseExtractor(ABC):
         """Update extractor configuration."""
         self.config.update(config)
     
+    def get_run_stats(self) -> Dict[str, Any]:
+        """Runtime statistics of this extractor instance (empty if not tracked)."""
+        return {}
+    
     def get_info(self) -> Dict[str, Any]:
         """Get extractor information."""
         return {
@@ -211,4 +378,5 @@ class BaseExtractor(ABC):
         return f"{self.__class__.__name__}(name='{self.name}')"
     
     def __repr__(self) -> str:
-        return self.__str__() 
\ No newline at end of file
+        return self.__str__() 
+
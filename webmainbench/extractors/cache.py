@@ -0,0 +1,286 @@
+"""
+Content-addressed on-disk cache of extraction results for WebMainBench.
+
+Entries are keyed by hash(html, url, extractor name, extractor version,
+extractor config), so changing metrics never requires re-extraction while any
+change to the extractor produces a new key. The cache is size bounded with
+least-recently-used eviction and can be invalidated per extractor.
+
+Stores and evictions are serialized by a thread lock and, where fcntl is
+available, by a lock file in the cache directory, and the total size is kept in
+a shared file, so threads and worker processes enforce one common size bound.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union
+
+from .base import ExtractionResult
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只在进程内加锁
+    fcntl = None
+
+
+class ExtractionCache:
+    """Size-bounded LRU cache of ExtractionResult objects on disk."""
+
+    # 缓存格式版本，格式变化时递增
+    FORMAT_VERSION = "1"
+    DEFAULT_MAX_SIZE = 1024 ** 3  # 1 GB
+    # 缓存目录下的跨进程锁文件与共享的总大小记录
+    LOCK_FILE = ".lock"
+    SIZE_FILE = ".size"
+
+    def __init__(self, cache_dir: Union[str, Path], max_size_bytes: int = DEFAULT_MAX_SIZE):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding cached results (one subdirectory per extractor)
+            max_size_bytes: Total size above which least recently used entries are evicted
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_bytes
+        # key -> (path, size, last_access)；首次使用时扫描目录建立
+        self._index: Optional[Dict[str, Tuple[Path, int, float]]] = None
+        self._total_size = 0
+        self._lock = threading.RLock()
+
+    def __getstate__(self):
+        # 在多进程间传递时只传配置，索引与锁在各进程中重新建立
+        state = self.__dict__.copy()
+        state['_index'] = None
+        state['_total_size'] = 0
+        state.pop('_lock', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the thread lock and, where fcntl exists, the cross-process lock file."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_dir / self.LOCK_FILE, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @classmethod
+    def make_key(cls, html: str, url: Optional[str], extractor_name: str,
+                 extractor_version: Optional[str], config: Optional[Dict[str, Any]]) -> str:
+        """Compute the content address of one extraction."""
+        payload = json.dumps(
+            [cls.FORMAT_VERSION, html or "", url or "", extractor_name,
+             extractor_version or "", config or {}],
+            ensure_ascii=False, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _extractor_dir_name(extractor_name: str) -> str:
+        return "".join(c if c.isalnum() or c in "-_." else "_" for c in extractor_name)
+
+    def _entry_path(self, key: str, extractor_name: str) -> Path:
+        return self.cache_dir / self._extractor_dir_name(extractor_name) / key[:2] / f"{key}.json"
+
+    def _ensure_index(self, rescan: bool = False) -> Dict[str, Tuple[Path, int, float]]:
+        if self._index is None or rescan:
+            self._index = {}
+            self._total_size = 0
+            if self.cache_dir.exists():
+                for path in self.cache_dir.glob("*/*/*.json"):
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    self._index[path.stem] = (path, stat.st_size, stat.st_mtime)
+                    self._total_size += stat.st_size
+        return self._index
+
+    def get(self, key: str) -> Optional[ExtractionResult]:
+        """Return the cached result for a key, or None on a miss."""
+        with self._lock:
+            index = self._ensure_index()
+            entry = index.get(key)
+            if entry is None:
+                return None
+
+            path, size, _ = entry
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                # 用修改时间记录最近访问，重启后仍可按LRU淘汰
+                os.utime(path)
+                index[key] = (path, size, path.stat().st_mtime)
+            except (OSError, json.JSONDecodeError):
+                # 可能已被其他进程淘汰
+                self._forget(key)
+                return None
+
+        return ExtractionResult.from_dict(data)
+
+    def put(self, key: str, extractor_name: str, result: ExtractionResult) -> None:
+        """Store a result and evict old entries if the cache grew too large."""
+        data = result.to_dict()
+        data["version"] = result.version
+        payload = json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+        path = self._entry_path(key, extractor_name)
+
+        with self._locked():
+            index = self._ensure_index()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                replaced_size = path.stat().st_size
+            except OSError:
+                replaced_size = 0
+            _atomic_write(path, payload)
+            index[key] = (path, len(payload), path.stat().st_mtime)
+
+            # 总大小以共享记录为准，其中包含其他进程写入的条目
+            shared_size = self._read_shared_size()
+            if shared_size is None:
+                self._ensure_index(rescan=True)
+            else:
+                self._total_size = shared_size + len(payload) - replaced_size
+            self._evict()
+            self._write_shared_size()
+
+    def _read_shared_size(self) -> Optional[int]:
+        try:
+            with open(self.cache_dir / self.SIZE_FILE, 'r') as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write_shared_size(self) -> None:
+        _atomic_write(self.cache_dir / self.SIZE_FILE, str(self._total_size).encode('ascii'))
+
+    def _forget(self, key: str) -> None:
+        entry = self._index.pop(key, None) if self._index is not None else None
+        if entry is not None:
+            self._total_size -= entry[1]
+            try:
+                entry[0].unlink()
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        if self._total_size <= self.max_size_bytes:
+            return
+        # 重新扫描目录，按所有进程写入的条目统一淘汰，同时校正共享的总大小
+        self._ensure_index(rescan=True)
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][2]):
+            if self._total_size <= self.max_size_bytes:
+                break
+            self._forget(key)
+
+    def invalidate(self, extractor_name: Optional[str] = None) -> None:
+        """
+        Drop cached results.
+
+        Args:
+            extractor_name: Only drop results of this extractor; None clears the whole cache
+        """
+        if not self.cache_dir.exists():
+            self._index = None
+            return
+        with self._locked():
+            if extractor_name is None:
+                # 保留锁文件，其他进程可能正持有它
+                targets = [path for path in self.cache_dir.iterdir() if path.is_dir()]
+            else:
+                targets = [self.cache_dir / self._extractor_dir_name(extractor_name)]
+            for target in targets:
+                if target.exists():
+                    shutil.rmtree(target)
+            try:
+                os.remove(self.cache_dir / self.SIZE_FILE)
+            except OSError:
+                pass
+            self._index = None
+
+    @property
+    def total_size(self) -> int:
+        """Total size of cached entries in bytes."""
+        with self._lock:
+            self._ensure_index(rescan=True)
+            return self._total_size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ensure_index(rescan=True))
+
+
+class SimplifiedHtmlCache:
+    """
+    On-disk cache of HTML simplification results, keyed by content hash.
+
+    Lets repeated benchmark runs of the LLM-WebKit extractor skip the HTML
+    simplification step. Keys include the simplifier version; the cache is not
+    size bounded and can be deleted at any time.
+    """
+
+    FORMAT_VERSION = "1"
+
+    def __init__(self, cache_dir: Union[str, Path], simplifier_version: str = ""):
+        """
+        Args:
+            cache_dir: Directory holding cached simplifications
+            simplifier_version: Version of the simplifier (part of the key)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.simplifier_version = simplifier_version
+
+    def make_key(self, html: str) -> str:
+        payload = json.dumps([self.FORMAT_VERSION, self.simplifier_version, html or ""], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, html: str) -> Optional[Tuple[str, str]]:
+        """Return (simplified_html, typical_raw_tag_html) for an HTML, or None on a miss."""
+        path = self._entry_path(self.make_key(html))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data["simplified_html"], data["typical_raw_tag_html"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            return None
+
+    def put(self, html: str, simplified_html: str, typical_raw_tag_html: str) -> None:
+        """Store the simplification of an HTML."""
+        path = self._entry_path(self.make_key(html))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps({"simplified_html": simplified_html, "typical_raw_tag_html": typical_raw_tag_html},
+                             ensure_ascii=False).encode('utf-8')
+        _atomic_write(path, payload)
+
+
+def _atomic_write(path: Path, payload: bytes) -> None:
+    # 先写临时文件再原子替换，避免并发读到半个文件
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
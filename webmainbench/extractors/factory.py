@@ -2,7 +2,7 @@
 Extractor factory for WebMainBench.
 """
 
-from typing import Dict, Any, Type, List
+from typing import Dict, Any, Type, List, Tuple, Union
 import inspect
 import importlib
 import pkgutil
@@ -27,6 +27,19 @@ def extractor(name: str):
     return decorator
 
 
+def extractor_spec(extractor: BaseExtractor) -> Union[Tuple[str, Dict[str, Any]], BaseExtractor]:
+    """
+    Describe how a worker process should rebuild an extractor.
+
+    Registered extractors are recreated from (name, config) inside each worker;
+    unregistered extractor instances are pickled as-is.
+    """
+    registered = ExtractorFactory._registry.get(extractor.name)
+    if registered is type(extractor):
+        return extractor.name, extractor.get_config()
+    return extractor
+
+
 class ExtractorFactory:
     """Factory for creating extractors."""
     
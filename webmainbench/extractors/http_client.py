@@ -0,0 +1,215 @@
+"""
+Pooled asyncio HTTP client for API based extractors.
+
+Requests go through one requests.Session whose connection pool keeps
+connections alive, so a batch pays the TCP/TLS handshake once per pooled
+connection instead of once per page. For batches the blocking sends run on a
+thread pool driven by an asyncio event loop, which limits the number of
+requests in flight, spaces them with a token-bucket rate limiter and retries
+429/5xx responses and connection errors with jittered exponential backoff.
+Single requests (fetch) take the same limits and retries without an event loop.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+@dataclass
+class FetchResult:
+    """Outcome of one URL of a batch."""
+
+    url: str
+    response: Optional[requests.Response] = None
+    error: Optional[Exception] = None
+    elapsed: float = 0.0  # 含重试等待的总耗时（秒）
+    attempts: int = 0
+
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by threads and coroutines."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity (default: one second worth of tokens, at least 1)
+        """
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, possibly ahead of time; returns the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 令牌可以预支为负数，调用方按欠额等待，先到先得
+            self._tokens -= 1.0
+            return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def acquire_blocking(self) -> None:
+        """Blocking version of acquire, for threads without an event loop."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class AsyncHttpClient:
+    """Concurrent GET client with keep-alive, rate limiting and retries."""
+
+    # 这些状态码视为暂时性错误并重试
+    RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, max_concurrency: int = 8,
+                 rate_limit: Optional[float] = None,
+                 burst: Optional[float] = None,
+                 max_retries: int = 3,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0,
+                 timeout: float = 30,
+                 headers: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            max_concurrency: Maximum number of requests in flight (and pooled connections)
+            rate_limit: Maximum requests per second including retries (None: unlimited)
+            burst: Token-bucket capacity (default: one second of rate_limit)
+            max_retries: Retries after the first attempt on 429/5xx or connection errors
+            backoff_base: First backoff step in seconds, doubled per retry
+            backoff_max: Upper bound of a single backoff step
+            timeout: Timeout of a single request in seconds
+            headers: Headers sent with every request
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_concurrency, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                            thread_name_prefix="http-client")
+        # 同步请求与批量请求共用同一个限流器
+        self._bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    def fetch(self, url: str) -> FetchResult:
+        """GET one URL from the calling thread, with the same limits and retries as fetch_all."""
+        result = FetchResult(url=url)
+        start = time.monotonic()
+
+        for attempt in range(self.max_retries + 1):
+            if self._bucket is not None:
+                self._bucket.acquire_blocking()
+            result.attempts = attempt + 1
+            with self._slots:
+                retry = self._attempt(result, url)
+            if not retry:
+                break
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, result.response))
+
+        result.elapsed = time.monotonic() - start
+        return result
+
+    def fetch_all(self, urls: List[str]) -> List[FetchResult]:
+        """GET all URLs concurrently; results are in input order."""
+        if not urls:
+            return []
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.afetch_all(urls))
+        # 调用方已在事件循环中（如 notebook），在独立线程中运行新的事件循环
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="http-client-loop") as runner:
+            return runner.submit(asyncio.run, self.afetch_all(urls)).result()
+
+    async def afetch_all(self, urls: List[str]) -> List[FetchResult]:
+        """Coroutine version of fetch_all, for callers that already run an event loop."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return list(await asyncio.gather(*(self._fetch(url, semaphore, self._bucket) for url in urls)))
+
+    async def _fetch(self, url: str, semaphore: asyncio.Semaphore,
+                     bucket: Optional[TokenBucket]) -> FetchResult:
+        loop = asyncio.get_running_loop()
+        result = FetchResult(url=url)
+        start = time.monotonic()
+
+        for attempt in range(self.max_retries + 1):
+            if bucket is not None:
+                await bucket.acquire()
+            result.attempts = attempt + 1
+            # 只在请求期间占用并发名额，退避等待时释放
+            async with semaphore:
+                retry = await loop.run_in_executor(self._executor, self._attempt, result, url)
+            if not retry:
+                break
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, result.response))
+
+        result.elapsed = time.monotonic() - start
+        return result
+
+    def _attempt(self, result: FetchResult, url: str) -> bool:
+        """Send one attempt and record it in result; returns whether it should be retried."""
+        try:
+            result.response, result.error = self._send(url), None
+        except (requests.ConnectionError, requests.Timeout) as e:
+            result.response, result.error = None, e
+            return True
+        except requests.RequestException as e:
+            result.response, result.error = None, e
+            return False
+        return result.response.status_code in self.RETRY_STATUS
+
+    def _send(self, url: str) -> requests.Response:
+        """One blocking request on a pooled connection."""
+        response = self.session.get(url, timeout=self.timeout)
+        # 读完响应体，连接才会归还连接池
+        response.content
+        return response
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Full-jitter exponential backoff, at least the server's Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("Retry-After", 0))
+            except ValueError:
+                retry_after = 0.0
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def close(self) -> None:
+        """Close pooled connections and worker threads."""
+        self.session.close()
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,192 @@
+"""
+Killable subprocess workers for per-sample timeouts and memory caps.
+
+An IsolatedWorker runs one extractor instance in a child process. The parent
+sends it one page at a time and waits at most `timeout` seconds for the
+result. A worker that hangs is killed, and one that crashes is reaped. In both
+cases a fresh worker is spawned on the next call, so a single pathological
+page costs one error result instead of stalling the run.
+
+The memory cap is an address-space limit (RLIMIT_AS) applied in the child
+after the extractor is built. An allocation beyond it raises MemoryError
+inside the extraction, which is reported as a failed sample.
+"""
+
+import multiprocessing
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+from .base import BaseExtractor, ExtractionResult
+
+
+def _address_space_bytes() -> Optional[int]:
+    """Current virtual memory size of this process (Linux only)."""
+    try:
+        import resource
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (ImportError, OSError, ValueError, IndexError):
+        return None
+
+
+def _limit_memory(memory_limit_mb: float) -> None:
+    """Let this process allocate at most memory_limit_mb beyond its current size."""
+    try:
+        import resource
+    except ImportError:
+        print("⚠️  当前平台不支持resource模块，memory_limit_mb不生效")
+        return
+    # 以构建抽取器之后的地址空间为基线，避免已加载的库占满上限
+    limit = int(memory_limit_mb * 1024 * 1024) + (_address_space_bytes() or 0)
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _isolated_worker_main(conn, spec: Union[Tuple[str, Dict[str, Any]], BaseExtractor],
+                          memory_limit_mb: Optional[float]) -> None:
+    """Child process loop: build the extractor once, then extract (html, url) tasks until None."""
+    from .factory import ExtractorFactory
+
+    try:
+        if isinstance(spec, BaseExtractor):
+            extractor = spec
+        else:
+            name, config = spec
+            extractor = ExtractorFactory.create(name, config)
+        # 子进程内直接抽取，不再嵌套隔离
+        extractor.in_isolated_worker = True
+        extractor.extraction_cache = None
+        if memory_limit_mb:
+            _limit_memory(memory_limit_mb)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        html, url = task
+        result = extractor.extract(html, url)
+        if not result.success and "MemoryError" in (result.error_traceback or ""):
+            result.error_message = f"Extraction exceeded memory limit ({memory_limit_mb} MB)"
+        try:
+            conn.send(result)
+        except MemoryError:
+            conn.send(ExtractionResult.create_error_result(
+                f"Extraction exceeded memory limit ({memory_limit_mb} MB)"
+            ))
+
+
+class IsolatedWorker:
+    """One extractor in a child process that is killed and respawned on timeout or crash."""
+
+    # 子进程构建抽取器（加载模型等）的等待上限（秒），不计入单样本超时
+    STARTUP_TIMEOUT = 300
+
+    def __init__(self, spec: Union[Tuple[str, Dict[str, Any]], BaseExtractor],
+                 timeout: Optional[float] = None,
+                 memory_limit_mb: Optional[float] = None,
+                 start_method: Optional[str] = None):
+        """
+        Args:
+            spec: (name, config) of a registered extractor, or an extractor instance
+                to pickle (see extractor_spec)
+            timeout: Wall-clock limit of one extraction in seconds (None: no limit)
+            memory_limit_mb: Memory the child may allocate beyond its size after
+                building the extractor (None: no limit)
+            start_method: multiprocessing start method (default: platform default)
+        """
+        self.spec = spec
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._context = multiprocessing.get_context(start_method)
+        self._process = None
+        self._conn = None
+        self.restarts = 0  # 因超时或崩溃重启子进程的次数
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def _start(self) -> Optional[str]:
+        """Spawn the child and wait until its extractor is built; returns an error message on failure."""
+        parent_conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_isolated_worker_main,
+            args=(child_conn, self.spec, self.memory_limit_mb),
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        try:
+            if not parent_conn.poll(self.STARTUP_TIMEOUT):
+                self.kill()
+                return f"Extraction worker startup timeout after {self.STARTUP_TIMEOUT}s"
+            status, message = parent_conn.recv()
+        except (EOFError, OSError):
+            status, message = "error", f"exit code {self._process.exitcode}"
+        if status != "ready":
+            self.kill()
+            return f"Extraction worker failed to start: {message}"
+        return None
+
+    def extract(self, html: str, url: Optional[str] = None) -> ExtractionResult:
+        """Extract one page in the child process, enforcing the timeout."""
+        start_time = time.time()
+        if not self.alive:
+            error = self._start()
+            if error is not None:
+                return ExtractionResult.create_error_result(error, extraction_time=time.time() - start_time)
+
+        try:
+            self._conn.send((html, url))
+            if not self._conn.poll(self.timeout):
+                # 抽取卡住：杀掉子进程，下次调用时重新启动
+                self.kill()
+                self.restarts += 1
+                return ExtractionResult.create_error_result(
+                    f"Extraction timeout: exceeded {self.timeout}s",
+                    extraction_time=time.time() - start_time
+                )
+            return self._conn.recv()
+        except (EOFError, OSError):
+            # 子进程异常退出（段错误、被OOM killer杀掉等）
+            exitcode = None
+            if self._process is not None:
+                self._process.join(1)  # 等待子进程退出以读取退出码
+                exitcode = self._process.exitcode
+            self.kill()
+            self.restarts += 1
+            message = f"Extraction worker crashed (exit code {exitcode})"
+            if self.memory_limit_mb:
+                message += f", possibly exceeding memory limit ({self.memory_limit_mb} MB)"
+            return ExtractionResult.create_error_result(message, extraction_time=time.time() - start_time)
+
+    def kill(self) -> None:
+        """Kill the child immediately."""
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.kill()
+            self._process.join()
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def close(self) -> None:
+        """Ask the child to exit, killing it if it does not."""
+        if self.alive:
+            try:
+                self._conn.send(None)
+                self._process.join(5)
+            except OSError:
+                pass
+        self.kill()
@@ -2,10 +2,11 @@
 Jina AI extractor implementation.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import requests
 from .base import BaseExtractor, ExtractionResult
 from .factory import extractor
+from .http_client import AsyncHttpClient, FetchResult
 
 
 @extractor("jina-ai")
@@ -20,11 +21,42 @@ class JinaExtractor(BaseExtractor):
         self.api_url = self.config.get('api_url', 'https://r.jina.ai/')
         self.api_key = self.config.get('api_key')
         self.timeout = self.config.get('timeout', 30)
+        # 批量抽取的并发、限流（每秒请求数）与重试配置
+        self.max_concurrency = self.config.get('max_concurrency', 8)
+        self.rate_limit = self.config.get('rate_limit')
+        self.max_retries = self.config.get('max_retries', 3)
         
         # Setup headers
         self.headers = {'Accept': 'application/json'}
         if self.api_key:
             self.headers['Authorization'] = f'Bearer {self.api_key}'
+        self._client: Optional[AsyncHttpClient] = None
+    
+    @property
+    def client(self) -> AsyncHttpClient:
+        """Pooled HTTP client, created on first use."""
+        if self._client is None:
+            self._client = AsyncHttpClient(
+                max_concurrency=self.max_concurrency,
+                rate_limit=self.rate_limit,
+                max_retries=self.max_retries,
+                timeout=self.timeout,
+                headers=self.headers,
+            )
+        return self._client
+    
+    def close_workers(self) -> None:
+        """Also close the pooled HTTP client; it is created again on next use."""
+        super().close_workers()
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+    
+    def __getstate__(self):
+        # 连接池与线程池不能跨进程传递，在子进程中重新创建
+        state = super().__getstate__()
+        state['_client'] = None
+        return state
     
     def _extract_content(self, html: str, url: str = None) -> ExtractionResult:
         """
@@ -47,52 +79,89 @@ class JinaExtractor(BaseExtractor):
                 )
             
             # Make request to Jina AI Reader API
-            full_url = f"{self.api_url}{url}"
-            response = requests.get(
-                full_url, 
-                headers=self.headers, 
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            
-            # Parse response
-            if response.headers.get('content-type', '').startswith('application/json'):
-                data = response.json()
-                content = data.get('content', '')
-                title = data.get('title', '')
-            else:
-                # Plain text response
-                content = response.text
-                title = None
-            
-            # Create content_list from content (simple split)
-            content_list = []
-            if content:
-                paragraphs = content.split('\n\n')
-                for i, para in enumerate(paragraphs):
-                    if para.strip():
-                        content_list.append({
-                            "type": "paragraph",
-                            "content": para.strip(),
-                            "index": i
-                        })
+            # 单页请求不经过事件循环，在已有事件循环中调用也可用
+            return self._parse_fetch_result(self.client.fetch(f"{self.api_url}{url}"))
             
-            return ExtractionResult(
-                content=content,
-                # content_list=content_list,
-                title=title,
-                # confidence_score=self._calculate_confidence(content, content_list),
-                success=True
+        except Exception as e:
+            return ExtractionResult.create_error_result(
+                f"Jina AI extraction failed: {str(e)}"
             )
+    
+    def batch_extract(self, html_list: List[str],
+                     url_list: List[str] = None,
+                     workers: int = 1,
+                     mode: Optional[str] = None) -> List[ExtractionResult]:
+        """
+        Extract many pages concurrently through the pooled HTTP client.
+        
+        Empty inputs, missing URLs and cache hits are answered without a request;
+        the remaining pages are fetched with at most max_concurrency requests in
+        flight and at most rate_limit requests per second.
+        
+        Args:
+            html_list: List of HTML content
+            url_list: Optional list of URLs
+            workers, mode: Unused, concurrency is set by max_concurrency
             
+        Returns:
+            List of ExtractionResult instances, in input order
+        """
+        if url_list is None:
+            url_list = [None] * len(html_list)
+        
+        results: List[Optional[ExtractionResult]] = [None] * len(html_list)
+        pending = []  # (下标, 缓存键)
+        for i, (html, url) in enumerate(zip(html_list, url_list)):
+            if not html or not html.strip():
+                results[i] = ExtractionResult.create_error_result("Empty HTML input")
+            elif not url:
+                results[i] = ExtractionResult.create_error_result(
+                    "Jina AI Reader requires a URL, but none was provided"
+                )
+            else:
+                cache_key, results[i] = self._cache_lookup(html, url)
+                if results[i] is None:
+                    pending.append((i, cache_key))
+        
+        fetched = self.client.fetch_all([f"{self.api_url}{url_list[i]}" for i, _ in pending])
+        for (i, cache_key), fetch_result in zip(pending, fetched):
+            try:
+                result = self._parse_fetch_result(fetch_result)
+            except Exception as e:
+                result = ExtractionResult.create_error_result(f"Jina AI extraction failed: {str(e)}")
+            result.extraction_time = fetch_result.elapsed
+            self._cache_store(cache_key, result)
+            results[i] = result
+        
+        return results
+    
+    def _parse_fetch_result(self, fetch_result: FetchResult) -> ExtractionResult:
+        """Turn the response of one Reader API request into an ExtractionResult."""
+        try:
+            if fetch_result.error is not None:
+                raise fetch_result.error
+            response = fetch_result.response
+            response.raise_for_status()
         except requests.RequestException as e:
             return ExtractionResult.create_error_result(
                 f"Jina AI API request failed: {str(e)}"
             )
-        except Exception as e:
-            return ExtractionResult.create_error_result(
-                f"Jina AI extraction failed: {str(e)}"
-            )
+        
+        # Parse response
+        if response.headers.get('content-type', '').startswith('application/json'):
+            data = response.json()
+            content = data.get('content', '')
+            title = data.get('title', '')
+        else:
+            # Plain text response
+            content = response.text
+            title = None
+        
+        return ExtractionResult(
+            content=content,
+            title=title,
+            success=True
+        )
     
     def _calculate_confidence(self, content: str, content_list: list) -> float:
         """Calculate extraction confidence score."""
@@ -2,15 +2,20 @@
 LLM-WebKit extractor implementation with advanced LLM inference.
 """
 
+import copy
 import json
 import re
+import threading
 import time
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
 from dataclasses import dataclass
 import torch
 
 from .base import BaseExtractor, ExtractionResult
+from .cache import SimplifiedHtmlCache
 from .factory import extractor
 
 
@@ -30,6 +35,11 @@ class LLMInferenceConfig:
     enforce_eager: bool = True      # 使用eager模式
     use_preprocessed_html: bool = False  # 是否使用预处理的HTML（跳过HTML简化步骤）
     preprocessed_html_field: str = "llm_webkit_html"  # 预处理HTML字段名
+    generation_batch_size: int = 8  # transformers模式下每次generate的样本数（vLLM一次提交整批）
+    reconstruct_workers: int = 4    # 批量抽取时并行重建内容的线程数
+    simplify_cache_dir: Optional[str] = None  # HTML简化结果的磁盘缓存目录（None表示不缓存）
+    max_batch_tokens: Optional[int] = None  # 每次推理的token预算（None表示按显存/KV缓存容量估算）
+    enable_prefix_caching: bool = True  # 复用分类提示公共前缀的KV缓存（vLLM自动前缀缓存 / transformers past_key_values）
 
 
 class TokenState(Enum):
@@ -43,8 +53,32 @@ class TokenState(Enum):
     Number = 6
 
 
+class _SequenceState:
+    """Decoding state of one prompt."""
+    
+    __slots__ = ("prompt", "max_count", "length", "previous", "current")
+    
+    def __init__(self, prompt):
+        self.prompt = prompt   # 持有引用，保证 id(prompt) 在缓存期间不被复用
+        self.max_count = None  # 提示中的item数，首次需要时计算一次
+        self.length = 0        # 已处理的输出token数
+        self.previous = -1     # 最近一个完整的数字（-1表示还没有）
+        self.current = ""      # 正在生成的数字
+
+
 class TokenStateManager:
-    """Manages token states to ensure valid JSON output."""
+    """
+    Manages token states to ensure valid JSON output.
+    
+    Used as a vLLM logits processor. Per prompt it keeps the item count (parsed
+    once) and the number being generated (updated from the new tokens only), and
+    the allowed tokens of every state are applied with a precomputed mask and a
+    single in-place masked_fill_.
+    """
+    
+    END_TOKEN_ID = 151645  # <|im_end|>
+    MAX_COUNT_PATTERN = (716, 1203, 842, 428)
+    MAX_CACHED_PROMPTS = 1024
     
     def __init__(self, tokenizer):
         self.tokenizer = tokenizer
@@ -58,23 +92,51 @@ class TokenStateManager:
             TokenState.Number: ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9"],
         }
         self.token_id_map = {k: [self.tokenizer.encode(v)[0] for v in token_id_map[k]] for k in token_id_map}
+        
+        self._left_bracket = self.token_id_map[TokenState.Left_bracket][0]
+        self._right_bracket = self.token_id_map[TokenState.Right_bracket][0]
+        self._space_quote = self.token_id_map[TokenState.Space_quote][0]
+        self._quote_colon_quote = self.token_id_map[TokenState.Quote_colon_quote][0]
+        self._quote_comma = self.token_id_map[TokenState.Quote_comma][0]
+        self._main_other = frozenset(self.token_id_map[TokenState.Main_other])
+        self._digit_of = {token_id: str(d) for d, token_id in enumerate(self.token_id_map[TokenState.Number])}
+        
+        # 各状态允许的token，数字按字符编码（与逐步调用 tokenizer.encode 相同）
+        self._allowed = {state: ids for state, ids in self.token_id_map.items()}
+        self._allowed["end"] = [self.END_TOKEN_ID]
+        for digit in "0123456789":
+            self._allowed[digit] = self.tokenizer.encode(digit)
+        # (状态, 设备, 词表大小) -> 屏蔽掩码（True为禁止）
+        self._masks: Dict[tuple, torch.Tensor] = {}
+        self._states: "OrderedDict[int, _SequenceState]" = OrderedDict()
+    
+    def _mask(self, key, logits: torch.Tensor) -> torch.Tensor:
+        cache_key = (key, logits.device, logits.shape[-1])
+        mask = self._masks.get(cache_key)
+        if mask is None:
+            index = torch.tensor(self._allowed[key], dtype=torch.long, device=logits.device)
+            mask = torch.ones(logits.shape[-1], dtype=torch.bool, device=logits.device).index_fill_(0, index, False)
+            self._masks[cache_key] = mask
+        return mask
+    
+    def _keep_only(self, logits: torch.Tensor, key) -> torch.Tensor:
+        """Keep the logits of the allowed tokens of a state, -inf elsewhere (in place)."""
+        return logits.masked_fill_(self._mask(key, logits), -float('inf'))
     
     def mask_other_logits(self, logits: torch.Tensor, remained_ids: List[int]):
         """Mask logits to only allow specific token IDs."""
-        remained_logits = {ids: logits[ids].item() for ids in remained_ids}
-        new_logits = torch.ones_like(logits) * -float('inf')
-        for id in remained_ids:
-            new_logits[id] = remained_logits[id]
-        return new_logits
+        index = torch.tensor(remained_ids, dtype=torch.long, device=logits.device)
+        new_logits = torch.full_like(logits, -float('inf'))
+        return new_logits.index_copy_(0, index, logits.index_select(0, index))
         
     def calc_max_count(self, prompt_token_ids: List[int]):
         """Calculate maximum count of items from prompt."""
-        pattern_list = [716, 1203, 842, 428]
+        pattern_list = self.MAX_COUNT_PATTERN
         for idx in range(len(prompt_token_ids) - len(pattern_list), -1, -1):
             if all(prompt_token_ids[idx + i] == pattern_list[i] for i in range(len(pattern_list))):
                 num_idx = idx + len(pattern_list)
                 num_ids = []
-                while num_idx < len(prompt_token_ids) and prompt_token_ids[num_idx] in self.token_id_map[TokenState.Number]:
+                while num_idx < len(prompt_token_ids) and prompt_token_ids[num_idx] in self._digit_of:
                     num_ids.append(prompt_token_ids[num_idx])
                     num_idx += 1
                 return int(self.tokenizer.decode(num_ids)) 
@@ -85,68 +147,90 @@ class TokenStateManager:
         if not input_ids:
             return -1, "null", -1
         
-        tail_number_ids = []
         last_idx = len(input_ids) - 1
-        while last_idx >= 0 and input_ids[last_idx] in self.token_id_map[TokenState.Number]:
-            tail_number_ids.insert(0, input_ids[last_idx])
+        while last_idx >= 0 and input_ids[last_idx] in self._digit_of:
             last_idx -= 1
+        tail_digits = "".join(self._digit_of[token] for token in input_ids[last_idx + 1:])
+        tail_number = int(tail_digits) if tail_digits else -1
         
-        tail_number = int(self.tokenizer.decode(tail_number_ids)) if tail_number_ids else -1
-        
-        while last_idx >= 0 and input_ids[last_idx] not in self.token_id_map[TokenState.Number]:
+        while last_idx >= 0 and input_ids[last_idx] not in self._digit_of:
             last_idx -= 1
         
         if last_idx < 0:
             return tail_number, "tail", tail_number
         
-        last_number_ids = []
-        while last_idx >= 0 and input_ids[last_idx] in self.token_id_map[TokenState.Number]:
-            last_number_ids.insert(0, input_ids[last_idx])
+        end_idx = last_idx + 1
+        while last_idx >= 0 and input_ids[last_idx] in self._digit_of:
             last_idx -= 1
         
-        last_number = int(self.tokenizer.decode(last_number_ids))
+        last_number = int("".join(self._digit_of[token] for token in input_ids[last_idx + 1:end_idx]))
         
         if tail_number == last_number + 1:
             return tail_number, "tail", tail_number
         return last_number, "non_tail", tail_number
+    
+    def _state(self, prompt_token_ids, input_ids) -> _SequenceState:
+        """State of a prompt, advanced over the output tokens not seen yet."""
+        # vLLM 每步传入同一个 prompt_token_ids 对象
+        key = id(prompt_token_ids)
+        state = self._states.get(key)
+        if state is None or state.prompt is not prompt_token_ids:
+            state = _SequenceState(prompt_token_ids)
+            self._states[key] = state
+            if len(self._states) > self.MAX_CACHED_PROMPTS:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(key)
+        
+        if len(input_ids) < state.length:
+            # 同一提示的另一条序列（n>1）：从头重新计算
+            state.length, state.previous, state.current = 0, -1, ""
+        for token in input_ids[state.length:]:
+            digit = self._digit_of.get(token)
+            if digit is not None:
+                state.current += digit
+            elif state.current:
+                state.previous, state.current = int(state.current), ""
+        state.length = len(input_ids)
+        return state
+    
+    def reset(self) -> None:
+        """Forget the state of all prompts."""
+        self._states.clear()
             
     def process_logit(self, prompt_token_ids: List[int], input_ids: List[int], logits: torch.Tensor):
         """Process logits to enforce JSON format."""
         if not input_ids:
-            return self.mask_other_logits(logits, self.token_id_map[TokenState.Left_bracket])
+            return self._keep_only(logits, TokenState.Left_bracket)
         
+        state = self._state(prompt_token_ids, input_ids)
         last_token = input_ids[-1]
         
-        if last_token == self.token_id_map[TokenState.Right_bracket][0]:
-            return self.mask_other_logits(logits, [151645])
-        elif last_token == self.token_id_map[TokenState.Left_bracket][0]:
-            return self.mask_other_logits(logits, self.token_id_map[TokenState.Space_quote])
-        elif last_token == self.token_id_map[TokenState.Space_quote][0]:
-            last_number, _, _ = self.find_last_complete_number(input_ids)
-            if last_number == -1:
-                next_char = '1'
-            else:
-                next_char = str(last_number + 1)[0]
-            return self.mask_other_logits(logits, self.tokenizer.encode(next_char))
-        elif last_token in self.token_id_map[TokenState.Number]:
-            last_number, state, tail_number = self.find_last_complete_number(input_ids)
-            if state == "tail":
-                return self.mask_other_logits(logits, self.token_id_map[TokenState.Quote_colon_quote])
-            else:
-                next_str = str(last_number + 1)
-                next_char = next_str[len(str(tail_number))]
-                return self.mask_other_logits(logits, self.tokenizer.encode(next_char))
-        elif last_token == self.token_id_map[TokenState.Quote_colon_quote][0]:
-            return self.mask_other_logits(logits, self.token_id_map[TokenState.Main_other])
-        elif last_token in self.token_id_map[TokenState.Main_other]:
-            return self.mask_other_logits(logits, self.token_id_map[TokenState.Quote_comma])
-        elif last_token == self.token_id_map[TokenState.Quote_comma][0]:
-            last_number, _, _ = self.find_last_complete_number(input_ids)
-            max_count = self.calc_max_count(prompt_token_ids)
-            if last_number >= max_count:
-                return self.mask_other_logits(logits, self.token_id_map[TokenState.Right_bracket])
-            else:
-                return self.mask_other_logits(logits, self.token_id_map[TokenState.Space_quote])
+        if last_token == self._right_bracket:
+            # 输出结束，释放该提示的状态
+            self._states.pop(id(prompt_token_ids), None)
+            return self._keep_only(logits, "end")
+        elif last_token == self._left_bracket:
+            return self._keep_only(logits, TokenState.Space_quote)
+        elif last_token == self._space_quote:
+            next_char = '1' if state.previous == -1 else str(state.previous + 1)[0]
+            return self._keep_only(logits, next_char)
+        elif last_token in self._digit_of:
+            tail_number = int(state.current)
+            if state.previous == -1 or tail_number == state.previous + 1:
+                return self._keep_only(logits, TokenState.Quote_colon_quote)
+            next_char = str(state.previous + 1)[len(str(tail_number))]
+            return self._keep_only(logits, next_char)
+        elif last_token == self._quote_colon_quote:
+            return self._keep_only(logits, TokenState.Main_other)
+        elif last_token in self._main_other:
+            return self._keep_only(logits, TokenState.Quote_comma)
+        elif last_token == self._quote_comma:
+            if state.max_count is None:
+                state.max_count = self.calc_max_count(prompt_token_ids)
+            if state.previous >= state.max_count:
+                return self._keep_only(logits, TokenState.Right_bracket)
+            return self._keep_only(logits, TokenState.Space_quote)
         
         return logits
 
@@ -208,6 +292,14 @@ Input HTML:
 {alg_html}
 
 Output format should be a JSON-formatted string representing a dictionary where keys are item_id strings and values are either 'main' or 'other'. Make sure to include ALL item_ids from the input HTML."""
+    
+    # 切分聊天模板时代替{alg_html}的占位符，不会出现在模板文本中
+    _HTML_PLACEHOLDER = "\x00alg_html\x00"
+    
+    # 长度分桶调度：每个item在输出JSON中约占的token数、最小长度桶、无法估算显存时的默认token预算
+    OUTPUT_TOKENS_PER_ITEM = 8
+    MIN_BUCKET_TOKENS = 512
+    DEFAULT_BATCH_TOKENS = 65536
 
     def __init__(self, name: str, config: Optional[Dict[str, Any]] = None):
         # 先初始化inference_config，再调用父类初始化（因为父类会调用_setup()）
@@ -215,6 +307,11 @@ Output format should be a JSON-formatted string representing a dictionary where
         self.model = None
         self.tokenizer = None
         self.token_state_manager = None
+        self._prompt_parts_cache = None  # (公共前缀, 后缀)，False表示模板无法切分
+        self._prefix_ids = None          # 公共前缀的token ids
+        self._prefix_kv = None           # transformers模式下公共前缀的(token ids, past_key_values)
+        self._prefix_stats = {"prompts": 0, "prefix_tokens": 0, "prefill_tokens_saved": 0}
+        self._stats_lock = threading.Lock()
         
         # Override config if provided
         if config:
@@ -401,6 +498,8 @@ Output format should be a JSON-formatted string representing a dictionary where
                 "trust_remote_code": True,
                 "dtype": self.inference_config.dtype,
                 "tensor_parallel_size": self.inference_config.tensor_parallel_size,
+                # 所有提示共享同一段指令前缀，自动前缀缓存让其KV块只预填充一次
+                "enable_prefix_caching": self.inference_config.enable_prefix_caching,
             }
             
             print(f"🔧 vLLM配置: {model_kwargs}")
@@ -438,17 +537,61 @@ Output format should be a JSON-formatted string representing a dictionary where
         )
         return chat_prompt
     
+    def _prompt_parts(self) -> Optional[Tuple[str, str]]:
+        """
+        聊天模板切分为{alg_html}之前的公共前缀和之后的后缀，只计算一次。
+        
+        每个提示都由同一个前缀字符串拼接而成，前缀逐字节一致，推理后端才能命中前缀缓存。
+        模板无法切分时返回None。
+        """
+        if self._prompt_parts_cache is None:
+            chat_prompt = self._add_template(self._create_prompt(self._HTML_PLACEHOLDER))
+            if chat_prompt.count(self._HTML_PLACEHOLDER) == 1:
+                self._prompt_parts_cache = tuple(chat_prompt.split(self._HTML_PLACEHOLDER))
+            else:
+                self._prompt_parts_cache = False
+        return self._prompt_parts_cache or None
+    
+    def _build_chat_prompt(self, simplified_html: str) -> str:
+        """创建带聊天模板的分类提示，与 _add_template(_create_prompt(html)) 相同。"""
+        parts = self._prompt_parts()
+        if parts is None:
+            return self._add_template(self._create_prompt(simplified_html))
+        return parts[0] + simplified_html + parts[1]
+    
+    def _prefix_token_ids(self) -> List[int]:
+        """公共前缀的token ids（不加特殊token，聊天模板已包含）"""
+        if self._prefix_ids is None:
+            parts = self._prompt_parts()
+            self._prefix_ids = [] if parts is None else list(
+                self.tokenizer(parts[0], add_special_tokens=False)["input_ids"])
+        return self._prefix_ids
+    
+    def _record_prefix_reuse(self, prompts: int, prefix_tokens: int, saved: int) -> None:
+        with self._stats_lock:
+            self._prefix_stats["prompts"] += prompts
+            self._prefix_stats["prefix_tokens"] = prefix_tokens
+            self._prefix_stats["prefill_tokens_saved"] += saved
+    
+    def get_run_stats(self) -> Dict[str, Any]:
+        """本次运行的推理统计：提示数、公共前缀token数、前缀缓存节省的预填充token数"""
+        with self._stats_lock:
+            return dict(self._prefix_stats)
+    
     def _generate_with_transformers(self, prompt: str) -> str:
         """使用transformers生成文本"""
+        return self._generate_batch_with_transformers([prompt])[0]
+    
+    def _generate_batch_with_transformers(self, prompts: List[str]) -> List[str]:
+        """使用transformers批量生成文本，每批左侧填充到相同长度"""
         try:
             import torch
             
-            # Tokenize输入
-            inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True, max_length=self.inference_config.max_tokens)
-            
-            # 移动到正确的设备
-            device = self.model.device
-            inputs = {k: v.to(device) for k, v in inputs.items()}
+            # 仅解码器模型需要左侧填充，新生成的token才能紧接在各自的提示之后
+            padding_side = self.tokenizer.padding_side
+            self.tokenizer.padding_side = "left"
+            if self.tokenizer.pad_token_id is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
             
             # 生成配置
             generation_config = {
@@ -456,36 +599,253 @@ Output format should be a JSON-formatted string representing a dictionary where
                 "temperature": self.inference_config.temperature,
                 "top_p": self.inference_config.top_p,
                 "do_sample": self.inference_config.temperature > 0,
-                "pad_token_id": self.tokenizer.eos_token_id,
+                "pad_token_id": self.tokenizer.pad_token_id,
                 "eos_token_id": self.tokenizer.eos_token_id,
             }
             
-            print(f"🔄 开始生成文本 (max_new_tokens: {generation_config['max_new_tokens']})")
-            
-            # 生成
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    **generation_config
-                )
+            print(f"🔄 开始生成文本 ({len(prompts)} 个样本, max_new_tokens: {generation_config['max_new_tokens']})")
             
-            # 解码输出（只取新生成的部分）
-            input_length = inputs['input_ids'].shape[1]
-            generated_ids = outputs[0][input_length:]
-            generated_text = self.tokenizer.decode(generated_ids, skip_special_tokens=True)
-            
-            print(f"✅ 生成完成，输出长度: {len(generated_text)}")
-            print(f"🔍 LLM原始输出: {repr(generated_text[:200])}")  # 显示前200字符用于调试
+            json_results = []
+            batch_size = max(1, self.inference_config.generation_batch_size)
+            try:
+                for start in range(0, len(prompts), batch_size):
+                    # Tokenize输入（可复用公共前缀KV时只编码前缀之后的部分）
+                    inputs = self._prefix_reuse_inputs(prompts[start:start + batch_size])
+                    if inputs is None:
+                        inputs = self.tokenizer(prompts[start:start + batch_size], return_tensors="pt", padding=True,
+                                                truncation=True, max_length=self.inference_config.max_tokens)
+                    
+                    # 移动到正确的设备
+                    device = self.model.device
+                    inputs = {k: v.to(device) if torch.is_tensor(v) else v for k, v in inputs.items()}
+                    
+                    # 生成
+                    with torch.no_grad():
+                        outputs = self.model.generate(
+                            **inputs,
+                            **generation_config
+                        )
+                    
+                    # 解码输出（只取新生成的部分，填充后各样本的输入长度相同）
+                    input_length = inputs['input_ids'].shape[1]
+                    generated_texts = self.tokenizer.batch_decode(outputs[:, input_length:], skip_special_tokens=True)
+                    
+                    for generated_text in generated_texts:
+                        print(f"🔍 LLM原始输出: {repr(generated_text[:200])}")  # 显示前200字符用于调试
+                        # 提取JSON部分
+                        json_results.append(self._extract_json_from_text(generated_text))
+            finally:
+                self.tokenizer.padding_side = padding_side
             
-            # 提取JSON部分
-            json_result = self._extract_json_from_text(generated_text)
-            print(f"🔍 提取的JSON: {repr(json_result[:200])}")  # 显示JSON结果
-            return json_result
+            print(f"✅ 生成完成，共 {len(json_results)} 个输出")
+            return json_results
             
         except Exception as e:
             print(f"⚠️  transformers生成失败: {e}")
             raise RuntimeError(f"transformers生成失败: {e}")
     
+    def _prefix_cache(self):
+        """公共前缀的 (input_ids [1, P], past_key_values)，首次使用时预填充一次；不可用时返回None"""
+        if self._prefix_kv is None:
+            self._prefix_kv = False
+            prefix_ids = self._prefix_token_ids()
+            if prefix_ids:
+                try:
+                    input_ids = torch.tensor([prefix_ids], device=self.model.device)
+                    with torch.no_grad():
+                        outputs = self.model(input_ids=input_ids, use_cache=True)
+                    self._prefix_kv = (input_ids, outputs.past_key_values)
+                except Exception as e:
+                    print(f"⚠️  公共前缀KV缓存不可用，按完整提示预填充: {e}")
+        return self._prefix_kv or None
+    
+    @staticmethod
+    def _expand_past_key_values(past_key_values, batch_size: int):
+        """复制前缀KV缓存并扩展到batch_size（generate会原地追加缓存，不能共用同一份）"""
+        if hasattr(past_key_values, "batch_repeat_interleave"):
+            expanded = copy.deepcopy(past_key_values)
+            expanded.batch_repeat_interleave(batch_size)
+            return expanded
+        return tuple(
+            tuple(tensor.repeat(batch_size, *([1] * (tensor.dim() - 1))) for tensor in layer)
+            for layer in past_key_values
+        )
+    
+    def _prefix_reuse_inputs(self, prompts: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        复用公共前缀KV缓存的generate输入，前缀不可复用时返回None。
+        
+        每行为 前缀token + 左侧填充的后缀token，填充位于前缀与后缀之间，注意力掩码为0；
+        位置编码按掩码累加计算，后缀位置紧接前缀。
+        """
+        if not self.inference_config.enable_prefix_caching:
+            return None
+        parts = self._prompt_parts()
+        if parts is None or not all(prompt.startswith(parts[0]) for prompt in prompts):
+            return None
+        prefix = self._prefix_cache()
+        if prefix is None:
+            return None
+        prefix_ids, past_key_values = prefix
+        prefix_length = prefix_ids.shape[1]
+        
+        suffixes = self.tokenizer([prompt[len(parts[0]):] for prompt in prompts], return_tensors="pt",
+                                  padding=True, truncation=True, add_special_tokens=False,
+                                  max_length=max(1, self.inference_config.max_tokens - prefix_length))
+        batch_size = len(prompts)
+        device = prefix_ids.device
+        suffix_mask = suffixes["attention_mask"].to(device)
+        self._record_prefix_reuse(batch_size, prefix_length, prefix_length * batch_size)
+        return {
+            "input_ids": torch.cat([prefix_ids.expand(batch_size, -1),
+                                   suffixes["input_ids"].to(device)], dim=1),
+            "attention_mask": torch.cat([torch.ones(batch_size, prefix_length, dtype=suffix_mask.dtype,
+                                                    device=device), suffix_mask], dim=1),
+            "past_key_values": self._expand_past_key_values(past_key_values, batch_size),
+        }
+    
+    def _sampling_params(self):
+        """配置vLLM采样参数"""
+        if self.inference_config.use_logits_processor and self.token_state_manager:
+            return self._SamplingParams(
+                temperature=self.inference_config.temperature,
+                top_p=self.inference_config.top_p,
+                max_tokens=self.inference_config.max_output_tokens,
+                logits_processors=[self.token_state_manager.process_logit]
+            )
+        return self._SamplingParams(
+            temperature=self.inference_config.temperature,
+            top_p=self.inference_config.top_p,
+            max_tokens=self.inference_config.max_output_tokens
+        )
+    
+    def _generate_batch(self, chat_prompts: List[str], item_counts: Optional[List[int]] = None) -> List[str]:
+        """
+        对一批聊天提示进行LLM推理，返回与输入顺序一致的JSON字符串。
+        
+        提示先按长度分桶调度（见 _schedule_batches），每批在token预算之内：
+        vLLM模式下每批在一次generate调用中提交，由连续批处理调度；
+        transformers模式下每批填充到批内最长提示后生成。
+        """
+        if item_counts is None:
+            template_items = self.CLASSIFICATION_PROMPT.count('_item_id')
+            item_counts = [max(0, prompt.count('_item_id') - template_items) for prompt in chat_prompts]
+        use_transformers = getattr(self, '_use_transformers', False)
+        batches = self._schedule_batches(chat_prompts, item_counts) if len(chat_prompts) > 1 else [[0]]
+        
+        json_results: List[Optional[str]] = [None] * len(chat_prompts)
+        for batch in batches:
+            prompts = [chat_prompts[i] for i in batch]
+            if use_transformers:
+                # 使用transformers生成
+                outputs = self._generate_batch_with_transformers(prompts)
+            else:
+                # 使用vLLM生成（输出顺序与提示顺序一致）
+                request_outputs = self.model.generate(prompts, self._sampling_params())
+                if self.inference_config.enable_prefix_caching:
+                    self._record_vllm_prefix_reuse(prompts, request_outputs)
+                outputs = [self._clean_output([output]) for output in request_outputs]
+            # 按调度前的下标放回，恢复输入顺序
+            for i, output in zip(batch, outputs):
+                json_results[i] = output
+        return json_results
+    
+    def _estimate_tokens(self, chat_prompt: str, item_count: int) -> int:
+        """一个请求占用的token数：提示的token长度 + 按item数估计的输出长度"""
+        parts = self._prompt_parts()
+        if parts is not None and chat_prompt.startswith(parts[0]):
+            # 公共前缀的长度只计算一次
+            prompt_tokens = len(self._prefix_token_ids()) + len(
+                self.tokenizer(chat_prompt[len(parts[0]):], add_special_tokens=False)["input_ids"])
+        else:
+            prompt_tokens = len(self.tokenizer(chat_prompt, add_special_tokens=False)["input_ids"])
+        output_tokens = min(self.inference_config.max_output_tokens, item_count * self.OUTPUT_TOKENS_PER_ITEM)
+        return prompt_tokens + output_tokens
+    
+    @classmethod
+    def _length_bucket(cls, tokens: int) -> int:
+        """长度桶编号：按2的幂划分，MIN_BUCKET_TOKENS以下归入同一个桶"""
+        return (max(tokens, cls.MIN_BUCKET_TOKENS) - 1).bit_length()
+    
+    def _token_budget(self) -> int:
+        """每批的token预算：配置值优先，其次按KV缓存容量/空闲显存估算"""
+        if self.inference_config.max_batch_tokens:
+            return self.inference_config.max_batch_tokens
+        try:
+            if not getattr(self, '_use_transformers', False):
+                # vLLM启动时已按gpu_memory_utilization预分配KV缓存块
+                cache_config = self.model.llm_engine.cache_config
+                return int(cache_config.num_gpu_blocks * cache_config.block_size)
+            if torch.cuda.is_available() and self.model.device.type == "cuda":
+                free_memory, _ = torch.cuda.mem_get_info(self.model.device)
+                config = self.model.config
+                kv_heads = getattr(config, "num_key_value_heads", None) or config.num_attention_heads
+                head_dim = getattr(config, "head_dim", None) or config.hidden_size // config.num_attention_heads
+                element_size = torch.tensor([], dtype=self.model.dtype).element_size()
+                bytes_per_token = 2 * config.num_hidden_layers * kv_heads * head_dim * element_size
+                return int(free_memory * self.inference_config.gpu_memory_utilization / bytes_per_token)
+        except Exception:
+            pass
+        return self.DEFAULT_BATCH_TOKENS
+    
+    def _schedule_batches(self, chat_prompts: List[str], item_counts: List[int]) -> List[List[int]]:
+        """
+        长度分桶调度，返回各批提示在输入中的下标。
+        
+        提示按估算的token数由短到长排序后依次装批，每批不超过token预算（单个超预算的提示独占一批）。
+        transformers模式下批内填充到最长提示，批不跨长度桶且不超过generation_batch_size；
+        vLLM无填充，按批内token总数计算，长度相近的请求一起提交可减少抢占。
+        """
+        lengths = [self._estimate_tokens(prompt, count) for prompt, count in zip(chat_prompts, item_counts)]
+        order = sorted(range(len(chat_prompts)), key=lengths.__getitem__)
+        budget = self._token_budget()
+        padded = getattr(self, '_use_transformers', False)
+        max_batch_size = max(1, self.inference_config.generation_batch_size)
+        
+        batches: List[List[int]] = []
+        current: List[int] = []
+        used = 0
+        bucket = None
+        for i in order:
+            if current:
+                if padded:
+                    # 已排序，新加入的提示是批内最长的
+                    full = (self._length_bucket(lengths[i]) != bucket or len(current) >= max_batch_size
+                            or (len(current) + 1) * lengths[i] > budget)
+                else:
+                    full = used + lengths[i] > budget
+                if full:
+                    batches.append(current)
+                    current, used = [], 0
+            if not current:
+                bucket = self._length_bucket(lengths[i])
+            current.append(i)
+            used += lengths[i]
+        if current:
+            batches.append(current)
+        
+        print(f"📦 长度分桶调度: {len(chat_prompts)} 个提示 -> {len(batches)} 批 (token预算 {budget})")
+        return batches
+    
+    def _record_vllm_prefix_reuse(self, chat_prompts: List[str], outputs) -> None:
+        """
+        统计vLLM前缀缓存节省的预填充token数。
+        
+        优先使用vLLM报告的命中数（RequestOutput.num_cached_tokens）；旧版本没有该字段时，
+        按除本次运行的第一个提示外，每个共享前缀的提示复用一次前缀估算。
+        """
+        parts = self._prompt_parts()
+        prefix_tokens = len(self._prefix_token_ids())
+        cached = [getattr(output, "num_cached_tokens", None) for output in outputs]
+        if all(isinstance(count, int) for count in cached):
+            saved = sum(cached)
+        else:
+            shared = sum(1 for prompt in chat_prompts if parts is not None and prompt.startswith(parts[0]))
+            if shared and self.get_run_stats()["prompts"] == 0:
+                shared -= 1  # 第一个提示需要完整预填充前缀
+            saved = prefix_tokens * shared
+        self._record_prefix_reuse(len(chat_prompts), prefix_tokens, saved)
+    
     def _extract_json_from_text(self, text: str) -> str:
         """从生成的文本中提取JSON"""
         # 查找JSON部分
@@ -533,12 +893,14 @@ Output format should be a JSON-formatted string representing a dictionary where
         except json.JSONDecodeError:
             return {}
     
-    def _reconstruct_content(self, original_html: str, classification_result: Dict[str, int], url: str = None) -> tuple:
-        """根据分类结果重建主要内容."""
+    def _reconstruct_content(self, original_html: str, classification_result: Dict[str, int], url: str = None,
+                             typical_raw_tag_html: Optional[str] = None) -> tuple:
+        """根据分类结果重建主要内容（typical_raw_tag_html为推理前简化HTML的结果，不传时重新简化）."""
         try:
             # 按照ray_test_qa.py的正确流程
             # 第一步：使用MapItemToHtmlTagsParser生成main_html
-            main_html = self._generate_main_html_with_parser(original_html, classification_result)
+            main_html = self._generate_main_html_with_parser(original_html, classification_result,
+                                                             typical_raw_tag_html)
             print(f"🔧 MapItemToHtmlTagsParser生成的main_html长度: {len(main_html)}")
             
             if not main_html.strip():
@@ -555,12 +917,13 @@ Output format should be a JSON-formatted string representing a dictionary where
             print(f"❌ Content reconstruction failed: {e}")
             return "", []
     
-    def _generate_main_html_with_parser(self, original_html: str, classification_result: Dict[str, int]) -> str:
+    def _generate_main_html_with_parser(self, original_html: str, classification_result: Dict[str, int],
+                                        typical_raw_tag_html: Optional[str] = None) -> str:
         """使用MapItemToHtmlTagsParser生成main_html（按照ray_test_qa.py的流程）"""
         try:
-            # 获取typical_raw_tag_html (简化的HTML)
-            simplified_html, typical_raw_tag_html, _ = self._simplify_html(original_html)
-            print(f"🔧 simplified HTML长度: {len(simplified_html)}")
+            # 获取typical_raw_tag_html (简化的HTML)，已简化过时直接复用
+            if typical_raw_tag_html is None:
+                _, typical_raw_tag_html = self._simplify(original_html)
             print(f"🔧 typical_raw_tag_html长度: {len(typical_raw_tag_html)}")
             
             # 按照ray_test_qa.py的流程
@@ -636,6 +999,8 @@ Output format should be a JSON-formatted string representing a dictionary where
                 return ExtractionResult.create_error_result(
                     f"访问预处理HTML字段 {preprocessed_field} 时发生异常: {str(e)}"
                 )
+            # 标准模式使用样本的原始HTML
+            return super().extract(sample.html, url or sample.url)
         else:
             # 这是普通的HTML字符串，使用标准处理
             return super().extract(html_or_sample, url)
@@ -676,80 +1041,21 @@ Output format should be a JSON-formatted string representing a dictionary where
                 return result
             
             # 标准流程：HTML简化 + LLM推理
-            # 步骤1: HTML简化处理
-            simplified_html, typical_raw_tag_html, _ = self._simplify_html(html)
-            
-            # 步骤2: 检查长度限制
-            item_count = simplified_html.count('_item_id')
-            if item_count > self.inference_config.max_item_count:
-                return ExtractionResult.create_error_result(
-                    f"HTML too complex: {item_count} items > {self.inference_config.max_item_count} limit"
-                )
-            
-            if item_count == 0:
-                return ExtractionResult.create_error_result("No _item_id found in simplified HTML")
+            # 步骤1-2: HTML简化处理并检查长度限制
+            simplified_html, typical_raw_tag_html, item_count, error_result = self._simplify_for_prompt(html)
+            if error_result is not None:
+                return error_result
             
             # 步骤3: 延迟加载模型
             self._load_model()
             
             # 步骤4: 创建提示并进行LLM推理
-            prompt = self._create_prompt(simplified_html)
-            chat_prompt = self._add_template(prompt)
-            
-            # 配置采样参数
-            if self.inference_config.use_logits_processor and self.token_state_manager:
-                sampling_params = self._SamplingParams(
-                    temperature=self.inference_config.temperature,
-                    top_p=self.inference_config.top_p,
-                    max_tokens=self.inference_config.max_output_tokens,
-                    logits_processors=[self.token_state_manager.process_logit]
-                )
-            else:
-                sampling_params = self._SamplingParams(
-                    temperature=self.inference_config.temperature,
-                    top_p=self.inference_config.top_p,
-                    max_tokens=self.inference_config.max_output_tokens
-                )
-            
-            # 根据模型类型选择生成方式
-            if hasattr(self, '_use_transformers') and self._use_transformers:
-                # 使用transformers生成
-                json_result = self._generate_with_transformers(chat_prompt)
-            else:
-                # 使用vLLM生成
-                output = self.model.generate(chat_prompt, sampling_params)
-                json_result = self._clean_output(output)
+            chat_prompt = self._build_chat_prompt(simplified_html)
+            json_result = self._generate_batch([chat_prompt])[0]
             
             # 步骤5: 格式转换和内容重建
-            print(f"🔄 开始格式转换...")
-            classification_result = self._reformat_classification_result(json_result)
-            print(f"🔍 格式转换结果: {len(classification_result)} 个分类项")
-            
-            print(f"🔄 开始重建内容...")
-            main_content, content_list = self._reconstruct_content(html, classification_result, url)
-            print(f"🔍 重建结果: 主内容长度={len(main_content)}, 内容块数量={len(content_list) if content_list else 0}")
-            
-            # 计算置信度
-            confidence = self._calculate_confidence(main_content, content_list, item_count)
-            
-            extraction_time = time.time() - start_time
-            
-            # 创建结果对象
-            result = ExtractionResult(
-                content=main_content,
-                # content_list=content_list,
-                title=self._extract_title(html),
-                language=self._detect_language(main_content),
-                confidence_score=confidence,
-                extraction_time=extraction_time,
-                success=True
-            )
-            
-            # 添加调试信息到错误消息字段（用于开发调试）
-            debug_info = f"item_count: {item_count}, llm_output_length: {len(json_result)}"
-            if not result.success:
-                result.error_message = f"{result.error_message or ''} | {debug_info}".strip(' |')
-            
+            result = self._build_result(html, url, json_result, item_count, typical_raw_tag_html)
+            result.extraction_time = time.time() - start_time
             return result
             
         except Exception as e:
@@ -761,6 +1067,180 @@ Output format should be a JSON-formatted string representing a dictionary where
                 extraction_time
             )
     
+    @property
+    def simplify_cache(self) -> Optional[SimplifiedHtmlCache]:
+        """HTML简化结果的磁盘缓存，配置了simplify_cache_dir时首次使用时创建"""
+        if self.inference_config.simplify_cache_dir is None:
+            return None
+        if getattr(self, '_simplify_cache', None) is None:
+            try:
+                from importlib.metadata import version
+                simplifier_version = version("llm_web_kit")
+            except Exception:
+                simplifier_version = ""
+            self._simplify_cache = SimplifiedHtmlCache(self.inference_config.simplify_cache_dir, simplifier_version)
+        return self._simplify_cache
+    
+    def _simplify(self, html: str) -> Tuple[str, str]:
+        """
+        简化HTML，优先读取磁盘缓存。
+        
+        Returns:
+            (simplified_html, typical_raw_tag_html)
+        """
+        cache = self.simplify_cache
+        if cache is not None:
+            cached = cache.get(html)
+            if cached is not None:
+                return cached
+        simplified_html, typical_raw_tag_html, _ = self._simplify_html(html)
+        if cache is not None:
+            try:
+                cache.put(html, simplified_html, typical_raw_tag_html)
+            except OSError as e:
+                print(f"Warning: Failed to cache simplified HTML: {e}")
+        return simplified_html, typical_raw_tag_html
+    
+    def _simplify_for_prompt(self, html: str) -> Tuple[Optional[str], Optional[str], int, Optional[ExtractionResult]]:
+        """
+        简化HTML并检查item数量限制。
+        
+        Returns:
+            (simplified_html, typical_raw_tag_html, item_count, error_result)；超出限制时error_result不为None
+        """
+        simplified_html, typical_raw_tag_html = self._simplify(html)
+        
+        item_count = simplified_html.count('_item_id')
+        if item_count > self.inference_config.max_item_count:
+            return None, None, item_count, ExtractionResult.create_error_result(
+                f"HTML too complex: {item_count} items > {self.inference_config.max_item_count} limit"
+            )
+        
+        if item_count == 0:
+            return None, None, item_count, ExtractionResult.create_error_result("No _item_id found in simplified HTML")
+        
+        return simplified_html, typical_raw_tag_html, item_count, None
+    
+    def _build_result(self, html: str, url: Optional[str], json_result: str, item_count: int,
+                      typical_raw_tag_html: Optional[str] = None) -> ExtractionResult:
+        """根据LLM输出的分类JSON重建内容并创建结果对象"""
+        print(f"🔄 开始格式转换...")
+        classification_result = self._reformat_classification_result(json_result)
+        print(f"🔍 格式转换结果: {len(classification_result)} 个分类项")
+        
+        print(f"🔄 开始重建内容...")
+        main_content, content_list = self._reconstruct_content(html, classification_result, url, typical_raw_tag_html)
+        print(f"🔍 重建结果: 主内容长度={len(main_content)}, 内容块数量={len(content_list) if content_list else 0}")
+        
+        # 计算置信度
+        confidence = self._calculate_confidence(main_content, content_list, item_count)
+        
+        # 创建结果对象
+        return ExtractionResult(
+            content=main_content,
+            # content_list=content_list,
+            title=self._extract_title(html),
+            language=self._detect_language(main_content),
+            confidence_score=confidence,
+            success=True
+        )
+    
+    def _resolve_input(self, html_or_sample, url: Optional[str]) -> Tuple[str, Optional[str]]:
+        """与extract相同的输入解析：DataSample按配置取预处理HTML或原始HTML"""
+        if type(html_or_sample).__name__ != 'DataSample':
+            return html_or_sample, url
+        sample = html_or_sample
+        if self.inference_config.use_preprocessed_html:
+            field = self.inference_config.preprocessed_html_field
+            if hasattr(sample, field):
+                return getattr(sample, field), sample.url
+        return sample.html, url or sample.url
+    
+    def batch_extract(self, html_list: List[Any],
+                      url_list: List[str] = None,
+                      workers: int = 1,
+                      mode: Optional[str] = None) -> List[ExtractionResult]:
+        """
+        批量抽取：整批HTML先简化，再按长度分桶调度LLM推理，最后并行重建内容。
+        
+        Args:
+            html_list: HTML字符串或DataSample对象列表
+            url_list: 可选的URL列表
+            workers, mode: 不使用；推理由模型整批调度，重建线程数由reconstruct_workers配置
+            
+        Returns:
+            与输入顺序一致的ExtractionResult列表
+        """
+        if url_list is None:
+            url_list = [None] * len(html_list)
+        reconstruct_workers = max(1, self.inference_config.reconstruct_workers)
+        
+        if self.inference_config.use_preprocessed_html:
+            # 预处理HTML模式无需LLM推理，直接并行提取
+            with ThreadPoolExecutor(max_workers=reconstruct_workers) as pool:
+                return list(pool.map(self.extract, html_list, url_list))
+        
+        results: List[Optional[ExtractionResult]] = [None] * len(html_list)
+        pending = []  # (下标, html, url, 缓存键, simplified_html, typical_raw_tag_html, item_count, 预处理耗时)
+        for i, (item, url) in enumerate(zip(html_list, url_list)):
+            start_time = time.time()
+            html, url = self._resolve_input(item, url)
+            if not html or not html.strip():
+                results[i] = ExtractionResult.create_error_result("Empty HTML input")
+                continue
+            try:
+                cache_key, results[i] = self._cache_lookup(html, url)
+                if results[i] is not None:
+                    continue
+                simplified_html, typical_raw_tag_html, item_count, results[i] = self._simplify_for_prompt(html)
+            except Exception as e:
+                import traceback
+                results[i] = ExtractionResult.create_error_result(
+                    f"LLM-WebKit extraction failed: {str(e)}", traceback.format_exc(), time.time() - start_time
+                )
+            if results[i] is None:
+                pending.append((i, html, url, cache_key, simplified_html, typical_raw_tag_html, item_count,
+                                time.time() - start_time))
+        
+        if not pending:
+            return results
+        
+        # 整批提示按长度分桶推理，推理耗时平摊到各样本
+        start_time = time.time()
+        try:
+            self._load_model()
+            chat_prompts = [self._build_chat_prompt(entry[4]) for entry in pending]
+            json_results = self._generate_batch(chat_prompts, [entry[6] for entry in pending])
+        except Exception as e:
+            import traceback
+            error_traceback = traceback.format_exc()
+            for i, *_ in pending:
+                results[i] = ExtractionResult.create_error_result(
+                    f"LLM-WebKit extraction failed: {str(e)}", error_traceback
+                )
+            return results
+        generation_time = (time.time() - start_time) / len(pending)
+        
+        def reconstruct(entry, json_result):
+            i, html, url, cache_key, _, typical_raw_tag_html, item_count, prepare_time = entry
+            start_time = time.time()
+            try:
+                result = self._build_result(html, url, json_result, item_count, typical_raw_tag_html)
+            except Exception as e:
+                import traceback
+                result = ExtractionResult.create_error_result(
+                    f"LLM-WebKit extraction failed: {str(e)}", traceback.format_exc()
+                )
+            result.extraction_time = prepare_time + generation_time + time.time() - start_time
+            self._cache_store(cache_key, result)
+            return i, result
+        
+        with ThreadPoolExecutor(max_workers=reconstruct_workers) as pool:
+            for i, result in pool.map(reconstruct, pending, json_results):
+                results[i] = result
+        
+        return results
+    
     def _extract_title(self, html: str) -> Optional[str]:
         """提取页面标题."""
         try:
@@ -17,6 +17,9 @@ class MagicHtmlExtractor(BaseExtractor):
 
     version = "0.1.5"
     description = "Magic HTML based content extractor"
+    # GeneralExtractor逐节点打分、清洗DOM，耗时主要在Python代码中，线程并发受GIL限制；
+    # 其构建开销由常驻进程池中每个进程只构建一次来摊薄
+    preferred_batch_mode = "process"
 
     def _setup(self) -> None:
         """Set up the Magic HTML extractor."""
@@ -0,0 +1,134 @@
+"""
+Persistent worker pool for process-parallel extraction.
+
+Every worker process builds its extractor once, in the pool initializer, and
+then keeps it warm across calls. This matters for extractors with an
+expensive setup, such as MagicHtmlExtractor's GeneralExtractor or the model
+that LlmWebkitExtractor loads lazily. Tasks are sent as lightweight
+(id, html, url) tuples. A worker can be retired after a fixed number of tasks,
+which contains memory leaks in third-party parsers. Its replacement builds a
+fresh extractor.
+"""
+
+import multiprocessing
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .base import BaseExtractor, ExtractionResult
+
+
+# (id, html, url)
+ExtractionTask = Tuple[Hashable, str, Optional[str]]
+
+# 每个工作进程内的抽取器，由 _init_pool_worker 构建一次
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_pool_worker(spec: Union[Tuple[str, Dict[str, Any]], BaseExtractor],
+                      extraction_cache: Any = None) -> None:
+    """Pool initializer: build the extractor of this worker."""
+    from .factory import ExtractorFactory
+
+    if isinstance(spec, BaseExtractor):
+        extractor = spec
+    else:
+        name, config = spec
+        extractor = ExtractorFactory.create(name, config)
+    if extraction_cache is not None:
+        extractor.extraction_cache = extraction_cache
+    _worker_state['extractor'] = extractor
+
+
+def _run_task(task: ExtractionTask) -> Tuple[Hashable, ExtractionResult]:
+    """Extract one task with the extractor of this worker."""
+    task_id, html, url = task
+    return task_id, _worker_state['extractor'].extract(html, url)
+
+
+class ExtractorWorkerPool:
+    """Long-lived process pool with one extractor instance per worker."""
+
+    def __init__(self, extractor: Union[str, BaseExtractor],
+                 config: Optional[Dict[str, Any]] = None,
+                 workers: Optional[int] = None,
+                 recycle_after: Optional[int] = None,
+                 extraction_cache: Any = None,
+                 start_method: Optional[str] = None):
+        """
+        Args:
+            extractor: Registered extractor name, built in each worker with
+                ExtractorFactory.create(name, config), or an extractor instance
+                (registered ones are rebuilt from their name and config, others pickled)
+            config: Extractor configuration (when extractor is a name)
+            workers: Number of worker processes (default: CPU count)
+            recycle_after: Replace a worker after it has completed this many tasks
+                (None keeps workers for the lifetime of the pool)
+            extraction_cache: Optional ExtractionCache shared by the workers
+                (default: the cache of the extractor instance)
+            start_method: multiprocessing start method (default: platform default)
+        """
+        if isinstance(extractor, BaseExtractor):
+            from .factory import extractor_spec
+            spec = extractor_spec(extractor)
+            if extraction_cache is None:
+                extraction_cache = extractor.extraction_cache
+            self.name, self.config = extractor.name, extractor.get_config()
+        else:
+            spec = (extractor, config or {})
+            self.name, self.config = spec
+        self.workers = workers or multiprocessing.cpu_count()
+        self.recycle_after = recycle_after
+
+        context = multiprocessing.get_context(start_method)
+        self._pool = context.Pool(
+            processes=self.workers,
+            initializer=_init_pool_worker,
+            initargs=(spec, extraction_cache),
+            maxtasksperchild=recycle_after,
+        )
+
+    def imap(self, tasks: Iterable[ExtractionTask], ordered: bool = True,
+             chunksize: int = 1) -> Iterator[Tuple[Hashable, ExtractionResult]]:
+        """
+        Extract tasks lazily, yielding (id, ExtractionResult).
+
+        Args:
+            tasks: (id, html, url) tuples
+            ordered: Yield in task order (False yields as soon as a task finishes)
+            chunksize: Tasks sent to a worker at once (forced to 1 when recycle_after
+                is set, since multiprocessing counts a whole chunk as one task)
+        """
+        if self.recycle_after:
+            chunksize = 1
+        mapper = self._pool.imap if ordered else self._pool.imap_unordered
+        return mapper(_run_task, tasks, chunksize)
+
+    def map(self, tasks: Iterable[ExtractionTask], chunksize: int = 1) -> List[Tuple[Hashable, ExtractionResult]]:
+        """Extract all tasks; results are in task order."""
+        return list(self.imap(tasks, ordered=True, chunksize=chunksize))
+
+    def batch_extract(self, html_list: List[str], url_list: List[str] = None,
+                      chunksize: int = 1) -> List[ExtractionResult]:
+        """Same contract as BaseExtractor.batch_extract, run on the warm workers."""
+        if url_list is None:
+            url_list = [None] * len(html_list)
+        tasks = zip(range(len(html_list)), html_list, url_list)
+        return [result for _, result in self.imap(tasks, chunksize=chunksize)]
+
+    def close(self) -> None:
+        """Let workers finish submitted tasks, then shut them down."""
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self) -> None:
+        """Stop workers immediately, dropping unfinished tasks."""
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
@@ -30,6 +30,8 @@ class TrafilaturaExtractor(BaseExtractor):
 
     version = "2.0.0"
     description = "Trafilatura based content extractor"
+    # lxml只负责解析，正文判定、去噪和Markdown输出都是纯Python逻辑，线程并发受GIL限制
+    preferred_batch_mode = "process"
 
     def __init__(self, name: str, config: Optional[Dict[str, Any]] = None):
         super().__init__(name, config)
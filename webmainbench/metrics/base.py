@@ -6,8 +6,8 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Dict, Any, List, Optional, Union
 import traceback
-import re
-from bs4 import BeautifulSoup
+import numpy as np
+from .segmenter import split_markdown
 
 @dataclass
 class MetricResult:
@@ -123,13 +123,15 @@ class BaseMetric(ABC):
         return results
     
     @staticmethod
-    def split_content(text: str, content_list: List[Dict[str, Any]] = None) -> Dict[str, str]:
+    def split_content(text: str, content_list: List[Dict[str, Any]] = None,
+                      html_parser: Optional[str] = None) -> Dict[str, str]:
         """
         统一的内容分割方法，将文本分为代码、公式、表格和剩余文本4个部分。
         
         Args:
             text: 原始markdown文本
             content_list: 结构化内容列表（来自llm-webkit等）
+            html_parser: HTML表格的解析后端（"html.parser" 或 "lxml"）
             
         Returns:
             Dict with keys: 'code', 'formula', 'table', 'text'
@@ -141,7 +143,27 @@ class BaseMetric(ABC):
                 return extracted_content
         
         # 从markdown文本中提取
-        return BaseMetric._extract_from_markdown(text or "")
+        return BaseMetric._extract_from_markdown(text or "", html_parser)
+    
+    def _get_content_parts(self, text: str, content_list: List[Dict[str, Any]] = None,
+                           split: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        获取内容分割结果，优先使用调用方预先计算好的分割结果。
+        
+        MetricCalculator 会对每个样本只分割一次，并通过 predicted_split /
+        groundtruth_split 参数传给所有指标，避免每个指标重复解析。
+        
+        Args:
+            text: 原始markdown文本
+            content_list: 结构化内容列表
+            split: 预先计算的分割结果（可选）
+            
+        Returns:
+            Dict with keys: 'code', 'formula', 'table', 'text'
+        """
+        if split is not None:
+            return split
+        return self.split_content(text, content_list, self.config.get('html_parser'))
     
     @staticmethod
     def _extract_from_content_list(content_list: List[Dict[str, Any]]) -> Dict[str, str]:
@@ -194,150 +216,9 @@ class BaseMetric(ABC):
         }
     
     @staticmethod 
-    def _extract_from_markdown(text: str) -> Dict[str, str]:
+    def _extract_from_markdown(text: str, html_parser: Optional[str] = None) -> Dict[str, str]:
         """从markdown文本中提取各种类型的内容"""
-        if not text:
-            return {'code': '', 'formula': '', 'table': '', 'text': ''}
-        
-        # 收集所有需要移除的内容片段
-        extracted_segments = []
-        code_parts = []
-        # 同时匹配行内代码 `...` 和代码块 ```...```
-        pattern = r'(```[\s\S]*?```|`[^`\n]+`)'
-        for match in re.finditer(pattern, text):
-            code_segment = match.group(0)
-            extracted_segments.append(code_segment)
-
-            if code_segment.startswith('```'):
-                # 处理代码块（保留内部缩进）
-                lines = code_segment.split('\n')
-                # 移除首尾的```标记
-                content_lines = lines[1:-1]
-                # 保留原始缩进，只拼接内容
-                code_content = '\n'.join(content_lines)
-            else:
-                # 处理行内代码（只去除外层`和前后空格）
-                code_content = code_segment[1:-1].strip()
-
-            if code_content:  # 只添加非空内容
-                code_parts.append(code_content)
-        
-        # # 提取代码
-        # code_parts = []
-        # # 代码块 ```code```
-        # for match in re.finditer(r'```[\s\S]*?```', text):
-        #     code_block = match.group(0)
-        #     extracted_segments.append(code_block)
-        #     code_parts.append(code_block.strip('`').strip())
-        #
-        # # 行内代码 `code`
-        # for match in re.finditer(r'`([^`]+)`', text):
-        #     inline_code_full = match.group(0)  # 包含反引号的完整匹配
-        #     inline_code_content = match.group(1)  # 只是内容
-        #     extracted_segments.append(inline_code_full)
-        #     code_parts.append(inline_code_content)
-        
-        # 提取公式
-        formula_parts = []
-        # 统一的公式提取模式
-        latex_patterns = [
-            # r'(?<!\\)\$\$([^$]+)\$\$(?!\\)',  # Display math (not escaped)
-            # r'(?<!\\)\$([^$\n]+)\$(?![\\\$])',  # Inline math (not escaped)
-            # r'\\begin\{equation\*?\}(.*?)\\end\{equation\*?\}',  # Equation environment
-            # r'\\begin\{align\*?\}(.*?)\\end\{align\*?\}',        # Align environment
-            # r'\\begin\{gather\*?\}(.*?)\\end\{gather\*?\}',      # Gather environment
-            # r'\\begin\{eqnarray\*?\}(.*?)\\end\{eqnarray\*?\}',  # Eqnarray environment
-            # r'\\begin\{multline\*?\}(.*?)\\end\{multline\*?\}',  # Multline environment
-            # r'\\begin\{split\}(.*?)\\end\{split\}',              # Split environment
-            # r'(?<!\\)\$\$([^$]+)\$\$(?!\\)',
-            # r'(?<!\\)\$([^$\n\w][^$\n]*[^$\n\w])\$(?![\\\$])',
-            r'(?<!\\)\$\$(.*?)(?<!\\)\$\$',  # 行间 $$...$$，确保 $ 没有被转义
-            r'(?<!\\)\\\[(.*?)(?<!\\)\\\]',  # 行间 \[...\]，确保 \ 没有被转义
-            r'(?<!\\)\$(.*?)(?<!\\)\$',  # 行内 $...$，确保 $ 没有被转义
-            r'(?<!\\)\\\((.*?)(?<!\\)\\\)',  # 行内 \(...\)，确保 \ 没有被转义
-        ]
-        
-        for pattern in latex_patterns:
-            for match in re.finditer(pattern, text, re.DOTALL):
-                formula_full = match.group(0)  # 完整匹配（包含$符号）
-                formula_content = match.group(1)  # 只是公式内容
-                extracted_segments.append(formula_full)
-                if formula_content.strip():
-                    formula_parts.append(formula_content.strip())
-
-        # 提取表格
-        table_parts = []
-
-        # ===== 1. 提取 HTML 表格 =====
-        # 用 BeautifulSoup 替代正则，防止嵌套或匹配不全
-        soup = BeautifulSoup(text, "html.parser")
-        for table in soup.find_all("table"):
-            html_table = str(table)
-            extracted_segments.append(html_table)
-            table_parts.append(html_table)
-
-        # ===== 2. 提取 Markdown 表格 =====
-        lines = text.split('\n')
-        table_lines = []
-        in_markdown_table = False
-        found_separator = False  # 是否已找到分隔行
-
-        def is_md_table_line(line):
-            """判断是否可能是 Markdown 表格行"""
-            if line.count("|") < 3:  # 至少三个竖线
-                return False
-            return True
-
-        def is_md_separator_line(line):
-            """判断是否为 Markdown 分隔行"""
-            parts = [p.strip() for p in line.split("|")]
-            # 检查是否所有部分都是分隔符格式
-            for p in parts:
-                if p and not re.match(r"^:?\-{3,}:?$", p):
-                    return False
-            return True
-
-        def save_table():
-            """保存当前表格并清空缓存"""
-            nonlocal table_lines
-            # 只有当表格行数大于等于2，且第二行是分隔行时才保存
-            if len(table_lines) >= 2 and is_md_separator_line(table_lines[1]):
-                md_table = '\n'.join(table_lines)
-                extracted_segments.append(md_table)
-                table_parts.append(md_table)
-
-        for line in lines:
-            if is_md_table_line(line):
-                table_lines.append(line)
-                in_markdown_table = True
-                if is_md_separator_line(line):
-                    found_separator = True
-            else:
-                if in_markdown_table:
-                    save_table()
-                    table_lines = []
-                    in_markdown_table = False
-                    found_separator = False
-
-        # 处理文档末尾的 Markdown 表格
-        if in_markdown_table:
-            save_table()
-
-        # 提取剩余文本（移除所有已提取的内容片段）
-        clean_text = text
-        for segment in extracted_segments:
-            clean_text = clean_text.replace(segment, '', 1)
-        
-        # 清理多余的空行
-        clean_text = re.sub(r'\n\s*\n', '\n\n', clean_text)
-        clean_text = clean_text.strip()
-        
-        return {
-            'code': '\n'.join(code_parts),
-            'formula': '\n'.join(formula_parts),
-            'table': '\n'.join(table_parts),
-            'text': clean_text
-        }
+        return split_markdown(text, html_parser)
     
     def aggregate_results(self, results: List[MetricResult]) -> MetricResult:
         """
@@ -360,7 +241,8 @@ class BaseMetric(ABC):
         
         # Calculate aggregate score (mean by default)
         scores = [r.score for r in successful_results]
-        avg_score = sum(scores) / len(scores)
+        score_array = np.asarray(scores, dtype=np.float64)
+        avg_score = float(score_array.mean())
         
         # Aggregate details
         aggregate_details = {
@@ -368,9 +250,9 @@ class BaseMetric(ABC):
             "num_successful": len(successful_results),
             "num_failed": len(results) - len(successful_results),
             "scores": scores,
-            "min_score": min(scores),
-            "max_score": max(scores),
-            "std_score": self._calculate_std(scores),
+            "min_score": float(score_array.min()),
+            "max_score": float(score_array.max()),
+            "std_score": self._calculate_std(score_array),
         }
         
         return MetricResult(
@@ -380,14 +262,12 @@ class BaseMetric(ABC):
             success=True
         )
     
-    def _calculate_std(self, scores: List[float]) -> float:
-        """Calculate standard deviation."""
+    def _calculate_std(self, scores: Union[List[float], np.ndarray]) -> float:
+        """Calculate sample standard deviation."""
         if len(scores) <= 1:
             return 0.0
         
-        mean = sum(scores) / len(scores)
-        variance = sum((x - mean) ** 2 for x in scores) / (len(scores) - 1)
-        return variance ** 0.5
+        return float(np.std(np.asarray(scores, dtype=np.float64), ddof=1))
     
     def get_config(self) -> Dict[str, Any]:
         """Get metric configuration."""
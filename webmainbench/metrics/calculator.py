@@ -17,20 +17,30 @@ class MetricCalculator:
         Initialize the metric calculator.
         
         Args:
-            config: Configuration for metrics
+            config: Configuration for metrics, keyed by metric name. The optional
+                top-level "html_parser" key ("html.parser" or "lxml") selects the
+                HTML parse backend for content splitting and all metrics
         """
         self.config = config or {}
+        self.html_parser = self.config.get("html_parser")
         self.metrics: Dict[str, BaseMetric] = {}
         self._setup_default_metrics()
     
     def _setup_default_metrics(self) -> None:
         """Setup default metrics."""
-        # 注册新的内容类型指标
-        self.add_metric("code_edit", CodeEditMetric("code_edit"))
-        self.add_metric("formula_edit", FormulaEditMetric("formula_edit"))
-        self.add_metric("table_edit", TableEditMetric("table_edit"))
-        self.add_metric("table_TEDS", TableTEDSMetric("table_TEDS"))
-        self.add_metric("text_edit", TextEditMetric("text_edit"))
+        # 注册新的内容类型指标（各指标的配置取自 config[指标名]）
+        self.add_metric("code_edit", CodeEditMetric("code_edit", self._metric_config("code_edit")))
+        self.add_metric("formula_edit", FormulaEditMetric("formula_edit", self._metric_config("formula_edit")))
+        self.add_metric("table_edit", TableEditMetric("table_edit", self._metric_config("table_edit")))
+        self.add_metric("table_TEDS", TableTEDSMetric("table_TEDS", self._metric_config("table_TEDS")))
+        self.add_metric("text_edit", TextEditMetric("text_edit", self._metric_config("text_edit")))
+    
+    def _metric_config(self, name: str) -> Dict[str, Any]:
+        """单个指标的配置，未单独指定时继承全局的 html_parser"""
+        config = dict(self.config.get(name) or {})
+        if self.html_parser is not None:
+            config.setdefault("html_parser", self.html_parser)
+        return config
     
     def add_metric(self, name: str, metric: BaseMetric) -> None:
         """
@@ -56,6 +66,7 @@ class MetricCalculator:
                      groundtruth_content: str,
                      predicted_content_list: List[Dict[str, Any]] = None,
                      groundtruth_content_list: List[Dict[str, Any]] = None,
+                     metric_names: Optional[List[str]] = None,
                      **kwargs) -> Dict[str, MetricResult]:
         """
         Calculate all available metrics.
@@ -65,6 +76,9 @@ class MetricCalculator:
             groundtruth_content: Ground truth markdown content
             predicted_content_list: Predicted content list
             groundtruth_content_list: Ground truth content list
+            metric_names: Only calculate these metrics (default: all). table_edit is
+                still calculated when table_TEDS needs it, but only the selected
+                metrics are returned and "overall" is left to the caller
             **kwargs: Additional arguments for specific metrics
             
         Returns:
@@ -100,10 +114,17 @@ class MetricCalculator:
         #         )
 
         results: Dict[str, MetricResult] = {}
+        selected = set(self.metrics) if metric_names is None else set(metric_names)
+
+        # 0. 每个样本只分割一次内容，所有指标共享分割结果
+        kwargs.update(self._build_split_context(
+            predicted_content, groundtruth_content,
+            predicted_content_list, groundtruth_content_list, **kwargs
+        ))
 
         # 1. 先计算非表格指标（无依赖关系）
         for metric_name in list(self.metrics.keys()):
-            if metric_name in ["table_edit", "table_TEDS"]:
+            if metric_name in ["table_edit", "table_TEDS"] or metric_name not in selected:
                 continue  # 表格相关指标单独处理
 
             metric = self.metrics[metric_name]
@@ -117,7 +138,7 @@ class MetricCalculator:
 
         # 2. 处理表格相关指标（有依赖关系）
         # 2.1 计算 table_edit
-        if "table_edit" in self.metrics:
+        if "table_edit" in self.metrics and selected & {"table_edit", "table_TEDS"}:
             table_edit_result = self.metrics["table_edit"].calculate(
                 predicted=predicted_content,
                 groundtruth=groundtruth_content,
@@ -128,7 +149,7 @@ class MetricCalculator:
             results["table_edit"] = table_edit_result
 
             # 2.2 计算 table_TEDS（依赖 table_edit 的结果）
-            if "table_TEDS" in self.metrics:
+            if "table_TEDS" in self.metrics and "table_TEDS" in selected:
                 teds_result = self.metrics["table_TEDS"].calculate(
                     predicted=predicted_content,
                     groundtruth=groundtruth_content,
@@ -139,7 +160,18 @@ class MetricCalculator:
                 )
                 results["table_TEDS"] = teds_result
         
+        if metric_names is not None:
+            # table_edit 仅作为 table_TEDS 的依赖计算时不返回
+            return {name: result for name, result in results.items() if name in selected}
+        
         # 3. 计算综合得分（所有成功指标的平均值）
+        results["overall"] = self.overall_result(results)
+        return results
+
+    @staticmethod
+    def overall_result(results: Dict[str, MetricResult]) -> MetricResult:
+        """Average of all successful metric results (an existing "overall" entry is ignored)."""
+        results = {name: result for name, result in results.items() if name != "overall"}
         successful_scores = []
         failed_metrics = []
         
@@ -162,16 +194,48 @@ class MetricCalculator:
                     "individual_scores": {name: result.score for name, result in results.items() if result.success}
                 }
             )
-            results["overall"] = overall_result
         else:
             # 如果所有指标都失败了，overall分数为0
             overall_result = MetricResult.create_error_result(
                 "overall", "All individual metrics failed"
             )
-            results["overall"] = overall_result
         
-        return results
-    
+        return overall_result
+
+    def _build_split_context(self, predicted_content: str,
+                             groundtruth_content: str,
+                             predicted_content_list: List[Dict[str, Any]] = None,
+                             groundtruth_content_list: List[Dict[str, Any]] = None,
+                             **kwargs) -> Dict[str, Dict[str, str]]:
+        """
+        为单个样本构建内容分割上下文（代码/公式/表格/文本）。
+
+        调用方已传入的 predicted_split / groundtruth_split 会被直接复用；
+        预测与真实内容完全相同时只分割一次。
+
+        Returns:
+            包含 predicted_split 和 groundtruth_split 的字典
+        """
+        predicted_split = kwargs.get('predicted_split')
+        groundtruth_split = kwargs.get('groundtruth_split')
+
+        if predicted_split is None:
+            predicted_split = BaseMetric.split_content(predicted_content, predicted_content_list,
+                                                       self.html_parser)
+
+        if groundtruth_split is None:
+            if (groundtruth_content == predicted_content
+                    and groundtruth_content_list == predicted_content_list):
+                groundtruth_split = predicted_split
+            else:
+                groundtruth_split = BaseMetric.split_content(groundtruth_content, groundtruth_content_list,
+                                                         self.html_parser)
+
+        return {
+            'predicted_split': predicted_split,
+            'groundtruth_split': groundtruth_split,
+        }
+
     def calculate_batch(self, samples: List[Dict[str, Any]]) -> List[Dict[str, MetricResult]]:
         """
         Calculate metrics for multiple samples.
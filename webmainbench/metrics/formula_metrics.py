@@ -2,7 +2,7 @@
 Formula extraction metrics for WebMainBench.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import re
 from .base import BaseMetric, MetricResult
 from .text_metrics import EditDistanceMetric
@@ -21,24 +21,33 @@ class FormulaEditMetric(EditDistanceMetric):
         """计算公式的编辑距离"""
         
         # 从content_list中提取公式内容
-        pred_formula = self._extract_formula_content(predicted, predicted_content_list)
-        gt_formula = self._extract_formula_content(groundtruth, groundtruth_content_list)
+        pred_formula = self._select_content(predicted, predicted_content_list,
+                                          kwargs.get('predicted_split'))
+        gt_formula = self._select_content(groundtruth, groundtruth_content_list,
+                                        kwargs.get('groundtruth_split'))
         
         # 计算编辑距离
         result = super()._calculate_score(pred_formula, gt_formula, **kwargs)
+        return self._decorate_result(result, pred_formula, gt_formula)
+    
+    def _select_content(self, text: str, content_list: List[Dict[str, Any]] = None,
+                        split: Optional[Dict[str, str]] = None) -> str:
+        return self._extract_formula_content(text, content_list, split)
+    
+    def _decorate_result(self, result: MetricResult, predicted: str, groundtruth: str) -> MetricResult:
         result.metric_name = self.name
         result.details.update({
-            "predicted_formula_length": len(pred_formula),
-            "groundtruth_formula_length": len(gt_formula),
+            "predicted_formula_length": len(predicted),
+            "groundtruth_formula_length": len(groundtruth),
             "content_type": "formula"
         })
-        
         return result
     
-    def _extract_formula_content(self, text: str, content_list: List[Dict[str, Any]] = None) -> str:
+    def _extract_formula_content(self, text: str, content_list: List[Dict[str, Any]] = None,
+                                 split: Optional[Dict[str, str]] = None) -> str:
         """从文本和content_list中提取公式内容"""
-        # 使用统一的内容分割方法
-        content_parts = self.split_content(text, content_list)
+        # 使用统一的内容分割方法（优先复用预先计算的分割结果）
+        content_parts = self._get_content_parts(text, content_list, split)
         return content_parts.get('formula', '')
     
     def _extract_formulas_from_content_list(self, content_list: List[Dict[str, Any]]) -> List[str]:
@@ -0,0 +1,213 @@
+"""
+HTML parse backends for WebMainBench metrics.
+
+"html.parser" is the reference backend (BeautifulSoup with Python's built-in
+parser). "lxml" parses with lxml.html, which is several times faster but
+follows different rules: it closes optional end tags (<td>, <tr>, <p>) and
+repairs malformed markup, where html.parser keeps the literal nesting. The two
+trees can therefore differ. A document parsed by lxml is only used when every
+table serializes back to exactly its source text, which means it was
+well-formed and both parsers agree on it. Otherwise, or if lxml is not
+installed or fails, the reference backend parses the document. Scores do not
+depend on the backend.
+
+Select the backend with the `html_parser` key of the metric config.
+"""
+
+from typing import Any, List, Optional, Tuple
+import re
+
+from bs4 import BeautifulSoup
+
+
+DEFAULT_HTML_PARSER = "html.parser"
+
+HTML_TABLE_TAG = re.compile(r'<(/?)table(?=[\s/>])[^>]*>', re.IGNORECASE)
+
+# BeautifulSoup 序列化为 <tag/> 的空元素
+VOID_ELEMENTS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+    'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+    'command', 'frame', 'image', 'isindex', 'nextid', 'spacer',
+})
+
+
+# BeautifulSoup 保留其中空白字符串原样的元素
+PRESERVE_WHITESPACE_TAGS = frozenset({'pre', 'textarea'})
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+
+class HtmlParserBackend:
+    """Reference backend: BeautifulSoup with 'html.parser'."""
+
+    name = "html.parser"
+
+    def find_tables(self, html: str) -> List[Any]:
+        """All <table> elements in document order, nested tables included."""
+        return BeautifulSoup(html, "html.parser").find_all("table")
+
+    def is_top_level(self, table: Any) -> bool:
+        return table.find_parent("table") is None
+
+    def tag(self, element: Any) -> str:
+        return element.name
+
+    def children(self, element: Any) -> List[Any]:
+        return [child for child in element.children if getattr(child, 'name', None)]
+
+    def text(self, element: Any) -> str:
+        return element.get_text(strip=True)
+
+    def serialize(self, element: Any) -> str:
+        return str(element)
+
+    def agrees_with_reference(self, html: str, tables: List[Any]) -> bool:
+        """Whether the reference backend is guaranteed to find the same tables."""
+        return True
+
+
+class LxmlBackend(HtmlParserBackend):
+    """Fast backend: lxml.html with BeautifulSoup-compatible serialization."""
+
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml import etree
+        self._html = lxml.html
+        self._comment = etree.Comment
+
+    def find_tables(self, html: str) -> List[Any]:
+        root = self._html.fragment_fromstring(html, create_parent="div")
+        return list(root.iter("table"))
+
+    def is_top_level(self, table: Any) -> bool:
+        return next(table.iterancestors("table"), None) is None
+
+    def tag(self, element: Any) -> str:
+        return element.tag
+
+    def children(self, element: Any) -> List[Any]:
+        return [child for child in element if isinstance(child.tag, str)]
+
+    def text(self, element: Any) -> str:
+        # 与 get_text(strip=True) 相同：去掉每段文本首尾空白后直接拼接，不含注释
+        return "".join(piece.strip() for piece in element.itertext())
+
+    def serialize(self, element: Any) -> str:
+        parts: List[str] = []
+        self._serialize(element, parts)
+        return "".join(parts)
+
+    def agrees_with_reference(self, html: str, tables: List[Any]) -> bool:
+        # 每个顶层表格的序列化结果与源码逐字相同，说明表格标记规范，两种解析器得到同一棵树；
+        # 否则（隐含的闭标签、错误嵌套、实体等）交给参考实现
+        spans = html_table_spans(html)
+        if len(spans) != len(tables):
+            return False
+        for span, table in zip(spans, tables):
+            if not self.is_top_level(table):
+                continue  # 包含在外层表格的源码中
+            if span is None or html[span[0]:span[1]] != self.serialize(table):
+                return False
+        return True
+
+    def _serialize(self, element: Any, parts: List[str], preserve: bool = False) -> None:
+        if element.tag is self._comment:
+            parts.append(f"<!--{element.text or ''}-->")
+            return
+        if not isinstance(element.tag, str):
+            return
+        # BeautifulSoup 按属性名排序输出
+        attrs = "".join(f" {key}={_quote_attribute(value)}" for key, value in sorted(element.attrib.items()))
+        if element.tag in VOID_ELEMENTS and not len(element) and not element.text:
+            parts.append(f"<{element.tag}{attrs}/>")
+            return
+        parts.append(f"<{element.tag}{attrs}>")
+        preserve = preserve or element.tag in PRESERVE_WHITESPACE_TAGS
+        parts.append(_escape(_collapse_whitespace(element.text or "", preserve)))
+        for child in element:
+            self._serialize(child, parts, preserve)
+            parts.append(_escape(_collapse_whitespace(child.tail or "", preserve)))
+        parts.append(f"</{element.tag}>")
+
+
+def _collapse_whitespace(text: str, preserve: bool) -> str:
+    """BeautifulSoup keeps a string of only ASCII spaces as a single newline or space."""
+    if preserve or not text or text.strip(ASCII_SPACES):
+        return text
+    return "\n" if "\n" in text else " "
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _quote_attribute(value: str) -> str:
+    """Quote an attribute value like BeautifulSoup's minimal formatter."""
+    value = _escape(value)
+    if '"' in value:
+        if "'" in value:
+            return '"' + value.replace('"', "&quot;") + '"'
+        return "'" + value + "'"
+    return '"' + value + '"'
+
+
+def html_table_spans(text: str) -> List[Optional[Tuple[int, int]]]:
+    """按文档顺序（含嵌套表格）返回每个 <table> 的源码区间，未闭合的表格为 None。"""
+    spans: List[Optional[Tuple[int, int]]] = []
+    open_stack: List[int] = []
+    for match in HTML_TABLE_TAG.finditer(text):
+        if match.group(1):
+            if open_stack:
+                index = open_stack.pop()
+                spans[index] = (spans[index][0], match.end())
+        else:
+            open_stack.append(len(spans))
+            spans.append((match.start(), None))
+    return [span if span[1] is not None else None for span in spans]
+
+
+_REFERENCE_BACKEND = HtmlParserBackend()
+_backends = {HtmlParserBackend.name: _REFERENCE_BACKEND}
+
+
+def get_html_backend(name: Optional[str] = None) -> HtmlParserBackend:
+    """
+    Get a parse backend by name ("html.parser" or "lxml").
+
+    Falls back to "html.parser" when lxml is not installed.
+    """
+    name = name or DEFAULT_HTML_PARSER
+    backend = _backends.get(name)
+    if backend is not None:
+        return backend
+    if name != LxmlBackend.name:
+        raise ValueError(f"Unknown HTML parser '{name}', expected 'html.parser' or 'lxml'")
+    try:
+        backend = LxmlBackend()
+    except ImportError:
+        print("lxml is not installed, falling back to html.parser")
+        backend = _REFERENCE_BACKEND
+    _backends[name] = backend
+    return backend
+
+
+def find_tables(html: str, parser: Optional[str] = None) -> Tuple[HtmlParserBackend, List[Any]]:
+    """
+    Find all tables of an HTML string with the selected backend.
+
+    Returns:
+        (backend that parsed the document, table elements in document order)
+    """
+    backend = get_html_backend(parser)
+    if backend is _REFERENCE_BACKEND:
+        return backend, backend.find_tables(html)
+    try:
+        tables = backend.find_tables(html)
+        if backend.agrees_with_reference(html, tables):
+            return backend, tables
+    except Exception:
+        pass
+    # lxml 无法解析或可能与参考实现不一致时退回参考实现
+    return _REFERENCE_BACKEND, _REFERENCE_BACKEND.find_tables(html)
@@ -0,0 +1,203 @@
+"""
+Offset-based markdown content segmenter for WebMainBench.
+
+Splits markdown into code / formula / table / text parts. Every detected
+segment keeps its (start, end) offsets in the original text, so the remaining
+text is produced by slicing the gaps once instead of repeatedly calling
+``str.replace(segment, '', 1)``.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import re
+
+from .html_backend import find_tables, html_table_spans
+
+
+# 同时匹配行内代码 `...` 和代码块 ```...```
+CODE_PATTERN = re.compile(r'(```[\s\S]*?```|`[^`\n]+`)')
+
+# 统一的公式提取模式：(触发子串, 模式)。触发子串不存在时整条模式可直接跳过
+FORMULA_PATTERNS = [
+    ('$$', re.compile(r'(?<!\\)\$\$(.*?)(?<!\\)\$\$', re.DOTALL)),   # 行间 $$...$$，确保 $ 没有被转义
+    ('\\[', re.compile(r'(?<!\\)\\\[(.*?)(?<!\\)\\\]', re.DOTALL)),  # 行间 \[...\]，确保 \ 没有被转义
+    ('$', re.compile(r'(?<!\\)\$(.*?)(?<!\\)\$', re.DOTALL)),        # 行内 $...$，确保 $ 没有被转义
+    ('\\(', re.compile(r'(?<!\\)\\\((.*?)(?<!\\)\\\)', re.DOTALL)),  # 行内 \(...\)，确保 \ 没有被转义
+]
+
+MD_SEPARATOR_CELL = re.compile(r"^:?\-{3,}:?$")
+BLANK_LINES = re.compile(r'\n\s*\n')
+
+# (start, end, segment)；start 为 None 表示片段在原文中没有逐字对应的位置
+Segment = Tuple[Optional[int], Optional[int], str]
+
+
+def _empty_parts() -> Dict[str, str]:
+    return {'code': '', 'formula': '', 'table': '', 'text': ''}
+
+
+def _find_code(text: str, segments: List[Segment], code_parts: List[str]) -> None:
+    if '`' not in text:
+        return
+    for match in CODE_PATTERN.finditer(text):
+        code_segment = match.group(0)
+        segments.append((match.start(), match.end(), code_segment))
+
+        if code_segment.startswith('```'):
+            # 处理代码块（保留内部缩进），移除首尾的```标记
+            code_content = '\n'.join(code_segment.split('\n')[1:-1])
+        else:
+            # 处理行内代码（只去除外层`和前后空格）
+            code_content = code_segment[1:-1].strip()
+
+        if code_content:
+            code_parts.append(code_content)
+
+
+def _find_formulas(text: str, segments: List[Segment], formula_parts: List[str]) -> None:
+    # 各模式独立扫描全文（与历史行为一致，允许不同模式的匹配相互重叠）
+    for trigger, pattern in FORMULA_PATTERNS:
+        if trigger not in text:
+            continue
+        for match in pattern.finditer(text):
+            segments.append((match.start(), match.end(), match.group(0)))
+            formula_content = match.group(1).strip()
+            if formula_content:
+                formula_parts.append(formula_content)
+
+
+def _find_html_tables(text: str, segments: List[Segment], table_parts: List[str],
+                      html_parser: Optional[str] = None) -> bool:
+    """
+    提取 HTML 表格。表格内容沿用 BeautifulSoup 的序列化结果以保持输出不变，
+    但只有文本中确实出现 <table 时才解析。
+
+    Returns:
+        False 表示无法为表格可靠定位源码区间，调用方需要退回逐段替换
+    """
+    if '<table' not in text.lower():
+        return True
+
+    backend, elements = find_tables(text, html_parser)
+    tables = [backend.serialize(table) for table in elements]
+    spans = html_table_spans(text)
+    aligned = len(spans) == len(tables)
+
+    for i, html_table in enumerate(tables):
+        table_parts.append(html_table)
+        span = spans[i] if aligned else None
+        if span is not None and text[span[0]:span[1]] == html_table:
+            segments.append((span[0], span[1], html_table))
+        else:
+            # 序列化结果与源码不一致：历史实现的 replace 不会命中源码中的表格
+            segments.append((None, None, html_table))
+    return aligned
+
+
+def _find_markdown_tables(text: str, segments: List[Segment], table_parts: List[str]) -> None:
+    if '|' not in text:
+        return
+
+    def is_md_separator_line(line):
+        for p in line.split("|"):
+            p = p.strip()
+            if p and not MD_SEPARATOR_CELL.match(p):
+                return False
+        return True
+
+    table_lines: List[str] = []
+    table_start = 0
+    offset = 0
+
+    def save_table():
+        # 只有当表格行数大于等于2，且第二行是分隔行时才保存
+        if len(table_lines) >= 2 and is_md_separator_line(table_lines[1]):
+            md_table = '\n'.join(table_lines)
+            segments.append((table_start, table_start + len(md_table), md_table))
+            table_parts.append(md_table)
+
+    for line in text.split('\n'):
+        if line.count("|") >= 3:
+            if not table_lines:
+                table_start = offset
+            table_lines.append(line)
+        elif table_lines:
+            save_table()
+            table_lines = []
+        offset += len(line) + 1
+
+    # 处理文档末尾的 Markdown 表格
+    if table_lines:
+        save_table()
+
+
+def remove_segments_by_replace(text: str, segments: List[str]) -> str:
+    """逐段移除（历史实现）：按顺序删除每个片段在当前文本中的第一次出现。"""
+    clean_text = text
+    for segment in segments:
+        clean_text = clean_text.replace(segment, '', 1)
+    return clean_text
+
+
+def _remove_segments_by_offset(text: str, segments: List[Segment]) -> Optional[str]:
+    """
+    按源码区间一次性切片得到剩余文本。
+
+    所有片段都有源码区间且区间互不重叠时，按区间切片与按顺序逐段 replace 的结果
+    相同（真实页面中各片段都在原位被移除）。存在重叠（如代码中的 $...$ 同时被识别为
+    公式）或表格无法定位时返回 None，由调用方退回逐段替换。
+    """
+    if any(start is None for start, _, _ in segments):
+        return None
+
+    spans = sorted((start, end) for start, end, _ in segments if start != end)
+    for (_, prev_end), (start, _) in zip(spans, spans[1:]):
+        if start < prev_end:
+            return None
+
+    pieces = []
+    cursor = 0
+    for start, end in spans:
+        pieces.append(text[cursor:start])
+        cursor = end
+    pieces.append(text[cursor:])
+    return ''.join(pieces)
+
+
+def split_markdown(text: str, html_parser: Optional[str] = None) -> Dict[str, str]:
+    """
+    从markdown文本中提取代码、公式、表格和剩余文本。
+
+    Args:
+        text: 原始markdown文本
+        html_parser: HTML表格的解析后端（"html.parser" 或 "lxml"，默认 "html.parser"）
+
+    Returns:
+        Dict with keys: 'code', 'formula', 'table', 'text'
+    """
+    if not text:
+        return _empty_parts()
+
+    # 片段顺序与历史实现一致：代码、公式、HTML表格、Markdown表格
+    segments: List[Segment] = []
+    code_parts: List[str] = []
+    formula_parts: List[str] = []
+    table_parts: List[str] = []
+
+    _find_code(text, segments, code_parts)
+    _find_formulas(text, segments, formula_parts)
+    tables_aligned = _find_html_tables(text, segments, table_parts, html_parser)
+    _find_markdown_tables(text, segments, table_parts)
+
+    clean_text = _remove_segments_by_offset(text, segments) if tables_aligned else None
+    if clean_text is None:
+        clean_text = remove_segments_by_replace(text, [segment for _, _, segment in segments])
+
+    # 清理多余的空行
+    clean_text = BLANK_LINES.sub('\n\n', clean_text).strip()
+
+    return {
+        'code': '\n'.join(code_parts),
+        'formula': '\n'.join(formula_parts),
+        'table': '\n'.join(table_parts),
+        'text': clean_text
+    }
@@ -0,0 +1,109 @@
+"""
+Table matching helpers for WebMainBench.
+
+Pairs the tables of a prediction with the tables of the groundtruth by an
+optimal assignment on a cheap similarity, so that TEDS can be computed per
+matched pair instead of on a single concatenated table.
+"""
+
+from typing import List, Sequence, Tuple
+
+from .tree_edit import TableTree, distance_bounds
+
+
+def linear_sum_assignment(cost: Sequence[Sequence[float]]) -> Tuple[List[int], List[int]]:
+    """
+    Minimum-cost assignment of a rectangular cost matrix.
+
+    Uses scipy when it is installed and a pure-Python Hungarian algorithm
+    otherwise (scipy is not a dependency of WebMainBench).
+
+    Returns:
+        (row indices, column indices) of the assigned pairs, sorted by row
+    """
+    if not len(cost) or not len(cost[0]):
+        return [], []
+    try:
+        from scipy.optimize import linear_sum_assignment as scipy_assignment
+    except ImportError:
+        return _hungarian([list(row) for row in cost])
+    rows, cols = scipy_assignment(cost)
+    return rows.tolist(), cols.tolist()
+
+
+def _hungarian(cost: List[List[float]]) -> Tuple[List[int], List[int]]:
+    """O(n^2 m) Hungarian algorithm with potentials (n <= m after transposing)."""
+    transposed = len(cost) > len(cost[0])
+    if transposed:
+        cost = [list(column) for column in zip(*cost)]
+    n, m = len(cost), len(cost[0])
+
+    inf = float('inf')
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    # assigned[j]: 第j列匹配的行（从1开始，0表示未匹配）
+    assigned = [0] * (m + 1)
+    way = [0] * (m + 1)
+
+    for i in range(1, n + 1):
+        assigned[0] = i
+        j0 = 0
+        min_values = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = assigned[j0]
+            delta = inf
+            j1 = 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    current = row[j - 1] - u[i0] - v[j]
+                    if current < min_values[j]:
+                        min_values[j] = current
+                        way[j] = j0
+                    if min_values[j] < delta:
+                        delta = min_values[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[assigned[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_values[j] -= delta
+            j0 = j1
+            if assigned[j0] == 0:
+                break
+        # 沿增广路径更新匹配
+        while j0:
+            j1 = way[j0]
+            assigned[j0] = assigned[j1]
+            j0 = j1
+
+    pairs = [(assigned[j] - 1, j - 1) for j in range(1, m + 1) if assigned[j]]
+    if transposed:
+        pairs = [(col, row) for row, col in pairs]
+    pairs.sort()
+    return [row for row, _ in pairs], [col for _, col in pairs]
+
+
+def table_similarity(tree1: TableTree, tree2: TableTree) -> float:
+    """Cheap TEDS estimate: midpoint of the scores implied by distance_bounds."""
+    max_nodes = max(len(tree1), len(tree2))
+    if not max_nodes:
+        return 1.0
+    lower, upper = distance_bounds(tree1, tree2)
+    return max(0.0, 1.0 - (lower + upper) / (2.0 * max_nodes))
+
+
+def match_tables(pred_trees: Sequence[TableTree],
+                 gt_trees: Sequence[TableTree]) -> List[Tuple[int, int]]:
+    """
+    Pair predicted and groundtruth tables by maximum total similarity.
+
+    Returns:
+        List of (predicted index, groundtruth index); at most min(len, len) pairs
+    """
+    cost = [[-table_similarity(pred, gt) for gt in gt_trees] for pred in pred_trees]
+    rows, cols = linear_sum_assignment(cost)
+    return list(zip(rows, cols))
@@ -2,7 +2,7 @@
 Table extraction metrics for WebMainBench.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import re
 from .base import BaseMetric, MetricResult
 from .teds_metrics import TEDSMetric, StructureTEDSMetric
@@ -22,24 +22,33 @@ class TableEditMetric(EditDistanceMetric):
         """计算表格内容的编辑距离"""
         
         # 从content_list中提取表格内容
-        pred_table = self._extract_table_content(predicted, predicted_content_list)
-        gt_table = self._extract_table_content(groundtruth, groundtruth_content_list)
+        pred_table = self._select_content(predicted, predicted_content_list,
+                                          kwargs.get('predicted_split'))
+        gt_table = self._select_content(groundtruth, groundtruth_content_list,
+                                        kwargs.get('groundtruth_split'))
         
         # 计算编辑距离
         result = super()._calculate_score(pred_table, gt_table, **kwargs)
+        return self._decorate_result(result, pred_table, gt_table)
+    
+    def _select_content(self, text: str, content_list: List[Dict[str, Any]] = None,
+                        split: Optional[Dict[str, str]] = None) -> str:
+        return self._extract_table_content(text, content_list, split)
+    
+    def _decorate_result(self, result: MetricResult, predicted: str, groundtruth: str) -> MetricResult:
         result.metric_name = self.name
         result.details.update({
-            "predicted_table_length": len(pred_table),
-            "groundtruth_table_length": len(gt_table),
+            "predicted_table_length": len(predicted),
+            "groundtruth_table_length": len(groundtruth),
             "content_type": "table"
         })
-        
         return result
     
-    def _extract_table_content(self, text: str, content_list: List[Dict[str, Any]] = None) -> str:
+    def _extract_table_content(self, text: str, content_list: List[Dict[str, Any]] = None,
+                               split: Optional[Dict[str, str]] = None) -> str:
         """从文本和content_list中提取表格内容"""
-        # 使用统一的内容分割方法
-        content_parts = self.split_content(text, content_list)
+        # 使用统一的内容分割方法（优先复用预先计算的分割结果）
+        content_parts = self._get_content_parts(text, content_list, split)
         return content_parts.get('table', '')
     
     def _extract_tables_from_content_list(self, content_list: List[Dict[str, Any]]) -> List[str]:
@@ -88,8 +97,10 @@ class TableTEDSMetric(TEDSMetric):
         """计算表格的TEDS分数"""
         
         # 从content_list中提取表格内容
-        pred_table = self._extract_table_content(predicted, predicted_content_list)
-        gt_table = self._extract_table_content(groundtruth, groundtruth_content_list)
+        pred_table = self._extract_table_content(predicted, predicted_content_list,
+                                                 kwargs.get('predicted_split'))
+        gt_table = self._extract_table_content(groundtruth, groundtruth_content_list,
+                                               kwargs.get('groundtruth_split'))
         
         # 使用父类的TEDS计算
         result = super()._calculate_score(pred_table, gt_table, **kwargs)
@@ -101,8 +112,9 @@ class TableTEDSMetric(TEDSMetric):
         
         return result
     
-    def _extract_table_content(self, text: str, content_list: List[Dict[str, Any]] = None) -> str:
+    def _extract_table_content(self, text: str, content_list: List[Dict[str, Any]] = None,
+                               split: Optional[Dict[str, str]] = None) -> str:
         """从文本和content_list中提取表格内容"""
-        # 使用统一的内容分割方法
-        content_parts = self.split_content(text, content_list)
+        # 使用统一的内容分割方法（优先复用预先计算的分割结果）
+        content_parts = self._get_content_parts(text, content_list, split)
         return content_parts.get('table', '') 
\ No newline at end of file
@@ -8,74 +8,77 @@ The TEDS algorithm represents tables as tree structures and calculates
 similarity using tree edit distance.
 """
 
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 import re
-from bs4 import BeautifulSoup
-from rapidfuzz.distance import Levenshtein
-from apted import APTED, Config
+import threading
 from .base import BaseMetric, MetricResult
+from .html_backend import HtmlParserBackend, find_tables, get_html_backend
+from .table_matching import match_tables
+from .tree_edit import TableTree, distance_bounds, legacy_distance, tree_edit_distance
 
 
-class TableConfig(Config):
-    def delete(self, node):
-        return 1
+# 开闭table标签，用于在混合文本中找出HTML表格之外的部分
+_TABLE_TAG = re.compile(r'<(/?)table\b[^>]*>', re.IGNORECASE)
 
-    def insert(self, node):
-        return 1
+# table_pool="process"时每个工作进程内的TEDS指标，由 _init_table_worker 构建一次
+_table_worker_state: Dict[str, Any] = {}
 
-    def rename(self, node1, node2):
-        # 解析节点标签，格式为 "tag:text"
-        tag1, text1 = self._parse_node(node1)
-        tag2, text2 = self._parse_node(node2)
-        
-        if tag1 != tag2:
-            return 1
-        
-        if text1 == text2:
-            return 0
-        
-        # 计算文本编辑距离
-        return self._levenshtein(text1, text2)
-
-    def _parse_node(self, node_str):
-        """解析节点字符串，格式为 'tag:text' 或 'tag'"""
-        if ':' in node_str:
-            tag, text = node_str.split(':', 1)
-            return tag, text
-        else:
-            return node_str, ""
 
-    def _levenshtein(self, a, b):
-        """计算文本编辑距离"""
-        if not a and not b:
-            return 0
-        if not a:
-            return len(b)  # 空字符串到非空字符串，成本为字符串长度
-        if not b:
-            return len(a)  # 非空字符串到空字符串，成本为字符串长度
-        
-        # 计算原始编辑距离
-        raw_distance = Levenshtein.distance(a, b)
-        
-        # 使用与text_metrics.py相同的归一化方式：基于较长字符串的长度
-        max_len = max(len(a), len(b))
-        if max_len == 0:
-            return 0
-        
-        # 归一化到0-1范围
-        return raw_distance / max_len
+def _init_table_worker(name: str, config: Dict[str, Any]) -> None:
+    """Process pool initializer: build the metric of this worker."""
+    _table_worker_state['metric'] = TEDSMetric(name, config)
+
+
+def _compare_in_worker(pred_tree: TableTree, gt_tree: TableTree):
+    """Run _compare_trees with the metric of this worker."""
+    return _table_worker_state['metric']._compare_trees(pred_tree, gt_tree)
 
 
 class TEDSMetric(BaseMetric):
-    """TEDS (Tree-Edit Distance based Similarity) metric for table evaluation."""
+    """
+    TEDS (Tree-Edit Distance based Similarity) metric for table evaluation.
+
+    Config:
+        structure_only: Ignore cell text (S-TEDS)
+        ignore_nodes: Tags whose level is skipped when building the tree
+        tolerance: Skip the exact distance when cheap bounds pin the score within
+            this width (default 0.0: only when the bounds coincide)
+        node_budget: Optional maximum number of nodes for the exact distance;
+            larger tables are scored from the bounds
+        multi_table: Score every table of a page: tables of both sides are paired
+            by an optimal assignment and the per-pair scores are averaged with
+            node-count weights (default False: only the first table)
+        table_workers: Pool size used for pages with several matched tables
+            in multi_table mode (default 1: serial). The pool is created on first
+            use and kept for the lifetime of the metric; close_pool() shuts it down
+        table_pool: "thread" or "process" (default "thread")
+        html_parser: HTML parse backend, "html.parser" (default) or "lxml"
+        legacy_distance: Score with the distance of the original implementation,
+            one rename cost between the bracket notations of both tables (default
+            True, see tree_edit.legacy_distance); False uses the tree edit distance
+    """
     
     version = "1.0.0"
     description = "Table evaluation using Tree-Edit Distance based Similarity (TEDS)"
     
+    # 保护表格比较池的惰性创建（打分可能在多个线程中并发进行）
+    _pool_lock = threading.Lock()
+    
+    _MARKDOWN_SEPARATOR = re.compile(r'^[\s\|\-:]+$')
+    
     def _setup(self) -> None:
         self.structure_only = self.config.get('structure_only', False)
         self.ignore_nodes = self.config.get('ignore_nodes', ['tbody', 'thead', 'tfoot'])
-        self.config_apted = TableConfig()
+        # 上下界确定的分数区间不超过tolerance时跳过精确计算
+        self.tolerance = self.config.get('tolerance', 0.0)
+        # 节点数超过预算的表格只使用上下界
+        self.node_budget = self.config.get('node_budget')
+        self.multi_table = self.config.get('multi_table', False)
+        self.table_workers = self.config.get('table_workers', 1)
+        self.table_pool = self.config.get('table_pool', 'thread')
+        self.html_parser = self.config.get('html_parser')
+        self.legacy_distance = self.config.get('legacy_distance', True)
     
     def _calculate_score(self, predicted: Any, groundtruth: Any, **kwargs) -> MetricResult:
         try:
@@ -90,6 +93,9 @@ class TEDSMetric(BaseMetric):
                     f"Skipped due to table_edit failure: {table_edit_result.details.get('error', 'unknown reason')}"
                 )
 
+            if self.multi_table:
+                return self._calculate_multi_table(predicted, groundtruth)
+
             pred_html = self._normalize_to_html(predicted)
             gt_html = self._normalize_to_html(groundtruth)
 
@@ -110,28 +116,10 @@ class TEDSMetric(BaseMetric):
                     details={"note": "One table is empty or invalid"}
                 )
 
-            edit_distance = self._tree_edit_distance(pred_tree, gt_tree)
-            max_nodes = max(self._count_nodes(pred_tree), self._count_nodes(gt_tree))
-            
-            # 使用归一化方式计算TEDS分数
-            if max_nodes > 0:
-                # 标准TEDS公式：1.0 - (edit_distance / max_nodes)
-                teds_score = 1.0 - (edit_distance / max_nodes)
-            else:
-                teds_score = 1.0
-
-            details = {
-                "edit_distance": edit_distance,
-                "predicted_nodes": self._count_nodes(pred_tree),
-                "groundtruth_nodes": self._count_nodes(gt_tree),
-                "max_nodes": max_nodes,
-                "structure_only": self.structure_only,
-                "algorithm": "TEDS"
-            }
-
+            score, details = self._compare_trees(pred_tree, gt_tree)
             return MetricResult(
                 metric_name=self.name,
-                score=max(0.0, min(1.0, teds_score)),
+                score=score,
                 details=details
             )
 
@@ -140,6 +128,217 @@ class TEDSMetric(BaseMetric):
                 self.name, f"TEDS calculation failed: {str(e)}"
             )
 
+    def _calculate_multi_table(self, predicted: Any, groundtruth: Any) -> MetricResult:
+        """Match all tables of both sides and average per-pair TEDS by node count."""
+        pred_trees = self._parse_all_tables(predicted)
+        gt_trees = self._parse_all_tables(groundtruth)
+
+        if not pred_trees and not gt_trees:
+            return MetricResult(
+                metric_name=self.name,
+                score=1.0,
+                details={"note": "Both tables are empty or invalid"}
+            )
+
+        pairs = match_tables(pred_trees, gt_trees)
+        pair_results = self._compare_pairs([(pred_trees[p], gt_trees[g]) for p, g in pairs])
+
+        tables = []
+        weighted_score = 0.0
+        total_weight = 0
+        for (p, g), (score, details) in zip(pairs, pair_results):
+            weight = details["max_nodes"]
+            weighted_score += score * weight
+            total_weight += weight
+            tables.append({"predicted_index": p, "groundtruth_index": g, "score": score,
+                           "weight": weight, "exact": details["exact"]})
+
+        # 未匹配的表格（多抽取或漏抽取）记0分，按自身节点数计权重
+        matched_pred = {p for p, _ in pairs}
+        matched_gt = {g for _, g in pairs}
+        unmatched = [len(tree) for i, tree in enumerate(pred_trees) if i not in matched_pred]
+        unmatched += [len(tree) for i, tree in enumerate(gt_trees) if i not in matched_gt]
+        total_weight += sum(unmatched)
+
+        score = weighted_score / total_weight if total_weight > 0 else 1.0
+        details = {
+            "predicted_tables": len(pred_trees),
+            "groundtruth_tables": len(gt_trees),
+            "matched_tables": len(pairs),
+            "unmatched_tables": len(unmatched),
+            "predicted_nodes": sum(len(tree) for tree in pred_trees),
+            "groundtruth_nodes": sum(len(tree) for tree in gt_trees),
+            "structure_only": self.structure_only,
+            "algorithm": "TEDS",
+            "exact": all(table["exact"] for table in tables),
+            "tables": tables,
+        }
+        return MetricResult(
+            metric_name=self.name,
+            score=max(0.0, min(1.0, score)),
+            details=details
+        )
+
+    def _compare_pairs(self, tree_pairs: List[Tuple[TableTree, TableTree]]):
+        """Run _compare_trees on every pair, in a pool when there are several pairs."""
+        if self.table_workers <= 1 or len(tree_pairs) < 2:
+            return [self._compare_trees(pred, gt) for pred, gt in tree_pairs]
+
+        preds = [pred for pred, _ in tree_pairs]
+        gts = [gt for _, gt in tree_pairs]
+        # 进程池的工作进程各自持有一份指标，只需传递表格树
+        compare = _compare_in_worker if self.table_pool == "process" else self._compare_trees
+        return list(self._table_executor().map(compare, preds, gts))
+
+    def _table_executor(self):
+        """The pool of this metric, created on first use and reused across pages."""
+        with self._pool_lock:
+            executor = self.__dict__.get('_executor')
+            if executor is None:
+                if self.table_pool == "process":
+                    executor = ProcessPoolExecutor(max_workers=self.table_workers,
+                                                   initializer=_init_table_worker,
+                                                   initargs=(self.name, self.config))
+                else:
+                    executor = ThreadPoolExecutor(max_workers=self.table_workers)
+                self._executor = executor
+            return executor
+
+    def close_pool(self) -> None:
+        """Shut down the table comparison pool; it is created again on next use."""
+        with self._pool_lock:
+            executor = self.__dict__.pop('_executor', None)
+        if executor is not None:
+            executor.shutdown()
+
+    def __getstate__(self):
+        # 线程池/进程池不能跨进程传递
+        state = self.__dict__.copy()
+        state.pop('_executor', None)
+        return state
+
+    def _parse_all_tables(self, table_data: Any) -> List[TableTree]:
+        """Parse every top-level table (HTML, markdown or list data) into trees."""
+        if isinstance(table_data, str) and '<table' in table_data.lower():
+            # HTML表格由解析器从整段文本中取出；HTML表格之外的markdown表格同样参与比较
+            html_tables = [table_data]
+            markdown = self._strip_html_tables(table_data)
+            if '|' in markdown:
+                html_tables.extend(self._markdown_to_html(block)
+                                   for block in self._split_markdown_tables(markdown)
+                                   if self._is_markdown_table(block))
+        elif isinstance(table_data, str) and '|' in table_data:
+            html_tables = [self._markdown_to_html(block) for block in self._split_markdown_tables(table_data)]
+        else:
+            html_tables = [self._normalize_to_html(table_data)]
+
+        trees = []
+        for html_str in html_tables:
+            if not html_str.strip():
+                continue
+            backend, tables = find_tables(html_str, self.html_parser)
+            # 嵌套表格作为外层表格的一部分
+            trees.extend(self._element_to_tree(table, backend) for table in tables
+                         if backend.is_top_level(table))
+        return trees
+
+    @staticmethod
+    def _strip_html_tables(text: str) -> str:
+        """The text outside top-level HTML tables (an unclosed table runs to the end)."""
+        outside = []
+        depth, last = 0, 0
+        for match in _TABLE_TAG.finditer(text):
+            if match.group(1):
+                if depth == 0:
+                    continue  # 多余的闭标签
+                depth -= 1
+                if depth == 0:
+                    last = match.end()
+            else:
+                if depth == 0:
+                    outside.append(text[last:match.start()])
+                depth += 1
+        if depth == 0:
+            outside.append(text[last:])
+        return '\n'.join(outside)
+
+    @classmethod
+    def _is_markdown_table(cls, block: str) -> bool:
+        """Whether a block is a markdown table: a header row followed by a separator row."""
+        lines = [line.strip() for line in block.split('\n') if line.strip()]
+        return len(lines) >= 2 and '|' in lines[0] and bool(cls._MARKDOWN_SEPARATOR.match(lines[1]))
+
+    @classmethod
+    def _split_markdown_tables(cls, markdown: str) -> List[str]:
+        """Split consecutive markdown tables: a table starts at a row followed by a separator row."""
+        separator = cls._MARKDOWN_SEPARATOR
+        lines = [line.strip() for line in markdown.split('\n') if line.strip()]
+        blocks: List[List[str]] = []
+        for i, line in enumerate(lines):
+            starts_table = (i + 1 < len(lines) and separator.match(lines[i + 1])
+                            and not separator.match(line))
+            if starts_table or not blocks:
+                blocks.append([])
+            blocks[-1].append(line)
+        return ['\n'.join(block) for block in blocks]
+
+    def _compare_trees(self, pred_tree: TableTree, gt_tree: TableTree):
+        """
+        Compute the TEDS score of two table trees.
+
+        Cheap distance bounds are computed first; the exact tree edit distance is
+        skipped when the bounds already pin the score within `tolerance`, or when
+        a tree exceeds `node_budget`. In both cases the score is derived from the
+        upper distance bound, i.e. it is a lower bound of the true score.
+
+        Returns:
+            (score, details)
+        """
+        max_nodes = max(len(pred_tree), len(gt_tree))
+        if self.legacy_distance:
+            # 原实现的距离只需一次字符串比较，直接作为精确值
+            lower = upper = legacy_distance(pred_tree, gt_tree)
+        else:
+            lower, upper = distance_bounds(pred_tree, gt_tree)
+        # 距离的上下界对应分数的下上界
+        score_lower = self._teds_score(upper, max_nodes)
+        score_upper = self._teds_score(lower, max_nodes)
+
+        bounded_by = None
+        if lower == upper:
+            edit_distance = upper
+        elif score_upper - score_lower <= self.tolerance:
+            edit_distance, bounded_by = upper, "tolerance"
+        elif self.node_budget is not None and max_nodes > self.node_budget:
+            edit_distance, bounded_by = upper, "node_budget"
+        else:
+            edit_distance = self._tree_edit_distance(pred_tree, gt_tree)
+
+        details = {
+            "edit_distance": edit_distance,
+            "predicted_nodes": len(pred_tree),
+            "groundtruth_nodes": len(gt_tree),
+            "max_nodes": max_nodes,
+            "structure_only": self.structure_only,
+            "algorithm": "TEDS",
+            "exact": bounded_by is None,
+        }
+        if bounded_by is not None:
+            details.update({
+                "score_bound": "lower",
+                "bounded_by": bounded_by,
+                "score_lower": score_lower,
+                "score_upper": score_upper,
+            })
+        return self._teds_score(edit_distance, max_nodes), details
+
+    @staticmethod
+    def _teds_score(edit_distance: float, max_nodes: int) -> float:
+        # 标准TEDS公式：1.0 - (edit_distance / max_nodes)
+        if max_nodes <= 0:
+            return 1.0
+        return max(0.0, min(1.0, 1.0 - edit_distance / max_nodes))
+
     def _normalize_to_html(self, table_data: Any) -> str:
         if table_data is None:
             return ""
@@ -187,84 +386,50 @@ class TEDSMetric(BaseMetric):
         html_parts.append("</table>")
         return ''.join(html_parts)
 
-    def _parse_html_table(self, html_str: str) -> Optional[Dict]:
+    def _parse_html_table(self, html_str: str) -> Optional[TableTree]:
         if not html_str.strip():
             return None
         try:
-            soup = BeautifulSoup(html_str, 'html.parser')
-            table = soup.find('table')
-            if table is None:
+            backend, tables = find_tables(html_str, self.html_parser)
+            if not tables:
                 return None
-            return self._element_to_tree(table)
+            return self._element_to_tree(tables[0], backend)
         except Exception:
             return None
 
-    def _element_to_tree(self, element) -> Dict:
-        tree = {
-            'tag': element.name,
-            'attrs': dict(element.attrs) if hasattr(element, 'attrs') else {},
-            'text': element.get_text(strip=True) if not self.structure_only else "",
-            'children': []
-        }
-        if element.name in self.ignore_nodes:
-            for child in element.children:
-                if hasattr(child, 'name') and child.name:
-                    tree['children'].extend(self._element_to_tree(child)['children'])
-        else:
-            for child in element.children:
-                if hasattr(child, 'name') and child.name:
-                    tree['children'].append(self._element_to_tree(child))
+    def _element_to_tree(self, element, backend: Optional[HtmlParserBackend] = None) -> TableTree:
+        """将表格元素转换为后序存储的紧凑节点数组，节点标签只计算一次"""
+        tree = TableTree()
+        self._add_element(tree, element, backend or get_html_backend())
         return tree
 
-    def _tree_edit_distance(self, tree1: Dict, tree2: Dict) -> float:
-        """使用APTED计算树编辑距离"""
-        try:
-            # 转换为APTED的括号表示法
-            t1 = self._to_bracket_notation(tree1)
-            t2 = self._to_bracket_notation(tree2)
-            
-            # 使用APTED计算编辑距离
-            apted = APTED(t1, t2, self.config_apted)
-            edit_distance = apted.compute_edit_distance()
-            
-            return float(edit_distance)
-        except Exception as e:
-            # 如果APTED失败，回退到简单的节点计数差异
-            print(f"APTED calculation failed: {e}, falling back to simple distance")
-            nodes1 = self._count_nodes(tree1)
-            nodes2 = self._count_nodes(tree2)
-            return abs(nodes1 - nodes2)
-
-    def _to_bracket_notation(self, node: Dict) -> str:
-        """将字典树转换为APTED的括号表示法"""
-        # 构建节点标签
-        tag = node['tag']
-        text = node.get('text', '')
-        
-        # 在结构模式下，忽略文本内容
-        if self.structure_only:
-            label = tag
-        else:
-            # 在完整模式下，包含文本内容
-            if text:
-                # 处理文本中的特殊字符，避免APTED解析错误
-                safe_text = text.replace('(', '[').replace(')', ']').replace(',', ';')
-                label = f"{tag}:{safe_text}"
+    def _add_element(self, tree: TableTree, element, backend: HtmlParserBackend) -> int:
+        """按后序追加元素及其子树，返回该节点的最左叶子"""
+        leftmost = self._add_children(tree, element, backend)
+        text = backend.text(element) if not self.structure_only else ""
+        return tree.append(backend.tag(element), text, leftmost)
+
+    def _add_children(self, tree: TableTree, element, backend: HtmlParserBackend) -> Optional[int]:
+        """追加元素的子节点；ignore_nodes中的节点由其子元素的子节点代替"""
+        leftmost = None
+        ignored = backend.tag(element) in self.ignore_nodes
+        for child in backend.children(element):
+            if ignored:
+                child_leftmost = self._add_children(tree, child, backend)
             else:
-                label = tag
-        
-        # 如果没有子节点，返回标签
-        if not node.get('children'):
-            return label
-        
-        # 有子节点，递归处理
-        children_str = ",".join([self._to_bracket_notation(c) for c in node['children']])
-        return f"{label}({children_str})"
-
-    def _count_nodes(self, tree: Dict) -> int:
+                child_leftmost = self._add_element(tree, child, backend)
+            if leftmost is None:
+                leftmost = child_leftmost
+        return leftmost
+
+    def _tree_edit_distance(self, tree1: TableTree, tree2: TableTree) -> float:
+        """计算两棵树的编辑距离（向量化的Zhang-Shasha算法）"""
+        return tree_edit_distance(tree1, tree2)
+
+    def _count_nodes(self, tree: Optional[TableTree]) -> int:
         if tree is None:
             return 0
-        return 1 + sum(self._count_nodes(c) for c in tree.get('children', []))
+        return len(tree)
 
 
 class StructureTEDSMetric(TEDSMetric):
@@ -2,14 +2,28 @@
 Text-based metrics for WebMainBench.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Union
 import difflib
 import re
 from .base import BaseMetric, MetricResult
 from rapidfuzz.distance import Levenshtein
 
 class EditDistanceMetric(BaseMetric):
-    """Edit distance (Levenshtein distance) metric."""
+    """
+    Edit distance (Levenshtein distance) metric.
+    
+    Config:
+        normalize: Normalize the distance into a similarity score (default True)
+        score_cutoff: Optional normalized score threshold. Distances that would push
+            the score below it are not computed exactly; the reported score is then an
+            upper bound of the true score
+        approximate: Opt-in chunked, alignment-based approximation for huge texts;
+            the reported score is then a lower bound of the true score
+        approximate_min_length: Only approximate when the longer text has at least
+            this many characters (default 50000)
+        chunk_size: Maximum length of the pieces compared exactly in approximate mode
+            (default 5000)
+    """
     
     version = "1.0.0"
     description = "Character-level edit distance metric"
@@ -17,6 +31,10 @@ class EditDistanceMetric(BaseMetric):
     def _setup(self) -> None:
         """Setup the edit distance metric."""
         self.normalize = self.config.get('normalize', True)
+        self.score_cutoff = self.config.get('score_cutoff')
+        self.approximate = self.config.get('approximate', False)
+        self.approximate_min_length = self.config.get('approximate_min_length', 50000)
+        self.chunk_size = self.config.get('chunk_size', 5000)
     
     def _calculate_score(self, predicted: str, groundtruth: str, **kwargs) -> MetricResult:
         """
@@ -34,16 +52,38 @@ class EditDistanceMetric(BaseMetric):
                 self.name, "Both inputs must be strings"
             )
         
-        # Calculate edit distance using difflib
-        distance = self._levenshtein_distance(predicted, groundtruth)
+        distance, score_bound = self._compute_distance(predicted, groundtruth)
+        return self._make_result(predicted, groundtruth, distance, score_bound)
+    
+    def _compute_distance(self, predicted: str, groundtruth: str):
+        """
+        Compute the (possibly bounded or approximate) distance of one pair.
+        
+        Returns:
+            (distance, score_bound)；score_bound为None表示精确值，
+            "upper"/"lower"表示按距离归一化后的分数是真实分数的上界/下界
+        """
+        max_len = max(len(predicted), len(groundtruth))
+        
+        if self.approximate and max_len >= self.approximate_min_length:
+            # 分块近似得到的是一个合法编辑序列的代价，不小于真实距离
+            return self._chunked_distance(predicted, groundtruth), "lower"
+        
+        if self.normalize and self.score_cutoff is not None and max_len > 0:
+            # 分数低于阈值时提前结束，此时返回值为 max_distance + 1
+            max_distance = int((1.0 - self.score_cutoff) * max_len)
+            distance = self._levenshtein_distance(predicted, groundtruth, max_distance)
+            return distance, ("upper" if distance > max_distance else None)
+        
+        return self._levenshtein_distance(predicted, groundtruth), None
+    
+    def _make_result(self, predicted: str, groundtruth: str, distance: int,
+                     score_bound: Optional[str] = None) -> MetricResult:
+        """Build the MetricResult of one pair from its distance."""
+        max_len = max(len(predicted), len(groundtruth))
         
         # Normalize by the length of the longer string
         if self.normalize:
-            max_len = max(len(predicted), len(groundtruth))
-            # if max_len == 0:
-            #     score = 1.0  # Both strings are empty
-            # else:
-            #     score = 1.0 - (distance / max_len)
             if max_len == 0:
                 # 两者都为空时标记为失败
                 return MetricResult.create_error_result(
@@ -51,29 +91,24 @@ class EditDistanceMetric(BaseMetric):
                     "Both predicted and groundtruth are empty"
                 )
 
-            score = 1.0 - (distance / max_len)
-            return MetricResult(
-                metric_name=self.name,
-                score=score,
-                details={
-                    "distance": distance,
-                    "predicted_length": len(predicted),
-                    "groundtruth_length": len(groundtruth),
-                    "normalized": True
-                }
-            )
+            score = max(0.0, 1.0 - (distance / max_len))
         else:
             score = distance
-
-
+            if score_bound is not None:
+                # 距离越大越差，距离的下界对应分数的上界
+                score_bound = "upper" if score_bound == "lower" else "lower"
 
         details = {
             "distance": distance,
             "predicted_length": len(predicted),
             "groundtruth_length": len(groundtruth),
             "normalized": self.normalize,
+            "exact": score_bound is None,
         }
-
+        if score_bound is not None:
+            details["score_bound"] = score_bound
+            if self.score_cutoff is not None and not self.approximate:
+                details["score_cutoff"] = self.score_cutoff
 
         return MetricResult(
             metric_name=self.name,
@@ -81,10 +116,154 @@ class EditDistanceMetric(BaseMetric):
             details=details
         )
     
-    def _levenshtein_distance(self, s1: str, s2: str) -> int:
-        """Calculate Levenshtein distance between two strings."""
-
-        return Levenshtein.distance(s1, s2)
+    def _select_content(self, text: str, content_list: List[Dict[str, Any]] = None,
+                        split: Optional[Dict[str, str]] = None) -> str:
+        """选择参与比较的内容，子类按内容类型（代码、表格等）覆盖"""
+        return text
+    
+    def _decorate_result(self, result: MetricResult, predicted: str, groundtruth: str) -> MetricResult:
+        """为结果补充内容类型相关的信息，子类按需覆盖"""
+        return result
+    
+    def batch_calculate(self, predicted_list: List[Any],
+                        groundtruth_list: Union[Any, List[Any]],
+                        predicted_content_lists: Optional[List[List[Dict[str, Any]]]] = None,
+                        groundtruth_content_lists: Optional[Union[List[Dict[str, Any]], List[List[Dict[str, Any]]]]] = None,
+                        predicted_splits: Optional[List[Optional[Dict[str, str]]]] = None,
+                        groundtruth_splits: Optional[Union[Dict[str, str], List[Optional[Dict[str, str]]]]] = None,
+                        **kwargs) -> List[MetricResult]:
+        """
+        Score many predictions at once with rapidfuzz's multithreaded cdist/cpdist.
+        
+        Args:
+            predicted_list: Predicted texts
+            groundtruth_list: One groundtruth text shared by all predictions
+                (e.g. N extractors on one page), or a list/tuple paired with predicted_list
+            predicted_content_lists: Optional content list of every prediction
+            groundtruth_content_lists: Content list of the shared groundtruth, or one per pair
+            predicted_splits: Optional precomputed content split of every prediction
+            groundtruth_splits: Split of the shared groundtruth, or one per pair
+            
+        Returns:
+            List of MetricResult, identical to calling calculate() on each pair
+        """
+        n = len(predicted_list)
+        shared = not isinstance(groundtruth_list, (list, tuple))
+        if shared:
+            groundtruth_list = [groundtruth_list] * n
+            groundtruth_content_lists = [groundtruth_content_lists] * n
+            groundtruth_splits = [groundtruth_splits] * n
+        elif len(groundtruth_list) != n:
+            raise ValueError("predicted_list and groundtruth_list must have the same length")
+        
+        pairs = [
+            dict(predicted=pred, groundtruth=gt,
+                 predicted_content_list=pred_list, groundtruth_content_list=gt_list,
+                 predicted_split=pred_split, groundtruth_split=gt_split, **kwargs)
+            for pred, gt, pred_list, gt_list, pred_split, gt_split in zip(
+                predicted_list, groundtruth_list,
+                predicted_content_lists or [None] * n, groundtruth_content_lists or [None] * n,
+                predicted_splits or [None] * n, groundtruth_splits or [None] * n)
+        ]
+        
+        if self.score_cutoff is not None or self.approximate:
+            # 截断阈值和近似模式按样本长度决定，逐对计算
+            return [self.calculate(**pair) for pair in pairs]
+        
+        results: List[Optional[MetricResult]] = [None] * n
+        predictions, groundtruths, indices = [], [], []
+        shared_gt_part = None
+        for i, pair in enumerate(pairs):
+            try:
+                pred_part = self._select_content(pair['predicted'], pair['predicted_content_list'],
+                                                 pair['predicted_split'])
+                if shared and shared_gt_part is not None:
+                    # 共享的groundtruth只分割一次
+                    gt_part = shared_gt_part
+                else:
+                    gt_part = self._select_content(pair['groundtruth'], pair['groundtruth_content_list'],
+                                                   pair['groundtruth_split'])
+                    shared_gt_part = gt_part if shared else None
+            except Exception:
+                pred_part = gt_part = None
+            if isinstance(pred_part, str) and isinstance(gt_part, str):
+                predictions.append(pred_part)
+                groundtruths.append(gt_part)
+                indices.append(i)
+            else:
+                # 非法输入走单样本路径，得到相同的错误结果
+                results[i] = self.calculate(**pair)
+        
+        if indices:
+            distances = self._batch_distances(predictions, groundtruths, shared)
+            for i, pred_part, gt_part, distance in zip(indices, predictions, groundtruths, distances):
+                result = self._make_result(pred_part, gt_part, int(distance))
+                results[i] = self._decorate_result(result, pred_part, gt_part)
+        return results
+    
+    @staticmethod
+    def _batch_distances(predictions: List[str], groundtruths: List[str], shared: bool) -> List[int]:
+        """Levenshtein distances of many pairs, computed on all cores by rapidfuzz."""
+        from rapidfuzz import process
+        
+        if shared:
+            # 同一groundtruth只需作为一列参与cdist
+            matrix = process.cdist(predictions, groundtruths[:1], scorer=Levenshtein.distance, workers=-1)
+            return matrix[:, 0].tolist()
+        if hasattr(process, "cpdist"):
+            return process.cpdist(predictions, groundtruths, scorer=Levenshtein.distance, workers=-1).tolist()
+        # rapidfuzz < 3.6 没有cpdist
+        return [Levenshtein.distance(p, g) for p, g in zip(predictions, groundtruths)]
+    
+    def _levenshtein_distance(self, s1: str, s2: str, max_distance: Optional[int] = None) -> int:
+        """
+        Calculate Levenshtein distance between two strings.
+        
+        Args:
+            max_distance: Optional cutoff; if the distance is larger,
+                max_distance + 1 is returned (rapidfuzz then only evaluates a band)
+        """
+        if max_distance is None:
+            return Levenshtein.distance(s1, s2)
+        return Levenshtein.distance(s1, s2, score_cutoff=max_distance)
+    
+    def _chunked_distance(self, s1: str, s2: str) -> int:
+        """
+        Approximate the Levenshtein distance of huge texts.
+        
+        Both texts are aligned on identical lines; only the differing regions are
+        compared, and regions longer than chunk_size are split into the same number
+        of consecutive pieces compared pairwise. Concatenating the edit scripts of
+        the pieces gives a valid edit script, so the result is never smaller than
+        the exact distance.
+        """
+        lines1 = s1.splitlines(keepends=True)
+        lines2 = s2.splitlines(keepends=True)
+        matcher = difflib.SequenceMatcher(None, lines1, lines2)
+        
+        distance = 0
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            distance += self._piecewise_distance(''.join(lines1[i1:i2]), ''.join(lines2[j1:j2]))
+        return distance
+    
+    def _piecewise_distance(self, s1: str, s2: str) -> int:
+        """Sum of pairwise distances after splitting both strings into equally many pieces."""
+        longest = max(len(s1), len(s2))
+        if not s1 or not s2 or longest <= self.chunk_size:
+            return self._levenshtein_distance(s1, s2)
+        
+        pieces = -(-longest // self.chunk_size)
+        step1 = len(s1) / pieces
+        step2 = len(s2) / pieces
+        distance = 0
+        for k in range(pieces):
+            distance += self._levenshtein_distance(
+                s1[int(k * step1):int((k + 1) * step1)],
+                s2[int(k * step2):int((k + 1) * step2)],
+            )
+        return distance
 
 
 
@@ -226,24 +405,33 @@ class CodeEditMetric(EditDistanceMetric):
         """计算代码块的编辑距离"""
         
         # 从content_list中提取代码内容
-        pred_code = self._extract_code_content(predicted, predicted_content_list)
-        gt_code = self._extract_code_content(groundtruth, groundtruth_content_list)
+        pred_code = self._select_content(predicted, predicted_content_list,
+                                         kwargs.get('predicted_split'))
+        gt_code = self._select_content(groundtruth, groundtruth_content_list,
+                                       kwargs.get('groundtruth_split'))
         
         # 计算编辑距离
         result = super()._calculate_score(pred_code, gt_code, **kwargs)
+        return self._decorate_result(result, pred_code, gt_code)
+    
+    def _select_content(self, text: str, content_list: List[Dict[str, Any]] = None,
+                        split: Optional[Dict[str, str]] = None) -> str:
+        return self._extract_code_content(text, content_list, split)
+    
+    def _decorate_result(self, result: MetricResult, predicted: str, groundtruth: str) -> MetricResult:
         result.metric_name = self.name
         result.details.update({
-            "predicted_code_length": len(pred_code),
-            "groundtruth_code_length": len(gt_code),
+            "predicted_code_length": len(predicted),
+            "groundtruth_code_length": len(groundtruth),
             "content_type": "code"
         })
-        
         return result
     
-    def _extract_code_content(self, text: str, content_list: List[Dict[str, Any]] = None) -> str:
+    def _extract_code_content(self, text: str, content_list: List[Dict[str, Any]] = None,
+                              split: Optional[Dict[str, str]] = None) -> str:
         """从文本和content_list中提取代码内容"""
-        # 使用统一的内容分割方法
-        content_parts = self.split_content(text, content_list)
+        # 使用统一的内容分割方法（优先复用预先计算的分割结果）
+        content_parts = self._get_content_parts(text, content_list, split)
         return content_parts.get('code', '')
     
     def _extract_codes_from_content_list(self, content_list: List[Dict[str, Any]]) -> List[str]:
@@ -292,24 +480,33 @@ class TextEditMetric(EditDistanceMetric):
         """计算纯文本的编辑距离"""
         
         # 从文本中移除代码、表格、公式
-        pred_text = self._extract_pure_text(predicted, predicted_content_list)
-        gt_text = self._extract_pure_text(groundtruth, groundtruth_content_list)
+        pred_text = self._select_content(predicted, predicted_content_list,
+                                         kwargs.get('predicted_split'))
+        gt_text = self._select_content(groundtruth, groundtruth_content_list,
+                                       kwargs.get('groundtruth_split'))
         
         # 计算编辑距离
         result = super()._calculate_score(pred_text, gt_text, **kwargs)
+        return self._decorate_result(result, pred_text, gt_text)
+    
+    def _select_content(self, text: str, content_list: List[Dict[str, Any]] = None,
+                        split: Optional[Dict[str, str]] = None) -> str:
+        return self._extract_pure_text(text, content_list, split)
+    
+    def _decorate_result(self, result: MetricResult, predicted: str, groundtruth: str) -> MetricResult:
         result.metric_name = self.name
         result.details.update({
-            "predicted_text_length": len(pred_text),
-            "groundtruth_text_length": len(gt_text),
+            "predicted_text_length": len(predicted),
+            "groundtruth_text_length": len(groundtruth),
             "content_type": "text"
         })
-        
         return result
     
-    def _extract_pure_text(self, text: str, content_list: List[Dict[str, Any]] = None) -> str:
+    def _extract_pure_text(self, text: str, content_list: List[Dict[str, Any]] = None,
+                           split: Optional[Dict[str, str]] = None) -> str:
         """提取纯文本内容（排除代码、表格、公式）"""
-        # 使用统一的内容分割方法
-        content_parts = self.split_content(text, content_list)
+        # 使用统一的内容分割方法（优先复用预先计算的分割结果）
+        content_parts = self._get_content_parts(text, content_list, split)
         return content_parts.get('text', '')
     
     def _extract_text_from_content_list(self, content_list: List[Dict[str, Any]]) -> List[str]:
@@ -0,0 +1,279 @@
+"""
+Tree edit distance on compact node arrays for WebMainBench.
+
+Trees are stored as flat postorder arrays (tag, text, leftmost leaf) whose
+labels are computed once, and rename costs for all node pairs are computed up
+front with rapidfuzz. The Zhang-Shasha dynamic program is vectorized with NumPy
+over all keyroot subtrees of the second tree that have the same size, so one
+row of the forest-distance table is a few array operations instead of a Python
+loop over node pairs.
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
+
+
+class TableTree:
+    """Ordered tree stored in postorder."""
+
+    __slots__ = ("tags", "texts", "leftmost", "_keyroots")
+
+    def __init__(self):
+        self.tags: List[str] = []
+        self.texts: List[str] = []
+        # 每个节点最左叶子的后序编号
+        self.leftmost: List[int] = []
+        self._keyroots: Optional[List[int]] = None
+
+    def append(self, tag: str, text: str = "", leftmost: Optional[int] = None) -> int:
+        """
+        Append a node after all of its children (postorder).
+
+        Args:
+            tag: Node tag
+            text: Node text ('' when text is ignored)
+            leftmost: Leftmost leaf of the node's first child, None for a leaf
+
+        Returns:
+            Leftmost leaf of the appended node
+        """
+        index = len(self.tags)
+        leftmost = index if leftmost is None else leftmost
+        self.tags.append(tag)
+        self.texts.append(text)
+        self.leftmost.append(leftmost)
+        self._keyroots = None
+        return leftmost
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def children(self, node: int) -> List[int]:
+        """Children of a node, left to right."""
+        children = []
+        child = node - 1
+        while child >= self.leftmost[node]:
+            children.append(child)
+            child = self.leftmost[child] - 1
+        children.reverse()
+        return children
+
+    def subtree_size(self, node: int) -> int:
+        return node - self.leftmost[node] + 1
+
+    @property
+    def keyroots(self) -> List[int]:
+        """Nodes that have no ancestor with the same leftmost leaf, in postorder."""
+        if self._keyroots is None:
+            highest = {}
+            for node, leftmost in enumerate(self.leftmost):
+                highest[leftmost] = node
+            self._keyroots = sorted(highest.values())
+        return self._keyroots
+
+
+def rename_costs(tree1: TableTree, tree2: TableTree) -> np.ndarray:
+    """
+    Rename cost of every node pair, shape (len(tree1), len(tree2)).
+
+    Different tags cost 1. With the same tag, equal texts cost 0, an empty text
+    costs the length of the other text, and otherwise the cost is the Levenshtein
+    distance normalized by the longer text.
+    """
+    costs = np.ones((len(tree1), len(tree2)))
+    nodes1 = _group_by_tag(tree1)
+    nodes2 = _group_by_tag(tree2)
+
+    for tag, indices1 in nodes1.items():
+        indices2 = nodes2.get(tag)
+        if indices2 is None:
+            continue
+        texts1 = [tree1.texts[i] for i in indices1]
+        texts2 = [tree2.texts[j] for j in indices2]
+        # 同一标签的节点一次性计算文本距离
+        block = process.cdist(texts1, texts2, scorer=Levenshtein.normalized_distance,
+                              dtype=np.float64, workers=-1)
+        lengths1 = np.array([len(text) for text in texts1], dtype=np.float64)
+        lengths2 = np.array([len(text) for text in texts2], dtype=np.float64)
+        empty1 = lengths1 == 0
+        empty2 = lengths2 == 0
+        block[empty1, :] = lengths2
+        block[:, empty2] = lengths1[:, None]
+        costs[np.ix_(indices1, indices2)] = block
+
+    return costs
+
+
+def rename_cost(tag1: str, text1: str, tag2: str, text2: str) -> float:
+    """Rename cost of a single node pair, same rules as rename_costs."""
+    if tag1 != tag2:
+        return 1.0
+    if text1 == text2:
+        return 0.0
+    if not text1 or not text2:
+        return float(len(text1) + len(text2))
+    return Levenshtein.normalized_distance(text1, text2)
+
+
+def bracket_notation(tree: TableTree) -> str:
+    """
+    The tree in the bracket notation of the original TEDS implementation.
+
+    Labels are "tag:text", or just "tag" without text; '(', ')' and ',' in the
+    text are replaced by '[', ']' and ';'.
+    """
+    notation: List[str] = []
+    for node, (tag, text) in enumerate(zip(tree.tags, tree.texts)):
+        label = f"{tag}:{text.replace('(', '[').replace(')', ']').replace(',', ';')}" if text else tag
+        children = tree.children(node)
+        if children:
+            label += "(" + ",".join(notation[child] for child in children) + ")"
+        notation.append(label)
+    return notation[-1] if notation else ""
+
+
+def legacy_distance(tree1: TableTree, tree2: TableTree) -> float:
+    """
+    Distance used by the original TEDS implementation.
+
+    It passed the bracket notation strings to APTED, which treats a string as a
+    single node without children. The distance is therefore the rename cost of
+    the two whole strings, with the part before the first ':' as the tag and
+    the rest as the text.
+    """
+    tag1, _, text1 = bracket_notation(tree1).partition(':')
+    tag2, _, text2 = bracket_notation(tree2).partition(':')
+    return rename_cost(tag1, text1, tag2, text2)
+
+
+def _group_by_tag(tree: TableTree) -> Dict[str, List[int]]:
+    groups: Dict[str, List[int]] = {}
+    for index, tag in enumerate(tree.tags):
+        groups.setdefault(tag, []).append(index)
+    return groups
+
+
+def tree_edit_distance(tree1: TableTree, tree2: TableTree,
+                       costs: Optional[np.ndarray] = None) -> float:
+    """
+    Zhang-Shasha tree edit distance with unit insert/delete costs.
+
+    Args:
+        tree1: Source tree
+        tree2: Target tree
+        costs: Optional precomputed rename_costs(tree1, tree2)
+
+    Returns:
+        Minimum total cost of turning tree1 into tree2
+    """
+    if costs is None:
+        costs = rename_costs(tree1, tree2)
+    if not len(tree1) or not len(tree2):
+        return float(len(tree1) + len(tree2))
+
+    # 行循环在Python中执行，列按同尺寸子树向量化；选择行数较少的方向
+    if _loop_cost(tree2, tree1) < _loop_cost(tree1, tree2):
+        tree1, tree2, costs = tree2, tree1, costs.T
+
+    leftmost1 = tree1.leftmost
+    treedist = np.zeros((len(tree1), len(tree2)))
+    buckets = _keyroot_buckets(tree2)
+    steps = np.arange(1, max(size for size, _, _, _ in buckets) + 1, dtype=np.float64)
+
+    for i in tree1.keyroots:
+        first = leftmost1[i]
+        rows = i - first + 1
+        for size, cols, extends, starts in buckets:
+            # forest[r, k, c]: 第一棵树的森林 first..first+r-1 与第k个关键子树前c个节点的距离
+            forest = np.empty((rows + 1, len(cols), size + 1))
+            forest[0] = np.arange(size + 1)
+            segments = np.arange(len(cols))[:, None]
+            offsets = steps[:size]
+            for r in range(1, rows + 1):
+                x = first + r - 1
+                previous = forest[r - 1]
+                delete = previous[:, 1:] + 1.0
+                subtree = forest[leftmost1[x] - first][segments, starts] + treedist[x][cols]
+                if leftmost1[x] == first:
+                    rename = previous[:, :-1] + costs[x][cols]
+                    best = np.minimum(delete, np.where(extends, rename, subtree))
+                else:
+                    best = np.minimum(delete, subtree)
+                # 插入：forest[r, c] = min(best[c], forest[r, c-1] + 1)，用前缀最小值一次完成
+                row = forest[r]
+                row[:, 0] = r
+                np.minimum(np.minimum.accumulate(best - offsets, axis=1) + offsets,
+                           r + offsets, out=row[:, 1:])
+                if leftmost1[x] == first:
+                    treedist[x, cols[extends]] = row[:, 1:][extends]
+
+    return float(treedist[-1, -1])
+
+
+def _loop_cost(tree1: TableTree, tree2: TableTree) -> int:
+    """Number of vectorized row updates when tree1 is iterated row by row."""
+    sizes2 = {j - tree2.leftmost[j] for j in tree2.keyroots}
+    return sum(i - tree1.leftmost[i] + 1 for i in tree1.keyroots) * len(sizes2)
+
+
+def _keyroot_buckets(tree: TableTree):
+    """
+    Group keyroot subtrees by size, smallest first.
+
+    A keyroot only depends on distances of its proper descendants, which are
+    smaller, so every bucket can be computed at once after the previous ones.
+    """
+    leftmost = np.asarray(tree.leftmost)
+    by_size: Dict[int, List[int]] = {}
+    for j in tree.keyroots:
+        by_size.setdefault(j - tree.leftmost[j] + 1, []).append(j)
+
+    buckets = []
+    for size in sorted(by_size):
+        roots = np.array(by_size[size])
+        first = leftmost[roots][:, None]
+        cols = first + np.arange(size)
+        # extends: 节点与关键子树共享最左叶子；starts: 该节点子树之前的森林长度
+        extends = leftmost[cols] == first
+        starts = leftmost[cols] - first
+        buckets.append((size, cols, extends, starts))
+    return buckets
+
+
+def distance_bounds(tree1: TableTree, tree2: TableTree) -> Tuple[float, float]:
+    """
+    Cheap lower and upper bounds of tree_edit_distance, linear in the tree sizes.
+
+    Lower bound: label histogram distance. Nodes that cannot be matched to a node
+    with the same tag cost at least 1 each; this also covers the node-count
+    difference and differences in the number of rows and cells.
+
+    Upper bound: cost of the edit script that aligns the two trees top-down by
+    position (rows to rows, cells to cells) and deletes/inserts what is left.
+    """
+    n1, n2 = len(tree1), len(tree2)
+    if not n1 or not n2:
+        return float(n1 + n2), float(n1 + n2)
+
+    counts1 = Counter(tree1.tags)
+    counts2 = Counter(tree2.tags)
+    matchable = sum(min(count, counts2[tag]) for tag, count in counts1.items())
+    lower = float(max(n1, n2) - matchable)
+
+    upper = 0.0
+    stack = [(n1 - 1, n2 - 1)]
+    while stack:
+        x, y = stack.pop()
+        upper += rename_cost(tree1.tags[x], tree1.texts[x], tree2.tags[y], tree2.texts[y])
+        children1 = tree1.children(x)
+        children2 = tree2.children(y)
+        stack.extend(zip(children1, children2))
+        common = min(len(children1), len(children2))
+        upper += sum(tree1.subtree_size(c) for c in children1[common:])
+        upper += sum(tree2.subtree_size(c) for c in children2[common:])
+
+    return lower, upper